@@ -46,6 +46,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 class BrokerApplication(models.Model):
+    DOCUMENT_FIELDS = ("id_document_primary", "id_document_secondary", "selfie_with_id")
+
     STATUS_PENDING = "pending"
     STATUS_APPROVED = "approved"
     STATUS_REJECTED = "rejected"
@@ -2,6 +2,7 @@ import json
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.urls import reverse
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -182,4 +183,13 @@ class BrokerApplicationSerializer(serializers.ModelSerializer):
         representation = super().to_representation(instance)
         for key in self._detail_keys:
             representation[key] = instance.details.get(key)
+        # Documents are only reachable through the authorized download view, never MEDIA_URL.
+        request = self.context.get("request")
+        for field in BrokerApplication.DOCUMENT_FIELDS:
+            url = None
+            if getattr(instance, field):
+                url = reverse("broker-document", kwargs={"pk": instance.pk, "document": field})
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+            representation[field] = url
         return representation
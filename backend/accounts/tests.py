@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import BrokerApplication
+
+User = get_user_model()
+
+
+class BrokerDocumentViewTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, PROTECTED_MEDIA_BACKEND="")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.application = BrokerApplication.objects.create(
+            user=self.owner,
+            id_document_primary=SimpleUploadedFile("front.png", b"0123456789", content_type="image/png"),
+            id_document_secondary=SimpleUploadedFile("back.png", b"back", content_type="image/png"),
+            selfie_with_id=SimpleUploadedFile("selfie.png", b"selfie", content_type="image/png"),
+        )
+        self.url = reverse("broker-document", kwargs={"pk": self.application.pk, "document": "id_document_primary"})
+
+    def test_owner_downloads_document(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_application_links_documents_through_the_download_view(self):
+        self.client.force_authenticate(self.owner)
+        application = self.client.get(reverse("broker-application")).data["application"]
+        self.assertEqual(application["id_document_primary"], self.url)
+        self.assertEqual(self.client.get(application["selfie_with_id"]).status_code, 200)
+
+    def test_range_request_returns_partial_content(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_other_users_cannot_download_but_staff_can(self):
+        stranger = User.objects.create_user(email="stranger@example.com", password="pass")
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(PROTECTED_MEDIA_BACKEND="nginx", PROTECTED_MEDIA_INTERNAL_URL="/protected-media/")
+    def test_nginx_backend_delegates_transfer(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.application.id_document_primary.name}")
@@ -1,12 +1,17 @@
 import logging
 
 from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from config.protected_media import serve_protected_file
+from config.throttling import AccountTokenBucketThrottle, IPTokenBucketThrottle
+from .models import BrokerApplication
 from .serializers import EmailTokenObtainPairSerializer, RegisterSerializer, UserSerializer, BrokerApplicationSerializer
 
 logger = logging.getLogger("api")
@@ -17,6 +22,8 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, AccountTokenBucketThrottle]
+    throttle_scope = "register"
 
     def create(self, request, *args, **kwargs):
         logger.info("Register attempt for %s", request.data.get("email"))
@@ -27,6 +34,8 @@ class RegisterView(generics.CreateAPIView):
 class LoginView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, AccountTokenBucketThrottle]
+    throttle_scope = "login"
 
     def post(self, request, *args, **kwargs):
         logger.info("Login attempt for %s", request.data.get("email"))
@@ -72,3 +81,17 @@ class BrokerApplicationView(APIView):
         output = BrokerApplicationSerializer(application).data
         response_status = status.HTTP_200_OK if was_existing else status.HTTP_201_CREATED
         return Response({"application": output, "is_broker": application.user.is_broker}, status=response_status)
+
+
+class BrokerDocumentView(APIView):
+    def get(self, request, pk: int, document: str, *args, **kwargs):
+        if document not in BrokerApplication.DOCUMENT_FIELDS:
+            raise Http404
+        queryset = BrokerApplication.objects.all()
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        application = get_object_or_404(queryset, pk=pk)
+        field_file = getattr(application, document)
+        if not field_file:
+            raise Http404
+        return serve_protected_file(request, field_file)
@@ -0,0 +1,187 @@
+"""Commission payouts: the arithmetic, the streamed query, and the endpoint end to end.
+
+    python -m benchmarks.commission_payouts [--rows 1000000] [--db-rows 100000]
+
+1. Accumulation over ``--rows`` synthetic rows generated in memory in the shape
+   ``commissions.payout_rows`` streams, so this measures the Decimal arithmetic and
+   per-broker accumulation alone. The naive baseline quantizes every share to cents as
+   it goes, the way the spreadsheets did; the gap shows in both speed and lost cents.
+2. ``--db-rows`` completed transactions are seeded into the database (in-memory SQLite
+   unless DB_* says otherwise). ``payout_rows`` streamed through ``iterator(chunk_size=…)``
+   is compared with loading model instances the usual way, in wall time and peak
+   Python memory.
+3. ``GET /api/commissions/payouts/`` and its ``?export=csv`` stream through the full
+   middleware stack, with the time to the CSV's first chunk and the peak memory while
+   its body is consumed.
+"""
+import argparse
+import logging
+import random
+import time
+import tracemalloc
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from benchmarks.common import seed_transactions, setup_django
+
+setup_django()
+
+from rest_framework.test import APIClient  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from transactions.commissions import (  # noqa: E402
+    CENT,
+    accumulate_payouts,
+    closed_transactions,
+    commission_rate,
+    payout_rows,
+    total,
+)
+from transactions.models import CommissionSplit, Transaction, TransactionStatus  # noqa: E402
+
+BROKERS = 500
+SPLITS = [(Decimal("50"), Decimal("50")), (Decimal("60"), Decimal("40")), (Decimal("33.33"), Decimal("66.67"))]
+
+
+def synthetic_rows(count: int, seed: int = 7) -> list[tuple]:
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        price = Decimal(rng.randrange(5_000_000, 200_000_000)) / 100
+        primary = rng.randrange(BROKERS)
+        if index % 3:
+            primary_pct, secondary_pct = rng.choice(SPLITS)
+            rows.append((index, price, primary, primary_pct, secondary_pct, rng.randrange(BROKERS)))
+        else:
+            rows.append((index, price, primary, None, None, None))
+    return rows
+
+
+def naive_payouts(rows, rate: Decimal) -> dict:
+    totals: dict = {}
+    for _, price, primary_id, primary_pct, secondary_pct, secondary_id in rows:
+        commission = (price * rate).quantize(CENT, rounding=ROUND_HALF_EVEN)
+        if primary_pct is None:
+            totals[primary_id] = totals.get(primary_id, Decimal(0)) + commission
+            continue
+        primary_share = (commission * primary_pct / 100).quantize(CENT, rounding=ROUND_HALF_EVEN)
+        secondary_share = (commission * secondary_pct / 100).quantize(CENT, rounding=ROUND_HALF_EVEN)
+        totals[primary_id] = totals.get(primary_id, Decimal(0)) + primary_share
+        totals[secondary_id] = totals.get(secondary_id, Decimal(0)) + secondary_share
+    return totals
+
+
+def model_rows(queryset):
+    # What the view would do without payout_rows: full model instances, all in memory. The
+    # seeded data has no secondary participants, so both paths see the same rows.
+    rows = []
+    for transaction_obj in queryset.select_related("commission_split"):
+        try:
+            split = transaction_obj.commission_split
+        except CommissionSplit.DoesNotExist:
+            split = None
+        rows.append(
+            (
+                transaction_obj.pk,
+                transaction_obj.purchase_price,
+                transaction_obj.created_by_id,
+                split.primary_broker_pct if split else None,
+                split.secondary_broker_pct if split else None,
+                None,
+            )
+        )
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def line(label: str, seconds: float, count: int, peak: int | None = None) -> None:
+    text = f"{label:<40} {seconds:6.2f}s  {count / seconds:>12,.0f} rows/s"
+    if peak is not None:
+        text += f"  peak {peak / 2**20:8.1f} MiB"
+    print(text)
+
+
+def bench_arithmetic(count: int, rate: Decimal) -> None:
+    rows, generated = timed(synthetic_rows, count)
+    print(f"accumulation over {count:,} in-memory rows (generated in {generated:.1f}s)")
+    naive, naive_seconds = timed(naive_payouts, rows, rate)
+    payouts, seconds = timed(accumulate_payouts, rows, rate)
+    exact = sum(price * rate for _, price, *_ in rows)
+    line("naive per-share rounding", naive_seconds, count)
+    line("accumulate_payouts", seconds, count)
+    print(f"exact total commission           {exact.quantize(CENT)}")
+    print(f"accumulate_payouts total         {total(payouts)}")
+    print(f"naive total                      {sum(naive.values())}")
+
+
+def bench_query(count: int, rate: Decimal) -> None:
+    print(f"\n{count:,} completed transactions in the database")
+    queryset = closed_transactions()
+
+    def loaded_payouts():
+        return accumulate_payouts(model_rows(queryset), rate)
+
+    def streamed_payouts():
+        return accumulate_payouts(payout_rows(queryset), rate)
+
+    loaded, seconds = timed(loaded_payouts)
+    line("model instances, then accumulate", seconds, count, peak_memory(loaded_payouts))
+    streamed, seconds = timed(streamed_payouts)
+    line("payout_rows streamed (iterator)", seconds, count, peak_memory(streamed_payouts))
+    assert total(loaded) == total(streamed), "streamed totals differ"
+
+
+def bench_endpoint(count: int) -> None:
+    staff = User.objects.create_user(email="bench-staff@example.com", password="bench", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(staff)
+    url = "/api/commissions/payouts/"
+
+    response, seconds = timed(client.get, url)
+    assert response.status_code == 200, response.status_code
+    line("GET payouts (JSON totals)", seconds, count, peak_memory(lambda: client.get(url)))
+
+    def export():
+        start = time.perf_counter()
+        response = client.get(url, {"export": "csv"})
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        first = time.perf_counter() - start
+        size = sum(len(chunk) for chunk in chunks)
+        return first, time.perf_counter() - start, size
+
+    first, seconds, size = export()
+    line("GET payouts?export=csv (streamed)", seconds, count, peak_memory(export))
+    print(f"{'':<40} first chunk after {first * 1000:.1f} ms, {size / 2**20:.1f} MiB of CSV")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="in-memory rows for the arithmetic")
+    parser.add_argument("--db-rows", type=int, default=100_000, help="transactions seeded into the database")
+    args = parser.parse_args()
+    logging.getLogger("api").setLevel(logging.WARNING)
+    rate = commission_rate()
+
+    bench_arithmetic(args.rows, rate)
+    seed_transactions(args.db_rows)
+    Transaction.objects.update(status=TransactionStatus.COMPLETED)
+    bench_query(args.db_rows, rate)
+    bench_endpoint(args.db_rows)
+
+
+if __name__ == "__main__":
+    main()
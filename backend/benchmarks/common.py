@@ -0,0 +1,97 @@
+"""Shared helpers for the scripts in this package.
+
+Run a benchmark from ``backend/`` with ``python -m benchmarks.<name>``. Unless the
+environment says otherwise they use an in-memory SQLite database.
+"""
+import os
+import time
+
+import django
+
+
+def setup_django() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("DB_ENGINE", "django.db.backends.sqlite3")
+    os.environ.setdefault("DB_NAME", ":memory:")
+    os.environ.setdefault("DEBUG", "false")
+    django.setup()
+
+
+def best_of(func, *, number: int, repeat: int = 5) -> float:
+    """Best mean wall time per call, in seconds, over ``repeat`` runs of ``number`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def report(label: str, seconds: float, baseline: float | None = None) -> None:
+    line = f"{label:<40} {seconds * 1e6:10.1f} us"
+    if baseline:
+        line += f"   ({baseline / seconds:5.2f}x vs baseline)"
+    print(line)
+
+
+def seed_transactions(count: int):
+    """Migrate the (in-memory) database and bulk-insert ``count`` transactions for one broker.
+
+    Every third transaction is a double-broker split with a commission split and a
+    participant row, so list and detail payloads carry the usual mix of fields.
+    """
+    import datetime
+    import uuid
+    from decimal import Decimal
+
+    from django.core.management import call_command
+
+    from accounts.models import User
+    from transactions.models import (
+        CommissionSplit,
+        ParticipantRole,
+        Transaction,
+        TransactionParticipant,
+        TransactionStatus,
+        TransactionType,
+    )
+
+    call_command("migrate", verbosity=0)
+    broker = User.objects.create_user(email="bench-broker@example.com", password="bench", is_broker=True)
+    transactions, splits, participants = [], [], []
+    for index in range(count):
+        split = index % 3 == 0
+        transaction_obj = Transaction(
+            id=uuid.uuid4(),
+            created_by=broker,
+            type=TransactionType.DOUBLE_BROKER_SPLIT if split else TransactionType.SINGLE_BROKER_SALE,
+            status=TransactionStatus.INVITING,
+            title=f"Transaction {index}",
+            property_description="Three-bedroom house with garden",
+            purchase_price=Decimal(250_000 + index) + Decimal("0.50"),
+            earnest_deposit=Decimal("10000.00"),
+            due_diligence_end_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=index % 90),
+            estimated_closing_date=datetime.date(2025, 3, 1) + datetime.timedelta(days=index % 90),
+            property_address=f"{index} Main Street",
+        )
+        transactions.append(transaction_obj)
+        participants.append(
+            TransactionParticipant(
+                transaction=transaction_obj,
+                role=ParticipantRole.BROKER_PRIMARY,
+                user=broker,
+                invited_email=broker.email,
+                invited_by=broker,
+            )
+        )
+        if split:
+            splits.append(
+                CommissionSplit(
+                    transaction=transaction_obj, primary_broker_pct=Decimal("60"), secondary_broker_pct=Decimal("40")
+                )
+            )
+    Transaction.objects.bulk_create(transactions, batch_size=500)
+    TransactionParticipant.objects.bulk_create(participants, batch_size=500)
+    CommissionSplit.objects.bulk_create(splits, batch_size=500)
+    return broker
@@ -0,0 +1,48 @@
+"""Bytes saved vs compression time per gzip level, for APIGZipMiddleware payloads.
+
+    python -m benchmarks.compression [rows]
+
+Payloads are the list endpoint's rendered JSON for 50 and ``rows`` transactions and a
+single detail body. Transfer time is estimated at a 10 Mbit/s mobile link, so each level's
+CPU cost can be read against the time it saves on the wire.
+"""
+import gzip
+import sys
+
+from benchmarks.common import best_of, seed_transactions, setup_django
+
+setup_django()
+
+from config.renderers import FastJSONRenderer  # noqa: E402
+from transactions import fastpath  # noqa: E402
+from transactions.models import Transaction  # noqa: E402
+
+LINK_BYTES_PER_SECOND = 10_000_000 / 8
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    broker = seed_transactions(count)
+    queryset = Transaction.objects.visible_to(broker).order_by("created_at")
+    renderer = FastJSONRenderer()
+    payloads = {
+        "detail": renderer.render(fastpath.detail_row(queryset[:1])),
+        "list, 50 rows": renderer.render(fastpath.list_rows(queryset[:50], broker)),
+        f"list, {count:,} rows": renderer.render(fastpath.list_rows(queryset, broker)),
+    }
+    for label, body in payloads.items():
+        wire = len(body) / LINK_BYTES_PER_SECOND * 1000
+        print(f"{label}: {len(body):,} bytes, {wire:.1f} ms on the wire uncompressed")
+        print(f"  {'level':>5} {'bytes':>12} {'ratio':>7} {'compress ms':>12} {'saved ms':>10}")
+        for level in (1, 3, 5, 6, 9):
+            compressed = gzip.compress(body, compresslevel=level, mtime=0)
+            seconds = best_of(lambda: gzip.compress(body, compresslevel=level, mtime=0), number=3, repeat=3)
+            saved = (len(body) - len(compressed)) / LINK_BYTES_PER_SECOND * 1000 - seconds * 1000
+            print(
+                f"  {level:>5} {len(compressed):>12,} {len(body) / len(compressed):>6.1f}x "
+                f"{seconds * 1000:>12.2f} {saved:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
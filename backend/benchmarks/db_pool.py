@@ -0,0 +1,73 @@
+"""Pooled vs unpooled connection throughput against PostgreSQL.
+
+Each simulated request opens a connection (or checks one out), runs one query and
+closes it, which is what Django does per request with CONN_MAX_AGE=0.
+
+    DB_ENGINE=django.db.backends.postgresql DB_NAME=escrow DB_USER=... \\
+        python -m benchmarks.db_pool --threads 8 --requests 500
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_django
+
+setup_django()
+
+from django.db import connections  # noqa: E402
+
+from config.db import check_connection, pool_samples  # noqa: E402
+
+
+def configure_aliases(pool_size: int) -> None:
+    base = {key: value for key, value in connections.settings["default"].items() if key != "OPTIONS"}
+    connections.settings["unpooled"] = {**base, "CONN_MAX_AGE": 0, "OPTIONS": {}}
+    connections.settings["pooled"] = {
+        **base,
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {"pool": {"min_size": pool_size, "max_size": pool_size, "check": check_connection}},
+    }
+
+
+def simulated_request(alias: str) -> None:
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    connection.close()
+
+
+def throughput(alias: str, threads: int, requests: int) -> float:
+    def worker(_):
+        for _ in range(requests):
+            simulated_request(alias)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(threads)))
+    return threads * requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="requests per thread")
+    args = parser.parse_args()
+
+    if connections["default"].vendor != "postgresql":
+        raise SystemExit("This benchmark needs DB_ENGINE=django.db.backends.postgresql.")
+
+    configure_aliases(pool_size=args.threads)
+    simulated_request("pooled")  # open the pool outside the timed run
+    unpooled = throughput("unpooled", args.threads, args.requests)
+    pooled = throughput("pooled", args.threads, args.requests)
+
+    print(f"unpooled: {unpooled:10.0f} req/s")
+    print(f"pooled:   {pooled:10.0f} req/s   ({pooled / unpooled:.2f}x)")
+    for name, labels, value in pool_samples():
+        if labels["alias"] == "pooled":
+            print(f"  {name} = {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Per-request middleware overhead: full session stack vs the API dispatch path.
+
+    python -m benchmarks.middleware
+"""
+import logging
+
+from benchmarks.common import best_of, report, setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.base import BaseHandler  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+
+LEGACY_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.middleware.RequestLogMiddleware",
+]
+
+
+def build_handler(middleware) -> BaseHandler:
+    with override_settings(MIDDLEWARE=middleware):
+        handler = BaseHandler()
+        handler.load_middleware()
+    return handler
+
+
+def main() -> None:
+    logging.getLogger("api").setLevel(logging.WARNING)
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+    factory = RequestFactory()
+    # Unauthenticated profile request: DRF answers 401 without touching the database,
+    # so the difference between the runs is the middleware chain itself.
+    make_request = lambda: factory.get("/api/auth/profile/", HTTP_ORIGIN="http://localhost:5173")  # noqa: E731
+
+    legacy = build_handler(LEGACY_MIDDLEWARE)
+    dispatch = build_handler(settings.MIDDLEWARE)
+    baseline = best_of(lambda: legacy.get_response(make_request()), number=2000)
+    fast = best_of(lambda: dispatch.get_response(make_request()), number=2000)
+
+    report("legacy MIDDLEWARE, /api/ request", baseline)
+    report("APIDispatchMiddleware, /api/ request", fast, baseline)
+    print(f"saved per request: {(baseline - fast) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""DRF's JSONRenderer vs ``config.renderers.FastJSONRenderer`` on large list payloads.
+
+    python -m benchmarks.renderers [rows]
+
+Two payloads: the transaction list as the API serves it (strings, raw UUID/datetime
+columns) and commission-style rows that are mostly ``Decimal``, ``UUID`` and dates.
+"""
+import datetime
+import sys
+import uuid
+from decimal import Decimal
+
+from benchmarks.common import best_of, report, seed_transactions, setup_django
+
+setup_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from config.renderers import FastJSONRenderer  # noqa: E402
+from transactions import fastpath  # noqa: E402
+from transactions.models import Transaction  # noqa: E402
+
+
+def typed_rows(count: int) -> list[dict]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "broker": index % 500,
+            "amount": Decimal(index) / 7,
+            "purchase_price": Decimal(250_000 + index) + Decimal("0.50"),
+            "closing_date": datetime.date(2025, 1, 1) + datetime.timedelta(days=index % 365),
+            "updated_at": now - datetime.timedelta(seconds=index),
+        }
+        for index in range(count)
+    ]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    broker = seed_transactions(count)
+    payloads = {
+        "transaction list": fastpath.list_rows(Transaction.objects.visible_to(broker).order_by("created_at"), broker),
+        "Decimal/UUID/date rows": typed_rows(count),
+    }
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+    for label, data in payloads.items():
+        assert drf.render(data) == fast.render(data), f"{label}: output differs"
+        print(f"{label}, {count:,} rows ({len(fast.render(data)) / 1e6:.1f} MB)")
+        baseline = best_of(lambda: drf.render(data), number=3)
+        report("  JSONRenderer", baseline)
+        report("  FastJSONRenderer", best_of(lambda: fast.render(data), number=3), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""DRF list/detail serializers vs the compiled fast path in ``transactions.fastpath``.
+
+    python -m benchmarks.serializers [rows]
+
+Both sides run their own queries against the same in-memory SQLite table (10k rows by
+default), the way the list view does, and both outputs are rendered once to check
+they are byte-identical.
+"""
+import sys
+from types import SimpleNamespace
+
+from benchmarks.common import best_of, report, seed_transactions, setup_django
+
+setup_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from transactions import fastpath  # noqa: E402
+from transactions.models import Transaction  # noqa: E402
+from transactions.serializers import TransactionListSerializer  # noqa: E402
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    broker = seed_transactions(count)
+    context = {"request": SimpleNamespace(user=broker)}
+    queryset = Transaction.objects.visible_to(broker).order_by("created_at", "pk")
+
+    def drf_list():
+        return TransactionListSerializer(queryset.prefetch_related("participants"), many=True, context=context).data
+
+    def fast_list():
+        return fastpath.list_rows(queryset, broker)
+
+    renderer = JSONRenderer()
+    assert renderer.render(drf_list()) == renderer.render(fast_list()), "fast path output differs"
+
+    print(f"list of {count:,} transactions")
+    baseline = best_of(drf_list, number=1, repeat=3)
+    report("TransactionListSerializer", baseline)
+    report("fastpath.list_rows", best_of(fast_list, number=1, repeat=3), baseline)
+
+
+if __name__ == "__main__":
+    main()
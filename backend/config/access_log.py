@@ -0,0 +1,16 @@
+"""gunicorn access logger that keeps secret path segments out of the log.
+
+Imported by gunicorn through ``logger_class`` (see ``config.serving``), so it is only
+loaded where gunicorn is installed.
+"""
+from gunicorn.glogging import Logger
+
+from config.middleware import redact_path
+
+
+class RedactingLogger(Logger):
+    def atoms(self, resp, req, environ, request_time):
+        atoms = super().atoms(resp, req, environ, request_time)
+        for name in ("r", "U"):  # request line, path
+            atoms[name] = redact_path(atoms[name])
+        return atoms
@@ -0,0 +1,96 @@
+import json
+import logging
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from config.middleware import redact_path
+
+logger = logging.getLogger("api")
+
+BATCH_PATH = "/api/batch/"
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=["GET"], default="GET")
+    path = serializers.RegexField(r"^/api/", max_length=2048)
+
+    def validate_path(self, value: str) -> str:
+        if value.split("?", 1)[0] == BATCH_PATH:
+            raise serializers.ValidationError("Batch requests cannot be nested.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=BatchItemSerializer(),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_REQUESTS,
+    )
+
+
+class BatchView(APIView):
+    """Run several read-only API calls inside one request.
+
+    The outer request is authenticated once; every sub-request is dispatched straight to
+    its view with that user forced onto it, on the same thread and DB connection.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = [self._dispatch(request, item["path"]) for item in serializer.validated_data["requests"]]
+        return Response({"responses": results})
+
+    def _dispatch(self, request, full_path: str) -> dict:
+        path, _, query_string = full_path.partition("?")
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return {"path": full_path, "status": 404, "body": {"detail": "Not found."}}
+
+        sub_request = self._sub_request(request, path, query_string)
+        sub_request.resolver_match = match
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Http404:
+            return {"path": full_path, "status": 404, "body": {"detail": "Not found."}}
+
+        logger.info("batch GET %s -> %s", redact_path(full_path), response.status_code)
+        try:
+            return {"path": full_path, "status": response.status_code, "body": _response_body(response)}
+        finally:
+            # Streaming and file responses hold their iterator or file open until closed.
+            response.close()
+
+    @staticmethod
+    def _sub_request(request, path: str, query_string: str) -> HttpRequest:
+        outer = request._request
+        sub_request = HttpRequest()
+        sub_request.method = "GET"
+        sub_request.path = sub_request.path_info = path
+        sub_request.META = {
+            key: value
+            for key, value in outer.META.items()
+            if key not in ("CONTENT_LENGTH", "CONTENT_TYPE", "wsgi.input")
+        }
+        sub_request.META.update(REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query_string)
+        sub_request.GET = QueryDict(query_string)
+        sub_request.COOKIES = outer.COOKIES
+        # DRF's Request picks these up and skips its authenticators for the sub-request.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+
+def _response_body(response):
+    data = getattr(response, "data", None)
+    if data is not None:
+        return data
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(response.content or b"null")
+    return None
@@ -0,0 +1,56 @@
+SQLITE_TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+def sqlite_options(
+    *,
+    journal_mode: str = "WAL",
+    synchronous: str = "NORMAL",
+    busy_timeout_ms: int = 5000,
+    cache_size_kib: int = 20000,
+    mmap_size: int = 128 * 1024 * 1024,
+    transaction_mode: str = "IMMEDIATE",
+) -> dict:
+    """Backend OPTIONS applying per-connection pragmas for a SQLite database.
+
+    WAL lets readers run alongside the single writer, and IMMEDIATE transactions take the
+    write lock up front so concurrent writers wait on ``busy_timeout`` instead of failing
+    with "database is locked" when a read lock cannot be upgraded.
+    """
+    if transaction_mode not in SQLITE_TRANSACTION_MODES:
+        raise ValueError(f"transaction_mode must be one of {SQLITE_TRANSACTION_MODES}, got {transaction_mode!r}.")
+    pragmas = [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(busy_timeout_ms)}",
+        # Negative values are KiB rather than pages.
+        f"PRAGMA cache_size=-{int(cache_size_kib)}",
+        f"PRAGMA mmap_size={int(mmap_size)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    return {"init_command": ";".join(pragmas), "transaction_mode": transaction_mode}
+
+
+def check_connection(conn) -> None:
+    """psycopg_pool ``check`` callback: run on every checkout, a failure discards the connection."""
+    conn.execute("SELECT 1")
+
+
+def pool_samples():
+    """Yield (metric, labels, value) for every connection alias backed by a psycopg pool."""
+    from django.db import connections
+
+    for alias in connections:
+        wrapper = connections[alias]
+        if wrapper.vendor != "postgresql" or not wrapper.settings_dict["OPTIONS"].get("pool"):
+            continue
+        stats = wrapper.pool.get_stats()
+        labels = {"alias": alias}
+        size = stats.get("pool_size", 0)
+        available = stats.get("pool_available", 0)
+        yield "db_pool_size", labels, size
+        yield "db_pool_in_use", labels, size - available
+        yield "db_pool_available", labels, available
+        yield "db_pool_waiting", labels, stats.get("requests_waiting", 0)
+        yield "db_pool_checkouts_total", labels, stats.get("requests_num", 0)
+        yield "db_pool_checkout_wait_seconds_total", labels, stats.get("requests_wait_ms", 0) / 1000
+        yield "db_pool_checkout_errors_total", labels, stats.get("requests_errors", 0)
@@ -0,0 +1,39 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+
+_lock = threading.Lock()
+# (expires_at, ready, checks) from the last readiness run in this process.
+_readiness: tuple[float, bool, dict] | None = None
+
+
+def readiness() -> tuple[bool, dict]:
+    """Database and migration state, recomputed at most once per HEALTH_READINESS_TTL."""
+    global _readiness
+    cached = _readiness
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+    with _lock:
+        cached = _readiness
+        if cached is None or cached[0] <= time.monotonic():
+            ready, checks = _run_checks()
+            cached = _readiness = (time.monotonic() + settings.HEALTH_READINESS_TTL, ready, checks)
+    return cached[1], cached[2]
+
+
+def _run_checks() -> tuple[bool, dict]:
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        executor = MigrationExecutor(connection)
+        pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    except DatabaseError:
+        checks["database"] = "unavailable"
+        return False, checks
+    checks["database"] = "ok"
+    checks["migrations"] = "ok" if not pending else f"{len(pending)} pending"
+    return not pending, checks
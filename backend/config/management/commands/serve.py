@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from config import serving
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the API under gunicorn: preforked workers (optionally threaded), the app preloaded "
+        "in the master, and workers recycled after --max-requests. Defaults come from SERVE_* settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interface", choices=sorted(serving.APPLICATIONS))
+        parser.add_argument("--bind", help="host:port or unix:/path (SERVE_BIND)")
+        parser.add_argument("--workers", type=int, help="worker processes (WEB_CONCURRENCY, default 2 x CPUs + 1)")
+        parser.add_argument("--threads", type=int, help="threads per worker; above 1 uses gthread workers")
+        parser.add_argument("--preload", action="store_true", default=None, help="import the app before forking")
+        parser.add_argument("--no-preload", action="store_false", dest="preload")
+        parser.add_argument("--max-requests", type=int, help="recycle a worker after this many requests (0 disables)")
+        parser.add_argument("--max-requests-jitter", type=int, help="random extra requests, so workers do not restart together")
+        parser.add_argument("--keepalive", type=int, help="seconds to hold idle keep-alive connections")
+        parser.add_argument("--timeout", type=int, help="seconds before a silent worker is killed and replaced")
+        parser.add_argument("--graceful-timeout", type=int, help="seconds a worker gets to finish requests on restart")
+        parser.add_argument("--print-config", action="store_true", help="print the resolved settings and exit")
+
+    def handle(self, *args, **options):
+        for name in ("workers", "threads"):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+        config = serving.server_options(**{key: options[key] for key in serving.OPTION_NAMES})
+        if options["print_config"]:
+            for key, value in sorted(config.items()):
+                if not callable(value):
+                    self.stdout.write(f"{key} = {value}")
+            return
+        if config["workers"] > 1 and serving.cache_is_per_process():
+            raise CommandError(
+                "The default cache is per process (CACHE_URL=locmem); set CACHE_URL to db or a "
+                "redis:// URL, or serve with --workers 1."
+            )
+
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError as exc:
+            raise CommandError("gunicorn is not installed; pip install -r requirements.txt") from exc
+
+        class Application(BaseApplication):
+            def load_config(self):
+                for key, value in config.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return import_string(config["wsgi_app"].replace(":", "."))
+
+        Application().run()
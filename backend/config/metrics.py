@@ -0,0 +1,105 @@
+"""In-process metrics, exported in the Prometheus text format at /api/metrics/.
+
+Values are per worker process; scrape each worker (or aggregate at the collector).
+"""
+import hmac
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from config import db
+
+_lock = threading.Lock()
+_metrics: dict[str, "Metric"] = {}
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: dict[tuple, float] = defaultdict(float)
+
+    def samples(self):
+        for labels, value in list(self.values.items()):
+            yield self.name, dict(labels), value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] += amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def add(self, amount: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] += amount
+
+
+def _register(metric_class, name: str, help_text: str):
+    with _lock:
+        if name not in _metrics:
+            _metrics[name] = metric_class(name, help_text)
+        return _metrics[name]
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _register(Counter, name, help_text)
+
+
+def gauge(name: str, help_text: str) -> Gauge:
+    return _register(Gauge, name, help_text)
+
+
+# Collected at scrape time rather than pushed on every request.
+COLLECTORS = [
+    ("gauge", "Database connection pool statistics", db.pool_samples),
+]
+
+
+def render() -> str:
+    lines = []
+    for metric in list(_metrics.values()):
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(_sample_line(*sample) for sample in metric.samples())
+    for kind, help_text, collect in COLLECTORS:
+        seen = set()
+        for name, labels, value in collect():
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else kind}")
+            lines.append(_sample_line(name, labels, value))
+    return "\n".join(lines) + "\n"
+
+
+def _sample_line(name: str, labels: dict, value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{label}"' for key, label in sorted(labels.items()))
+        return f"{name}{{{rendered}}} {value}"
+    return f"{name} {value}"
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
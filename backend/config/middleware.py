@@ -1,13 +1,514 @@
+import asyncio
+import gzip
+import hashlib
 import logging
+import math
+import threading
+import time
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.http import FileResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from config import health, metrics, routers
 
 logger = logging.getLogger("api")
 
 
+class HealthProbeMiddleware:
+    """Answer liveness/readiness probes before the rest of the stack runs.
+
+    Liveness does no auth, session or DB work. Readiness checks the database and
+    pending migrations, cached for HEALTH_READINESS_TTL seconds. Async-capable, like
+    everything in front of LoadShedMiddleware (see there).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.liveness_path = settings.HEALTH_LIVENESS_PATH
+        self.readiness_path = settings.HEALTH_READINESS_PATH
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.probe(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path_info == self.readiness_path:
+            response = await sync_to_async(self.probe)(request)  # queries the database
+        else:
+            response = self.probe(request)
+        return response or await self.get_response(request)
+
+    def probe(self, request):
+        if request.method in ("GET", "HEAD"):
+            if request.path_info == self.liveness_path:
+                return JsonResponse({"status": "ok"})
+            if request.path_info == self.readiness_path:
+                ready, checks = health.readiness()
+                return JsonResponse(
+                    {"status": "ready" if ready else "unavailable", "checks": checks},
+                    status=200 if ready else 503,
+                )
+        return None
+
+
+class ConcurrencyLimiter:
+    """Counting semaphore whose last ``reserved`` slots only priority callers may take.
+
+    ``acquire`` blocks the calling thread (WSGI workers); ``acquire_async`` waits on the
+    event loop instead (ASGI workers). ``queue_delay`` is a moving average of how long
+    either waited, kept under the same lock as the slot count.
+    """
+
+    smoothing = 0.2
+
+    def __init__(self, limit: int, reserved: int = 0):
+        self.limit = limit
+        self.reserved = min(reserved, limit)
+        self.active = 0
+        self.queue_delay = 0.0
+        self.condition = threading.Condition()
+        self.async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def capacity(self, priority: bool) -> int:
+        return self.limit if priority else self.limit - self.reserved
+
+    def acquire(self, *, priority: bool, timeout: float) -> bool:
+        capacity = self.capacity(priority)
+        started = time.monotonic()
+        with self.condition:
+            acquired = self.condition.wait_for(lambda: self.active < capacity, timeout)
+            self._record(started, acquired)
+            return acquired
+
+    async def acquire_async(self, *, priority: bool, timeout: float) -> bool:
+        capacity = self.capacity(priority)
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.condition:
+                remaining = started + timeout - time.monotonic()
+                if self.active < capacity or remaining <= 0:
+                    acquired = self.active < capacity
+                    self._record(started, acquired)
+                    return acquired
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self) -> None:
+        with self.condition:
+            self.active -= 1
+            # Waiters have different capacities, so wake them all to re-check.
+            self.condition.notify_all()
+            for loop, waiter in self.async_waiters:
+                loop.call_soon_threadsafe(_wake, waiter)
+            self.async_waiters.clear()
+
+    def _record(self, started: float, acquired: bool) -> None:
+        self.queue_delay += self.smoothing * (time.monotonic() - started - self.queue_delay)
+        if acquired:
+            self.active += 1
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class LoadShedMiddleware:
+    """Bound concurrent requests per endpoint class and turn away excess work with 503.
+
+    Requests are classed as ``auth`` (LOAD_SHED_AUTH_PATHS), ``write`` (unsafe methods)
+    or ``read``, each with its own per-process limit from LOAD_SHED_LIMITS. A request
+    that finds its class full queues for a slot for at most LOAD_SHED_QUEUE_TIMEOUT,
+    or LOAD_SHED_PRIORITY_QUEUE_TIMEOUT for writers with a valid access token (checked
+    by signature and expiry only, no database lookup), which may also use the
+    LOAD_SHED_RESERVED_WRITE slots. Once the smoothed queueing
+    delay of a class passes LOAD_SHED_TARGET_DELAY, non-priority requests stop queueing
+    and are shed at once, as are those that already waited longer than
+    LOAD_SHED_MAX_UPSTREAM_DELAY in front of Django (per the proxy's X-Request-Start).
+    Health probes are answered by HealthProbeMiddleware before this runs.
+
+    Under an ASGI worker this runs on the event loop, as does every middleware in front
+    of it. Requests waiting for the sync stack behind it (which Django runs on a single
+    thread) therefore hold their slots, and the limits count the worker's real
+    concurrency. A sync middleware in front of it would serialize requests before they
+    were counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    admitted = metrics.counter("api_load_shed_admitted_total", "Requests admitted by the load shedder")
+    shed = metrics.counter("api_load_shed_rejected_total", "Requests rejected with 503 by the load shedder")
+    queue_seconds = metrics.counter("api_load_shed_queue_seconds_total", "Time spent waiting for a concurrency slot")
+    in_flight = metrics.gauge("api_load_shed_in_flight", "Requests holding a concurrency slot")
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHED_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        limits = settings.LOAD_SHED_LIMITS
+        self.limiters = {
+            "read": ConcurrencyLimiter(limits["read"]),
+            "write": ConcurrencyLimiter(limits["write"], settings.LOAD_SHED_RESERVED_WRITE),
+            "auth": ConcurrencyLimiter(limits["auth"]),
+        }
+        self.auth_paths = frozenset(settings.LOAD_SHED_AUTH_PATHS)
+        self.jwt = JWTAuthentication()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def classify(self, request) -> tuple[str, bool]:
+        if request.path_info in self.auth_paths:
+            return "auth", False
+        if request.method in self.safe_methods:
+            return "read", False
+        return "write", self.has_valid_token(request)
+
+    def has_valid_token(self, request) -> bool:
+        header = self.jwt.get_header(request)
+        try:
+            raw_token = self.jwt.get_raw_token(header) if header else None
+            if raw_token is None:
+                return False
+            self.jwt.get_validated_token(raw_token)
+        except AuthenticationFailed:  # malformed header, bad signature, expired
+            return False
+        return True
+
+    @staticmethod
+    def upstream_delay(request) -> float:
+        # nginx: proxy_set_header X-Request-Start "t=${msec}";
+        header = request.headers.get("X-Request-Start", "").removeprefix("t=")
+        try:
+            started = float(header)
+        except ValueError:
+            return 0.0
+        if started > 1e11:  # microseconds or milliseconds rather than seconds
+            started /= 1e6 if started > 1e14 else 1e3
+        return max(0.0, time.time() - started)
+
+    def admission(self, request) -> tuple[str, bool, float | None]:
+        """(class, priority, queue timeout) for ``request``; no timeout means shed it unqueued."""
+        request_class, priority = self.classify(request)
+        if priority:
+            return request_class, True, settings.LOAD_SHED_PRIORITY_QUEUE_TIMEOUT
+        if self.upstream_delay(request) > settings.LOAD_SHED_MAX_UPSTREAM_DELAY:
+            return request_class, False, None
+        congested = self.limiters[request_class].queue_delay > settings.LOAD_SHED_TARGET_DELAY
+        return request_class, False, 0 if congested else settings.LOAD_SHED_QUEUE_TIMEOUT
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_class, priority, timeout = self.admission(request)
+        if timeout is None:
+            return self.reject(request_class, "upstream_delay")
+        started = time.monotonic()
+        acquired = self.limiters[request_class].acquire(priority=priority, timeout=timeout)
+        if not self.admitted_after(request_class, started, acquired):
+            return self.reject(request_class, "overloaded")
+        try:
+            return self.get_response(request)
+        finally:
+            self.leave(request_class)
+
+    async def __acall__(self, request):
+        request_class, priority, timeout = self.admission(request)
+        if timeout is None:
+            return self.reject(request_class, "upstream_delay")
+        started = time.monotonic()
+        acquired = await self.limiters[request_class].acquire_async(priority=priority, timeout=timeout)
+        if not self.admitted_after(request_class, started, acquired):
+            return self.reject(request_class, "overloaded")
+        try:
+            return await self.get_response(request)
+        finally:
+            self.leave(request_class)
+
+    def admitted_after(self, request_class: str, started: float, acquired: bool) -> bool:
+        self.queue_seconds.inc(time.monotonic() - started, request_class=request_class)
+        if acquired:
+            self.admitted.inc(request_class=request_class)
+            self.in_flight.add(1, request_class=request_class)
+        return acquired
+
+    def leave(self, request_class: str) -> None:
+        self.in_flight.add(-1, request_class=request_class)
+        self.limiters[request_class].release()
+
+    def reject(self, request_class: str, reason: str):
+        self.shed.inc(request_class=request_class, reason=reason)
+        response = JsonResponse({"detail": "Server is busy. Retry shortly."}, status=503)
+        response["Retry-After"] = str(max(1, math.ceil(settings.LOAD_SHED_RETRY_AFTER)))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Pin writes, and reads that follow a client's recent write, to the primary database.
+
+    Clients are identified by a hash of their Authorization header (or session cookie);
+    after a successful write their reads stay on the primary for REPLICA_STICKY_SECONDS
+    so they read their own writes. The pin lives in the default cache (``CACHE_URL``), which
+    every worker shares; ``manage.py serve`` will not start several workers on a per-process one.
+    If the cache fails, reads are routed as if the client were not pinned.
+    """
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sticky_key = self.sticky_key(request)
+        is_write = request.method not in self.safe_methods and request.path_info not in settings.REPLICA_READ_ONLY_PATHS
+        pinned = is_write or (sticky_key is not None and self.cache_call(cache.get, sticky_key) is not None)
+        with routers.use_primary(pinned):
+            response = self.get_response(request)
+        if is_write and sticky_key is not None and response.status_code < 400:
+            self.cache_call(cache.set, sticky_key, 1, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    @staticmethod
+    def cache_call(method, *args):
+        try:
+            return method(*args)
+        except Exception:
+            logger.warning("replica pin cache unavailable", exc_info=True)
+            return None
+
+    @staticmethod
+    def sticky_key(request) -> str | None:
+        credential = request.headers.get("Authorization") or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credential:
+            return None
+        return "replica-pin:" + hashlib.sha256(credential.encode()).hexdigest()
+
+
+# Path segments that are credentials (the per-user calendar feed token) and must not be logged.
+_SECRET_PATH_SEGMENT = _lazy_re_compile(r"(/api/calendar/)[^/?\s]+(\.ics)")
+
+
+def redact_path(path: str) -> str:
+    return _SECRET_PATH_SEGMENT.sub(r"\1[redacted]\2", path)
+
+
 class RequestLogMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
-        logger.info("%s %s -> %s", request.method, request.path, response.status_code)
+        logger.info("%s %s -> %s", request.method, redact_path(request.path), response.status_code)
         return response
+
+
+class APIDispatchMiddleware:
+    """Send API requests past the session stack.
+
+    The API authenticates with JWT only, so session, CSRF, auth and messages middleware
+    are pure overhead on ``API_PATH_PREFIX`` routes. Every other path (the admin) runs
+    through ``SESSION_MIDDLEWARE``, which is built here the same way Django builds
+    ``MIDDLEWARE``; their view/exception/template hooks are re-exposed for those paths.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.api_prefix = settings.API_PATH_PREFIX
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        for middleware_path in reversed(settings.SESSION_MIDDLEWARE):
+            try:
+                middleware = import_string(middleware_path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, "process_view"):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, "process_template_response"):
+                self.template_response_hooks.append(middleware.process_template_response)
+            if hasattr(middleware, "process_exception"):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = convert_exception_to_response(middleware)
+        self.session_chain = handler
+
+    def is_api(self, request) -> bool:
+        return request.path_info.startswith(self.api_prefix)
+
+    def __call__(self, request):
+        if self.is_api(request):
+            return self.get_response(request)
+        return self.session_chain(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if not self.is_api(request):
+            for hook in self.template_response_hooks:
+                response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_api(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class APIGZipMiddleware:
+    """Gzip ``/api/`` responses for clients that accept it.
+
+    Buffered responses are compressed once they reach GZIP_MIN_LENGTH bytes (smaller
+    bodies gain little and still cost a compressor); streaming ones, like the CSV
+    exports, always are, chunk by chunk without per-chunk flushes so the ratio matches
+    a one-shot compress. GZIP_LEVEL trades CPU for bytes (see benchmarks/compression.py).
+    Only GZIP_CONTENT_TYPES are touched, so file downloads pass through, and
+    GZIP_EXCLUDED_PATHS (token-issuing endpoints) are never compressed, which keeps
+    their secrets out of reach of compression side channels such as BREACH.
+
+    A compressed response keeps a strong ETag, made specific to the encoding with a
+    ``-gzip`` suffix (``"7"`` becomes ``"7-gzip"``). The suffix is stripped from
+    incoming If-Match / If-None-Match before the view sees them, so views compare
+    against their own ETags, and If-Match keeps its strong comparison.
+    """
+
+    accepts_gzip = _lazy_re_compile(r"\bgzip\b")
+    etag_suffix = "-gzip"
+    conditional_headers = ("HTTP_IF_MATCH", "HTTP_IF_NONE_MATCH")
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.api_prefix = settings.API_PATH_PREFIX
+        self.min_length = settings.GZIP_MIN_LENGTH
+        self.level = settings.GZIP_LEVEL
+        self.content_types = tuple(settings.GZIP_CONTENT_TYPES)
+        self.excluded_paths = frozenset(settings.GZIP_EXCLUDED_PATHS)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def applies(self, request) -> bool:
+        return request.path_info.startswith(self.api_prefix) and request.path_info not in self.excluded_paths
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.applies(request):
+            return self.get_response(request)
+        stripped = self._strip_etag_suffix(request)
+        return self.compress(request, self.get_response(request), stripped)
+
+    async def __acall__(self, request):
+        if not self.applies(request):
+            return await self.get_response(request)
+        stripped = self._strip_etag_suffix(request)
+        return self.compress(request, await self.get_response(request), stripped)
+
+    def compress(self, request, response, stripped: bool):
+        # Vary before any early return: whether this is compressed depends on the header.
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.status_code == 304 and stripped:
+            # Answer with the validator the client holds: the encoding-specific one.
+            self._add_etag_suffix(response)
+            return response
+        if (
+            response.has_header("Content-Encoding")
+            or isinstance(response, FileResponse)
+            or not response.get("Content-Type", "").startswith(self.content_types)
+            or not self.accepts_gzip.search(request.headers.get("Accept-Encoding", ""))
+        ):
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async(response.streaming_content)
+            else:
+                response.streaming_content = self._compress_stream(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            if len(response.content) < self.min_length:
+                return response
+            compressed = gzip.compress(response.content, compresslevel=self.level, mtime=0)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        self._add_etag_suffix(response)
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    def _strip_etag_suffix(self, request) -> bool:
+        marker = self.etag_suffix + '"'
+        stripped = False
+        for name in self.conditional_headers:
+            value = request.META.get(name)
+            if value and marker in value:
+                request.META[name] = value.replace(marker, '"')
+                stripped = True
+        if stripped:
+            request.__dict__.pop("headers", None)  # drop the cached HttpHeaders built from META
+        return stripped
+
+    def _add_etag_suffix(self, response) -> None:
+        # The compressed bytes differ from the identity encoding, so they get their own validator.
+        etag = response.get("ETag")
+        if etag and etag.endswith('"') and not etag.endswith(self.etag_suffix + '"'):
+            response.headers["ETag"] = etag[:-1] + self.etag_suffix + '"'
+
+    def _compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def _compress_stream(self, chunks):
+        compressor = self._compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    async def _compress_async(self, chunks):
+        compressor = self._compressor()
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
@@ -0,0 +1,24 @@
+from django.core.management import call_command
+from django.db import migrations
+
+# The table behind CACHE_URL=db (see settings.CACHES). It is created whichever backend is
+# configured, so switching CACHE_URL to db later needs no extra step.
+CACHE_TABLE = "django_cache"
+
+
+def create_cache_table(apps, schema_editor):
+    call_command("createcachetable", CACHE_TABLE, database=schema_editor.connection.alias, verbosity=0)
+
+
+def drop_cache_table(apps, schema_editor):
+    if CACHE_TABLE in schema_editor.connection.introspection.table_names():
+        schema_editor.execute(f"DROP TABLE {schema_editor.quote_name(CACHE_TABLE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(create_cache_table, drop_cache_table),
+    ]
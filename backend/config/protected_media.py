@@ -0,0 +1,100 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def serve_protected_file(request, field_file, *, as_attachment: bool = False) -> HttpResponse:
+    """Return a response for an already-authorized ``FieldFile``.
+
+    With ``PROTECTED_MEDIA_BACKEND`` set, Django only emits headers and the front web
+    server streams the bytes (and answers Range requests) itself. Without it the file
+    is streamed from here, which is fine for local development.
+    """
+    filename = os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    backend = settings.PROTECTED_MEDIA_BACKEND
+
+    if backend == "nginx":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.PROTECTED_MEDIA_INTERNAL_URL + quote(field_file.name)
+    elif backend == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = field_file.path
+    else:
+        return _file_response(request, field_file, content_type, filename, as_attachment)
+
+    response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _file_response(request, field_file, content_type, filename, as_attachment):
+    size = field_file.size
+    range_header = request.headers.get("Range")
+    byte_range = _parse_range(range_header, size) if range_header else None
+
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    handle = field_file.open("rb")
+    if byte_range is None:
+        response = FileResponse(handle, content_type=content_type, as_attachment=as_attachment, filename=filename)
+    else:
+        start, end = byte_range
+        handle.seek(start)
+        response = FileResponse(
+            _BoundedReader(handle, end - start + 1),
+            status=206,
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _parse_range(header: str, size: int):
+    # Only single ranges are honoured; anything else falls back to the full body,
+    # which RFC 9110 allows.
+    match = _BYTE_RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+class _BoundedReader:
+    def __init__(self, handle, length: int):
+        self.handle = handle
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        chunk = self.handle.read(size)
+        self.remaining -= len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        self.handle.close()
@@ -0,0 +1,46 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_use_primary: ContextVar[bool] = ContextVar("use_primary", default=False)
+
+
+@contextmanager
+def use_primary(enabled: bool = True) -> Iterator[None]:
+    """Route every read in this context to the primary database."""
+    token = _use_primary.set(enabled or _use_primary.get())
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to DATABASE_REPLICAS unless the request or an open transaction needs the primary.
+
+    Writes, and reads issued inside ``transaction.atomic`` (the services), always use the
+    primary so they never act on replica lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        # DatabaseCache entries (replica pins among them) must not be read behind replica lag.
+        if model is not None and model._meta.app_label == "django_cache":
+            return DEFAULT_DB_ALIAS
+        if not replicas or _use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication.
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,78 @@
+"""Gunicorn settings for ``manage.py serve``.
+
+``server_options`` turns the ``SERVE_*`` settings (overridable per invocation) into the
+gunicorn config dict, hooks included. With ``preload`` the app is imported once in the
+master and inherited by forked workers; connections opened while doing so are closed
+before forking so workers never share a database socket. Each worker then runs
+``config.warmup`` before it accepts requests (``SERVE_WARMUP``).
+"""
+import multiprocessing
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+
+from config import warmup
+
+APPLICATIONS = {"wsgi": "config.wsgi:application", "asgi": "config.asgi:application"}
+OPTION_NAMES = (
+    "interface",
+    "bind",
+    "workers",
+    "threads",
+    "preload",
+    "max_requests",
+    "max_requests_jitter",
+    "keepalive",
+    "timeout",
+    "graceful_timeout",
+)
+
+
+def default_workers() -> int:
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def cache_is_per_process() -> bool:
+    # Replica pins and throttle buckets would each be private to one worker.
+    return isinstance(caches["default"], LocMemCache)
+
+
+def worker_class(interface: str, threads: int) -> str:
+    # ASGI workers (the uvicorn-worker package) run an event loop and ignore ``threads``.
+    if interface == "asgi":
+        return "uvicorn_worker.UvicornWorker"
+    return "gthread" if threads > 1 else "sync"
+
+
+def pre_fork(server, worker) -> None:
+    connections.close_all()
+
+
+def post_worker_init(worker) -> None:
+    warmup.run()
+
+
+def server_options(**overrides) -> dict:
+    values = {
+        "interface": settings.SERVE_INTERFACE,
+        "bind": settings.SERVE_BIND,
+        "workers": settings.SERVE_WORKERS or default_workers(),
+        "threads": settings.SERVE_THREADS,
+        "preload": settings.SERVE_PRELOAD,
+        "max_requests": settings.SERVE_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVE_MAX_REQUESTS_JITTER,
+        "keepalive": settings.SERVE_KEEPALIVE,
+        "timeout": settings.SERVE_TIMEOUT,
+        "graceful_timeout": settings.SERVE_GRACEFUL_TIMEOUT,
+    }
+    values.update({key: value for key, value in overrides.items() if value is not None})
+    interface = values.pop("interface")
+    values["wsgi_app"] = APPLICATIONS[interface]
+    values["preload_app"] = values.pop("preload")
+    values["worker_class"] = worker_class(interface, values["threads"])
+    hooks = {"pre_fork": pre_fork}
+    if settings.SERVE_WARMUP:
+        hooks["post_worker_init"] = post_worker_init
+    return {**values, "accesslog": "-", "errorlog": "-", "logger_class": "config.access_log.RedactingLogger", **hooks}
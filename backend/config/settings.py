@@ -2,8 +2,12 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
+from config.db import check_connection, sqlite_options
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,20 +28,79 @@ INSTALLED_APPS = [
     "rest_framework.authtoken",
     "accounts",
     "transactions",
+    "config",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "config.middleware.APIGZipMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "config.middleware.HealthProbeMiddleware",
+    "config.middleware.LoadShedMiddleware",
+    "config.middleware.ReplicaRoutingMiddleware",
+    "config.middleware.RequestLogMiddleware",
+    "config.middleware.APIDispatchMiddleware",
+]
+
+# JWT-only API routes stop at APIDispatchMiddleware; everything else (the admin) also
+# runs through this session-based stack, in this order.
+API_PATH_PREFIX = "/api/"
+SESSION_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "config.middleware.RequestLogMiddleware",
 ]
 
+# Probes answered by HealthProbeMiddleware; readiness results are cached per process.
+HEALTH_LIVENESS_PATH = "/api/health/"
+HEALTH_READINESS_PATH = "/api/ready/"
+HEALTH_READINESS_TTL = float(os.environ.get("HEALTH_READINESS_TTL", "5"))
+
+# `manage.py serve` (gunicorn). Workers are recycled after SERVE_MAX_REQUESTS (plus up to the
+# jitter) requests; WEB_CONCURRENCY=0 means 2 x CPUs + 1 workers.
+SERVE_INTERFACE = os.environ.get("SERVE_INTERFACE", "wsgi")
+SERVE_BIND = os.environ.get("SERVE_BIND", "0.0.0.0:8000")
+SERVE_WORKERS = int(os.environ.get("WEB_CONCURRENCY", "0"))
+SERVE_THREADS = int(os.environ.get("SERVE_THREADS", "4"))
+SERVE_PRELOAD = os.environ.get("SERVE_PRELOAD", "true").lower() in ("1", "true", "yes")
+SERVE_MAX_REQUESTS = int(os.environ.get("SERVE_MAX_REQUESTS", "2000"))
+SERVE_MAX_REQUESTS_JITTER = int(os.environ.get("SERVE_MAX_REQUESTS_JITTER", "200"))
+SERVE_KEEPALIVE = int(os.environ.get("SERVE_KEEPALIVE", "5"))
+SERVE_TIMEOUT = int(os.environ.get("SERVE_TIMEOUT", "30"))
+SERVE_GRACEFUL_TIMEOUT = int(os.environ.get("SERVE_GRACEFUL_TIMEOUT", "30"))
+# Run config.warmup in each worker before it takes traffic.
+SERVE_WARMUP = os.environ.get("SERVE_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Per-process concurrency limits enforced by LoadShedMiddleware, defaulting to the worker's
+# thread count (auth gets half, so password hashing cannot take every thread). Excess
+# requests queue briefly, then get 503 with Retry-After.
+LOAD_SHED_ENABLED = os.environ.get("LOAD_SHED_ENABLED", "true").lower() in ("1", "true", "yes")
+LOAD_SHED_LIMITS = {
+    "read": int(os.environ.get("LOAD_SHED_READ_LIMIT", SERVE_THREADS)),
+    "write": int(os.environ.get("LOAD_SHED_WRITE_LIMIT", SERVE_THREADS)),
+    "auth": int(os.environ.get("LOAD_SHED_AUTH_LIMIT", max(1, SERVE_THREADS // 2))),
+}
+LOAD_SHED_RESERVED_WRITE = int(os.environ.get("LOAD_SHED_RESERVED_WRITE", "1"))
+LOAD_SHED_AUTH_PATHS = ["/api/auth/login/", "/api/auth/register/", "/api/auth/token/refresh/"]
+LOAD_SHED_QUEUE_TIMEOUT = float(os.environ.get("LOAD_SHED_QUEUE_TIMEOUT", "0.25"))
+LOAD_SHED_PRIORITY_QUEUE_TIMEOUT = float(os.environ.get("LOAD_SHED_PRIORITY_QUEUE_TIMEOUT", "2"))
+LOAD_SHED_TARGET_DELAY = float(os.environ.get("LOAD_SHED_TARGET_DELAY", "0.05"))
+LOAD_SHED_MAX_UPSTREAM_DELAY = float(os.environ.get("LOAD_SHED_MAX_UPSTREAM_DELAY", "5"))
+LOAD_SHED_RETRY_AFTER = float(os.environ.get("LOAD_SHED_RETRY_AFTER", "1"))
+
+# Gzip for /api/ responses (APIGZipMiddleware): bodies under GZIP_MIN_LENGTH bytes go out
+# as-is; GZIP_LEVEL is 1 (fastest) to 9 (smallest). Streaming exports are always compressed.
+GZIP_MIN_LENGTH = int(os.environ.get("GZIP_MIN_LENGTH", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "5"))
+GZIP_CONTENT_TYPES = ["application/json", "text/"]
+GZIP_EXCLUDED_PATHS = ["/api/auth/login/", "/api/auth/register/", "/api/auth/token/refresh/"]
+
+# The admin checks look for its middleware in MIDDLEWARE; it lives in SESSION_MIDDLEWARE.
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -66,9 +129,72 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASSWORD", ""),
         "HOST": os.environ.get("DB_HOST", ""),
         "PORT": os.environ.get("DB_PORT", ""),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "0")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Built-in psycopg 3 connection pool (requires psycopg[pool]). Connections are checked
+# with SELECT 1 on checkout and recycled after DB_POOL_MAX_LIFETIME seconds. Pooling
+# replaces persistent connections, so CONN_MAX_AGE must stay 0.
+if os.environ.get("DB_POOL", "false").lower() == "true" and "postgresql" in DATABASES["default"]["ENGINE"]:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+            "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+            "check": check_connection,
+        }
+    }
+
+# SQLite profile for single-node installs: pragmas are applied on every new connection.
+if "sqlite" in DATABASES["default"]["ENGINE"]:
+    DATABASES["default"]["NAME"] = os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3")
+    DATABASES["default"]["OPTIONS"] = sqlite_options(
+        journal_mode=os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        synchronous=os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        busy_timeout_ms=int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        cache_size_kib=int(os.environ.get("SQLITE_CACHE_SIZE_KIB", "20000")),
+        mmap_size=int(os.environ.get("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024))),
+        transaction_mode=os.environ.get("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+    )
+
+# Read replicas: comma-separated hosts (host[:port]) for server databases or file paths
+# for SQLite. GET requests read from a replica; writes, transactions and reads shortly
+# after a client's own write go to the primary (see ReplicaRoutingMiddleware).
+DATABASE_REPLICAS = []
+for _index, _target in enumerate(filter(None, (value.strip() for value in os.environ.get("DB_REPLICAS", "").split(",")))):
+    _replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if "sqlite" in _replica["ENGINE"]:
+        _replica["NAME"] = _target
+    else:
+        _replica["HOST"], _, _port = _target.partition(":")
+        _replica["PORT"] = _port or _replica["PORT"]
+    DATABASES[f"replica_{_index + 1}"] = _replica
+    DATABASE_REPLICAS.append(f"replica_{_index + 1}")
+
+DATABASE_ROUTERS = ["config.routers.PrimaryReplicaRouter"]
+
+# The default cache holds state every worker must see: replica read-your-writes pins and
+# throttle buckets. CACHE_URL selects it: "db" (default) is the django_cache table on the
+# primary (created by `migrate`), redis://host:port/db needs the redis package, and
+# "locmem" is per process, so `manage.py serve` refuses it with more than one worker.
+CACHE_URL = os.environ.get("CACHE_URL", "db")
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+elif CACHE_URL == "locmem":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+elif CACHE_URL == "db":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}}
+else:
+    raise ImproperlyConfigured(f"CACHE_URL must be db, locmem or a redis:// URL, got {CACHE_URL!r}.")
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "5"))
+# POST endpoints that only read (and so may use replicas and set no pin).
+REPLICA_READ_ONLY_PATHS = ("/api/batch/",)
+
 AUTH_USER_MODEL = "accounts.User"
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -86,6 +212,12 @@ USE_TZ = True
 STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Broker documents are served through an authorized view. "nginx" hands the transfer to
+# the front server via X-Accel-Redirect (an `internal` location aliased to MEDIA_ROOT at
+# PROTECTED_MEDIA_INTERNAL_URL), "sendfile" uses X-Sendfile (Apache/lighttpd); empty
+# streams the file from Django with Range support.
+PROTECTED_MEDIA_BACKEND = os.environ.get("PROTECTED_MEDIA_BACKEND", "")
+PROTECTED_MEDIA_INTERNAL_URL = os.environ.get("PROTECTED_MEDIA_INTERNAL_URL", "/protected-media/")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
@@ -95,8 +227,41 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # Token buckets for config.throttling: "<capacity>/<refill period>", per client IP and
+    # per account (the authenticated user, or the email a login/registration targets).
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": os.environ.get("THROTTLE_LOGIN_IP", "20/min"),
+        "login_account": os.environ.get("THROTTLE_LOGIN_ACCOUNT", "5/min"),
+        "register_ip": os.environ.get("THROTTLE_REGISTER_IP", "10/hour"),
+        "register_account": os.environ.get("THROTTLE_REGISTER_ACCOUNT", "3/hour"),
+        "invite_ip": os.environ.get("THROTTLE_INVITE_IP", "60/min"),
+        "invite_account": os.environ.get("THROTTLE_INVITE_ACCOUNT", "30/min"),
+    },
+    # Proxies in front of Django; throttles take the client address from X-Forwarded-For.
+    "NUM_PROXIES": int(os.environ["NUM_PROXIES"]) if os.environ.get("NUM_PROXIES") else None,
 }
 
+# Bearer token required by /api/metrics/; without one the endpoint only exists under DEBUG.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Commission charged on purchase_price, as a fraction (0.06 = 6%), before the broker split.
+COMMISSION_RATE = os.environ.get("COMMISSION_RATE", "0.06")
+
+# Idempotency-Key handling on transaction writes: how long a stored response is replayed,
+# and how long a retry waits on a duplicate still in flight before answering 409.
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# How long an unfinished request holds its key; keep it above the worker timeout (SERVE_TIMEOUT).
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "60"))
+IDEMPOTENCY_POLL_INTERVAL = 0.1
+
+# Upper bound on sub-requests accepted by POST /api/batch/.
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "10"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -107,6 +272,7 @@ SIMPLE_JWT = {
 
 CORS_ALLOWED_ORIGINS = [origin.strip() for origin in os.environ.get("CORS_ALLOWED_ORIGINS", "http://localhost:5173").split(",") if origin]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 LOGGING = {
     "version": 1,
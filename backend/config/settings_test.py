@@ -0,0 +1,26 @@
+"""Settings for the test suite: ``python manage.py test --settings=config.settings_test``.
+
+Runs against an in-memory SQLite database with a cheap password hasher, so the suite
+needs no database server.
+"""
+import os
+
+os.environ["DB_ENGINE"] = "django.db.backends.sqlite3"
+os.environ["DB_REPLICAS"] = ""
+
+from config.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "OPTIONS": sqlite_options(journal_mode="MEMORY", synchronous="OFF", mmap_size=0),  # noqa: F405
+    }
+}
+DATABASE_REPLICAS = []
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+LOGGING["loggers"]["api"]["level"] = "WARNING"  # noqa: F405
+LOGGING["loggers"]["django.request"]["level"] = "ERROR"  # noqa: F405
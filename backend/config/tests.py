@@ -0,0 +1,504 @@
+import asyncio
+import datetime
+import gzip
+import threading
+import time
+import uuid
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config import health, metrics, serving, warmup
+from config.db import sqlite_options
+from config.middleware import APIGZipMiddleware, ConcurrencyLimiter, LoadShedMiddleware, ReplicaRoutingMiddleware
+from config.renderers import FastJSONRenderer
+from config.routers import PrimaryReplicaRouter, use_primary
+from config.throttling import TokenBucketThrottle, parse_rate, throttle_decisions
+
+User = get_user_model()
+
+
+class BatchViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="broker@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(self.user)
+
+    def test_runs_sub_requests_in_one_round_trip(self):
+        response = self.client.post(
+            reverse("batch"),
+            {
+                "requests": [
+                    {"path": "/api/auth/profile/"},
+                    {"path": "/api/transactions/"},
+                    {"path": "/api/health/"},
+                    {"path": "/api/missing/"},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.data["responses"]
+        self.assertEqual([result["status"] for result in results], [200, 200, 200, 404])
+        self.assertEqual(results[0]["body"]["email"], "broker@example.com")
+        self.assertEqual(results[1]["body"], [])
+        self.assertEqual(results[2]["body"], {"status": "ok"})
+
+    def test_logs_redacted_paths_and_closes_sub_responses(self):
+        url = urlsplit(self.client.get(reverse("deadline-calendar")).data["url"]).path
+        with self.assertLogs("api", "INFO") as logs, mock.patch.object(HttpResponse, "close", autospec=True) as close:
+            response = self.client.post(reverse("batch"), {"requests": [{"path": url}]}, format="json")
+        self.assertEqual(response.data["responses"][0]["status"], 200)
+        self.assertIn("INFO:api:batch GET /api/calendar/[redacted].ics -> 200", logs.output)
+        self.assertNotIn(url.rsplit("/", 1)[1], "".join(logs.output))
+        closed = [call.args[0]["Content-Type"] for call in close.call_args_list]
+        self.assertIn("text/calendar; charset=utf-8", closed)
+
+    def test_rejects_writes_and_nesting(self):
+        response = self.client.post(
+            reverse("batch"),
+            {"requests": [{"method": "POST", "path": "/api/transactions/"}, {"path": "/api/batch/"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_authentication(self):
+        response = APIClient().post(reverse("batch"), {"requests": [{"path": "/api/health/"}]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+
+class APIDispatchMiddlewareTests(TestCase):
+    def test_admin_keeps_session_stack(self):
+        User.objects.create_superuser(email="admin@example.com", password="pass")
+        client = Client()
+        self.assertTrue(client.login(email="admin@example.com", password="pass"))
+        response = client.get("/admin/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+
+    def test_api_skips_session_stack(self):
+        response = Client().get("/api/auth/profile/")
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertFalse(response.has_header("X-Frame-Options"))
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+
+
+class HealthProbeTests(TestCase):
+    def setUp(self):
+        health._readiness = None
+
+    def test_liveness_is_answered_without_database_work(self):
+        with self.assertNumQueries(0):
+            response = Client().get("/api/health/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_readiness_checks_database_and_caches_result(self):
+        response = Client().get("/api/ready/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ready", "checks": {"database": "ok", "migrations": "ok"}})
+        with self.assertNumQueries(0):
+            self.assertEqual(Client().get("/api/ready/").status_code, 200)
+
+
+@override_settings(METRICS_TOKEN="scrape-secret")
+class MetricsViewTests(TestCase):
+    def test_requires_token(self):
+        self.assertEqual(Client().get("/api/metrics/").status_code, 401)
+
+    def test_renders_prometheus_text(self):
+        metrics.counter("test_events_total", "Events seen by the test").inc(scope="unit")
+        response = Client().get("/api/metrics/", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn("# TYPE test_events_total counter", body)
+        self.assertIn('test_events_total{scope="unit"} 1', body)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_STICKY_SECONDS=30)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse(self.router.db_for_read(None)))
+
+    def _read_alias(self, method="get", token="alice"):
+        request = getattr(self.factory, method)("/api/transactions/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.middleware(request).content.decode()
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(None), "replica_1")
+        self.assertEqual(self.router.db_for_write(None), DEFAULT_DB_ALIAS)
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+        self.assertFalse(self.router.allow_migrate("replica_1", "transactions"))
+
+    def test_cache_failure_routes_as_unpinned(self):
+        down = ConnectionError("cache down")
+        broken = mock.Mock(**{"get.side_effect": down, "set.side_effect": down})
+        with mock.patch("config.middleware.cache", broken), self.assertLogs("api", "WARNING"):
+            self.assertEqual(self._read_alias(method="post"), DEFAULT_DB_ALIAS)
+            self.assertEqual(self._read_alias(), "replica_1")
+
+    def test_database_cache_entries_are_read_from_the_primary(self):
+        cache_model = DatabaseCache("django_cache", {}).cache_model_class
+        self.assertEqual(self.router.db_for_read(cache_model), DEFAULT_DB_ALIAS)
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertEqual(self._read_alias(), "replica_1")
+        self.assertEqual(self._read_alias(method="post"), DEFAULT_DB_ALIAS)
+        self.assertEqual(self._read_alias(), DEFAULT_DB_ALIAS)
+        self.assertEqual(self._read_alias(token="bob"), "replica_1")
+
+
+class SQLiteProfileTests(TestCase):
+    def test_options_build_pragma_init_command(self):
+        options = sqlite_options(busy_timeout_ms=2500, cache_size_kib=1000)
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertIn("PRAGMA journal_mode=WAL", options["init_command"].split(";"))
+        self.assertIn("PRAGMA busy_timeout=2500", options["init_command"].split(";"))
+        self.assertIn("PRAGMA cache_size=-1000", options["init_command"].split(";"))
+        with self.assertRaises(ValueError):
+            sqlite_options(transaction_mode="LAZY")
+
+    def test_pragmas_are_applied_to_connections(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(email="target@example.com", password="pass")
+
+    def _login(self, email: str, address: str = "10.0.0.1"):
+        return APIClient().post(
+            reverse("login"), {"email": email, "password": "wrong"}, format="json", REMOTE_ADDR=address
+        )
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/min"), (5, 5 / 60))
+        self.assertEqual(parse_rate("10/hour"), (10, 10 / 3600))
+
+    def test_bucket_without_an_identity_cannot_be_built(self):
+        with self.assertRaises(TypeError):
+            TokenBucketThrottle()
+
+    def test_account_bucket_spans_addresses(self):
+        for index in range(5):
+            self.assertEqual(self._login("Target@example.com", f"10.0.0.{index}").status_code, 400)
+        response = self._login("target@example.com", "10.0.1.1")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(self._login("someone@example.com", "10.0.1.1").status_code, 400)
+
+    def test_ip_bucket_spans_accounts(self):
+        for index in range(20):
+            self.assertEqual(self._login(f"user{index}@example.com").status_code, 400)
+        self.assertEqual(self._login("fresh@example.com").status_code, 429)
+        self.assertEqual(self._login("fresh@example.com", "10.0.0.2").status_code, 400)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}}
+    )
+    def test_buckets_work_on_the_database_cache_created_by_migrate(self):
+        for index in range(5):
+            self.assertEqual(self._login("target@example.com", f"10.0.0.{index}").status_code, 400)
+        self.assertEqual(self._login("target@example.com", "10.0.1.1").status_code, 429)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM django_cache WHERE cache_key LIKE '%throttle:login_%'")
+            self.assertGreater(cursor.fetchone()[0], 0)
+
+    def test_cache_failure_lets_requests_through(self):
+        broken = mock.Mock(**{"get.side_effect": ConnectionError("cache down")})
+        before = throttle_decisions.values[(("outcome", "cache_error"), ("scope", "login_ip"))]
+        with mock.patch.object(TokenBucketThrottle, "cache", broken), self.assertLogs("api", "WARNING"):
+            self.assertEqual(self._login("target@example.com").status_code, 400)
+        self.assertEqual(throttle_decisions.values[(("outcome", "cache_error"), ("scope", "login_ip"))], before + 1)
+
+    def test_decisions_are_counted(self):
+        before = throttle_decisions.values[(("outcome", "allowed"), ("scope", "login_ip"))]
+        self._login("target@example.com")
+        self.assertEqual(throttle_decisions.values[(("outcome", "allowed"), ("scope", "login_ip"))], before + 1)
+
+
+@override_settings(
+    LOAD_SHED_LIMITS={"read": 2, "write": 2, "auth": 1},
+    LOAD_SHED_RESERVED_WRITE=1,
+    LOAD_SHED_QUEUE_TIMEOUT=0,
+    LOAD_SHED_PRIORITY_QUEUE_TIMEOUT=0,
+    LOAD_SHED_RETRY_AFTER=3,
+)
+class LoadShedMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = LoadShedMiddleware(lambda request: HttpResponse("ok"))
+
+    def test_limiter_keeps_reserved_slots_for_priority(self):
+        limiter = ConcurrencyLimiter(2, reserved=1)
+        self.assertTrue(limiter.acquire(priority=False, timeout=0))
+        self.assertFalse(limiter.acquire(priority=False, timeout=0))
+        self.assertTrue(limiter.acquire(priority=True, timeout=0))
+        self.assertFalse(limiter.acquire(priority=True, timeout=0))
+        limiter.release()
+        self.assertTrue(limiter.acquire(priority=True, timeout=0))
+
+    def test_full_class_is_shed_with_retry_after(self):
+        self.middleware.limiters["read"].active = 2
+        response = self.middleware(self.factory.get("/api/transactions/"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        # Other classes have their own limits.
+        self.assertEqual(self.middleware(self.factory.post("/api/auth/login/")).status_code, 200)
+
+    def test_authenticated_writers_use_reserved_slots(self):
+        self.middleware.limiters["write"].active = 1
+        anonymous = self.middleware(self.factory.post("/api/transactions/"))
+        forged = self.middleware(self.factory.post("/api/transactions/", HTTP_AUTHORIZATION="Bearer token"))
+        authenticated = self.middleware(
+            self.factory.post("/api/transactions/", HTTP_AUTHORIZATION=f"Bearer {AccessToken()}")
+        )
+        self.assertEqual(anonymous.status_code, 503)
+        self.assertEqual(forged.status_code, 503)
+        self.assertEqual(authenticated.status_code, 200)
+        self.assertEqual(self.middleware.limiters["write"].active, 1)
+
+    def test_limiter_tracks_queue_delay(self):
+        limiter = ConcurrencyLimiter(1)
+        limiter.acquire(priority=False, timeout=0)
+        self.assertFalse(limiter.acquire(priority=False, timeout=0.05))
+        self.assertGreater(limiter.queue_delay, 0.005)
+
+    def test_concurrent_threads_are_limited(self):
+        inside, release = threading.Semaphore(0), threading.Event()
+
+        def view(request):
+            inside.release()
+            release.wait(5)
+            return HttpResponse("ok")
+
+        middleware = LoadShedMiddleware(view)
+        statuses = []
+        workers = [
+            threading.Thread(target=lambda: statuses.append(middleware(self.factory.get("/api/")).status_code))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            self.assertTrue(inside.acquire(timeout=5))
+
+        self.assertEqual(middleware(self.factory.get("/api/")).status_code, 503)
+        release.set()
+        for worker in workers:
+            worker.join(5)
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(middleware.limiters["read"].active, 0)
+
+    def test_concurrent_async_requests_are_limited(self):
+        async def scenario():
+            release = asyncio.Event()
+            entered = []
+
+            async def view(request):
+                entered.append(request)
+                await release.wait()
+                return HttpResponse("ok")
+
+            middleware = LoadShedMiddleware(view)
+            self.assertTrue(iscoroutinefunction(middleware))
+            holders = [asyncio.ensure_future(middleware(self.factory.get("/api/"))) for _ in range(2)]
+            while len(entered) < 2:
+                await asyncio.sleep(0)
+            shed = await middleware(self.factory.get("/api/"))
+            with self.settings(LOAD_SHED_QUEUE_TIMEOUT=5):
+                # A queued request gets the first slot that is released.
+                queued = asyncio.ensure_future(middleware(self.factory.get("/api/")))
+                await asyncio.sleep(0.01)
+                self.assertFalse(queued.done())
+                release.set()
+                responses = await asyncio.gather(*holders, queued)
+            return shed, responses, middleware.limiters["read"].active
+
+        shed, responses, active = asyncio.run(scenario())
+        self.assertEqual(shed.status_code, 503)
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200])
+        self.assertEqual(active, 0)
+
+    def test_middleware_in_front_of_the_limiter_runs_on_the_event_loop(self):
+        # A sync-only middleware here would serialize ASGI requests before they are counted.
+        index = settings.MIDDLEWARE.index("config.middleware.LoadShedMiddleware")
+        for path in settings.MIDDLEWARE[: index + 1]:
+            with self.subTest(middleware=path):
+                self.assertTrue(getattr(import_string(path), "async_capable", False))
+
+    @override_settings(LOAD_SHED_MAX_UPSTREAM_DELAY=5)
+    def test_requests_queued_too_long_upstream_are_shed(self):
+        stale = f"t={(time.time() - 10) * 1000:.0f}"
+        fresh = f"t={time.time() * 1000:.0f}"
+        self.assertEqual(self.middleware(self.factory.get("/api/", HTTP_X_REQUEST_START=stale)).status_code, 503)
+        self.assertEqual(self.middleware(self.factory.get("/api/", HTTP_X_REQUEST_START=fresh)).status_code, 200)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assertRendersLikeDRF(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_output_matches_drf_renderer(self):
+        row = {
+            "id": uuid.uuid4(),
+            "price": Decimal("123456.70"),
+            "ratio": Decimal("33.333333333333333333"),
+            "updated_at": timezone.now(),
+            "naive": datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+            "date": datetime.date(2024, 2, 29),
+            "time": datetime.time(12, 30),
+            "label": gettext_lazy("Pending"),
+            "text": "caf\u00e9 \u2028 line",
+            "nested": [{"amount": Decimal("0.10")}, None, True, 1.5],
+        }
+        self.assertRendersLikeDRF(row)
+        self.assertRendersLikeDRF([])
+        self.assertRendersLikeDRF([dict(row, index=index) for index in range(FastJSONRenderer.chunk_size * 2 + 7)])
+        self.assertRendersLikeDRF([row], "application/json; indent=2")
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_is_the_default_api_renderer(self):
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], FastJSONRenderer)
+
+
+@override_settings(GZIP_MIN_LENGTH=1000, GZIP_LEVEL=6)
+class APIGZipMiddlewareTests(SimpleTestCase):
+    body = b'{"title":"Lakeside cabin","status":"active"},' * 100
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _run(self, response, path="/api/transactions/", accept="gzip, deflate, br"):
+        middleware = APIGZipMiddleware(lambda request: response)
+        return middleware(self.factory.get(path, HTTP_ACCEPT_ENCODING=accept))
+
+    def test_compresses_large_api_responses(self):
+        response = self._run(HttpResponse(self.body, content_type="application/json", headers={"ETag": '"7"'}))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], '"7-gzip"')
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_views_see_conditional_headers_without_the_encoding_suffix(self):
+        seen = {}
+
+        def view(request):
+            seen.update(request.headers)
+            return HttpResponse(status=304, headers={"ETag": '"7"'})
+
+        request = self.factory.get(
+            "/api/transactions/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH='"7-gzip"', HTTP_IF_MATCH='"7-gzip"'
+        )
+        request.headers  # cached before the middleware rewrites META
+        response = APIGZipMiddleware(view)(request)
+        self.assertEqual((seen["If-None-Match"], seen["If-Match"]), ('"7"', '"7"'))
+        self.assertEqual(response["ETag"], '"7-gzip"')
+
+    def test_leaves_small_excluded_and_unaccepted_responses_alone(self):
+        def run(body=None, **kwargs):
+            return self._run(HttpResponse(body or self.body, content_type="application/json"), **kwargs)
+
+        self.assertFalse(run(b"{}").has_header("Content-Encoding"))
+        self.assertFalse(run(accept="identity").has_header("Content-Encoding"))
+        self.assertFalse(run(path="/api/auth/login/").has_header("Content-Encoding"))
+        self.assertFalse(run(path="/admin/").has_header("Content-Encoding"))
+        pdf = self._run(HttpResponse(self.body, content_type="application/pdf"))
+        self.assertFalse(pdf.has_header("Content-Encoding"))
+
+    def test_compresses_streaming_responses(self):
+        rows = [f"broker-{index},{index * 17}.00\r\n".encode() for index in range(2000)]
+        response = self._run(StreamingHttpResponse(iter(rows), content_type="text/csv"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        compressed = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(compressed), b"".join(rows))
+        self.assertLess(len(compressed), len(b"".join(rows)) / 3)
+
+
+@override_settings(SERVE_WORKERS=0, SERVE_THREADS=4, SERVE_INTERFACE="wsgi", SERVE_MAX_REQUESTS=2000)
+class ServeCommandTests(SimpleTestCase):
+    def test_options_come_from_settings(self):
+        options = serving.server_options()
+        self.assertEqual(options["workers"], serving.default_workers())
+        self.assertEqual(options["worker_class"], "gthread")
+        self.assertEqual(options["wsgi_app"], "config.wsgi:application")
+        self.assertEqual(options["max_requests"], 2000)
+        self.assertTrue(callable(options["pre_fork"]))
+        self.assertIs(options["post_worker_init"], serving.post_worker_init)
+        with override_settings(SERVE_WARMUP=False):
+            self.assertNotIn("post_worker_init", serving.server_options())
+
+    def test_arguments_override_settings(self):
+        options = serving.server_options(workers=3, threads=1, preload=False, max_requests=None)
+        self.assertEqual((options["workers"], options["worker_class"]), (3, "sync"))
+        self.assertFalse(options["preload_app"])
+        self.assertEqual(options["max_requests"], 2000)
+        self.assertEqual(serving.server_options(interface="asgi")["worker_class"], "uvicorn_worker.UvicornWorker")
+
+    def test_print_config(self):
+        out = StringIO()
+        call_command("serve", "--print-config", "--workers", "2", "--no-preload", stdout=out)
+        self.assertIn("workers = 2", out.getvalue())
+        self.assertIn("preload_app = False", out.getvalue())
+
+    def test_rejects_fewer_than_one_worker_or_thread(self):
+        for option in ("--workers", "--threads"):
+            with self.subTest(option=option), self.assertRaisesMessage(CommandError, f"{option} must be at least 1."):
+                call_command("serve", "--print-config", option, "0", stdout=StringIO())
+
+    def test_refuses_several_workers_on_a_per_process_cache(self):
+        self.assertTrue(serving.cache_is_per_process())
+        with self.assertRaisesMessage(CommandError, "CACHE_URL"):
+            call_command("serve", "--workers", "2", stdout=StringIO())
+
+
+class WarmupTests(TestCase):
+    def test_times_every_phase_and_survives_failures(self):
+        def broken():
+            raise RuntimeError("database unreachable")
+
+        with self.assertLogs("api", "INFO") as logs:
+            timings = warmup.run((*warmup.PHASES, ("broken", broken)))
+
+        self.assertEqual(list(timings), ["urls", "drf", "simplejwt", "serializers", "database", "broken"])
+        self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+        self.assertIn("Warm-up phase broken failed", logs.output[0])
+        self.assertIn("Worker warm-up done", logs.output[-1])
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(warmup.warmup_seconds.values[(("phase", "urls"),)], timings["urls"])
@@ -0,0 +1,107 @@
+"""Token-bucket throttles for the credential and invitation endpoints.
+
+A view opts in with ``throttle_scope = "login"`` (say) and both classes below; they look
+up ``login_ip`` and ``login_account`` in ``DEFAULT_THROTTLE_RATES``. A rate of ``"5/min"``
+is a bucket of 5 tokens refilled at 5 per minute, so a client may burst up to the
+capacity and then proceeds at the steady rate. Scopes without a rate are not throttled.
+
+Buckets live in the default cache, which every worker shares (``CACHE_URL``), so the limit
+holds across processes. The read-modify-write is serialized per process only: concurrent
+workers can each spend the last token, which errs by at most a token per worker. If the
+cache fails, requests are let through (and counted as ``cache_error``) rather than failing.
+"""
+import abc
+import hashlib
+import logging
+import threading
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from config import metrics
+
+logger = logging.getLogger("api")
+
+throttle_decisions = metrics.counter("api_throttle_decisions_total", "Token-bucket throttle decisions by scope")
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """``"5/min"`` -> (capacity 5, refill 5/60 tokens per second)."""
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle, metaclass=abc.ABCMeta):
+    cache = default_cache
+    cache_format = "throttle:%(scope)s:%(ident)s"
+    scope_suffix = ""
+    _lock = threading.Lock()
+
+    @abc.abstractmethod
+    def get_ident_for(self, request, view) -> str | None:
+        """The bucket key for this request, or None to leave it unthrottled."""
+
+    def allow_request(self, request, view) -> bool:
+        self.wait_seconds = None
+        base = getattr(view, "throttle_scope", None)
+        if not base:
+            return True
+        scope = f"{base}_{self.scope_suffix}"
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        ident = self.get_ident_for(request, view)
+        if rate is None or ident is None:
+            return True
+
+        capacity, refill = parse_rate(rate)
+        key = self.cache_format % {"scope": scope, "ident": ident}
+        try:
+            with self._lock:
+                now = time.time()
+                tokens, stamp = self.cache.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - stamp) * refill)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                else:
+                    self.wait_seconds = (1 - tokens) / refill
+                # An untouched bucket is full again after capacity / refill seconds.
+                self.cache.set(key, (tokens, now), timeout=int(capacity / refill) + 1)
+        except Exception:
+            logger.warning("throttle cache unavailable for %s; allowing the request", scope, exc_info=True)
+            self.wait_seconds = None
+            throttle_decisions.inc(scope=scope, outcome="cache_error")
+            return True
+
+        throttle_decisions.inc(scope=scope, outcome="allowed" if allowed else "throttled")
+        return allowed
+
+    def wait(self) -> float | None:
+        return self.wait_seconds
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Bucket per client address (``X-Forwarded-For`` is trusted per ``NUM_PROXIES``)."""
+
+    scope_suffix = "ip"
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
+
+
+class AccountTokenBucketThrottle(TokenBucketThrottle):
+    """Bucket per account: the authenticated user, or the email a login/registration targets."""
+
+    scope_suffix = "account"
+
+    def get_ident_for(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return "email:" + hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
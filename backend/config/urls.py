@@ -1,10 +1,17 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from accounts.views import HealthView, LoginView, RegisterView, ProfileView, BrokerApplicationView
+from accounts.views import (
+    BrokerApplicationView,
+    BrokerDocumentView,
+    HealthView,
+    LoginView,
+    ProfileView,
+    RegisterView,
+)
+from config.batch import BatchView
+from config.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -13,9 +20,13 @@ urlpatterns = [
     path("api/auth/register/", RegisterView.as_view(), name="register"),
     path("api/auth/profile/", ProfileView.as_view(), name="profile"),
     path("api/broker/application/", BrokerApplicationView.as_view(), name="broker-application"),
+    path(
+        "api/broker/applications/<int:pk>/documents/<str:document>/",
+        BrokerDocumentView.as_view(),
+        name="broker-document",
+    ),
     path("api/auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("api/metrics/", metrics_view, name="metrics"),
     path("api/", include("transactions.urls")),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,112 @@
+"""Per-worker warm-up, run by gunicorn's ``post_worker_init`` before a worker takes traffic.
+
+Each phase pays a one-off cost that would otherwise land on the worker's first requests:
+compiling the URL resolver, importing DRF's configured classes and simplejwt's token
+backend, building the hot serializers' fields (and the model metadata caches behind
+them), and connecting to every database alias. Phases are timed and logged, exported as
+``app_warmup_seconds`` on /api/metrics/, and a failing phase is logged and skipped so a
+database that is briefly unreachable does not crash-loop the workers.
+
+Django connections are per thread: with ``DB_POOL`` the warmed connection goes back to
+the shared pool, otherwise the phase still pays the driver import and the first DNS/TLS
+handshake before the main thread's connection is closed again.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver, reverse
+
+from config import metrics
+
+logger = logging.getLogger("api")
+
+warmup_seconds = metrics.gauge("app_warmup_seconds", "Time spent in each worker warm-up phase")
+
+HOT_PATHS = ("/api/transactions/", "/api/auth/login/", "/api/deadlines/")
+
+
+def resolve_urls() -> None:
+    resolver = get_resolver()
+    for path in HOT_PATHS:
+        resolver.resolve(path)
+    reverse("transaction-list")  # builds the reverse lookup tables for every pattern
+
+
+def load_drf() -> None:
+    from rest_framework.settings import api_settings
+
+    for name in (
+        "DEFAULT_RENDERER_CLASSES",
+        "DEFAULT_PARSER_CLASSES",
+        "DEFAULT_AUTHENTICATION_CLASSES",
+        "DEFAULT_PERMISSION_CLASSES",
+        "DEFAULT_THROTTLE_RATES",
+    ):
+        getattr(api_settings, name)
+
+
+def load_simplejwt() -> None:
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    # Sign and verify a throwaway token: loads the token backend and PyJWT's algorithms.
+    JWTAuthentication().get_validated_token(str(AccessToken()))
+
+
+def build_serializers() -> None:
+    from accounts.serializers import EmailTokenObtainPairSerializer, RegisterSerializer, UserSerializer
+    from transactions import fastpath  # noqa: F401  (compiles the fast-path plans)
+    from transactions.serializers import (
+        TransactionCreateSerializer,
+        TransactionDetailSerializer,
+        TransactionFilterSerializer,
+        TransactionListSerializer,
+    )
+
+    for serializer_class in (
+        TransactionListSerializer,
+        TransactionDetailSerializer,
+        TransactionCreateSerializer,
+        TransactionFilterSerializer,
+        UserSerializer,
+        RegisterSerializer,
+        EmailTokenObtainPairSerializer,
+    ):
+        serializer_class().fields
+
+
+def connect_databases() -> None:
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        connection.close()
+
+
+PHASES = (
+    ("urls", resolve_urls),
+    ("drf", load_drf),
+    ("simplejwt", load_simplejwt),
+    ("serializers", build_serializers),
+    ("database", connect_databases),
+)
+
+
+def run(phases=PHASES) -> dict[str, float]:
+    """Run every phase; return seconds per phase (failed phases included)."""
+    timings = {}
+    for name, phase in phases:
+        start = time.perf_counter()
+        try:
+            phase()
+        except Exception:
+            logger.warning("Warm-up phase %s failed", name, exc_info=True)
+        timings[name] = time.perf_counter() - start
+        warmup_seconds.set(timings[name], phase=name)
+    logger.info(
+        "Worker warm-up done in %.1f ms (%s)",
+        sum(timings.values()) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()),
+    )
+    return timings
@@ -0,0 +1,19 @@
+#!/bin/sh
+# Container entrypoint: `serve` (the default) applies migrations when RUN_MIGRATIONS=true,
+# then replaces this shell with gunicorn so it receives signals directly. Any other
+# command runs as given, e.g. `docker compose run backend python manage.py shell`.
+set -e
+
+if [ "$#" -eq 0 ] || [ "${1#-}" != "$1" ]; then
+    set -- serve "$@"
+fi
+
+if [ "$1" = "serve" ]; then
+    shift
+    if [ "${RUN_MIGRATIONS:-false}" = "true" ]; then
+        python manage.py migrate --noinput
+    fi
+    exec python manage.py serve "$@"
+fi
+
+exec "$@"
@@ -1,5 +1,10 @@
+import uuid
+
 from django.contrib import admin
+from django.db.models import F
 
+from . import portfolio
+from .deadlines import sync_deadlines
 from .models import (
     CommissionSplit,
     Transaction,
@@ -7,23 +12,75 @@ from .models import (
     TransactionInvitation,
     TransactionParticipant,
 )
+from .search import index_transaction, participant_emails, search
+from .services import refresh_summaries
 
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ("id", "type", "status", "created_by", "created_at")
-    search_fields = ("id", "title", "property_address")
+    search_fields = ("title", "property_address", "property_description", "participants__invited_email")
     list_filter = ("type", "status")
+    readonly_fields = ("version",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans; a bare UUID is an id lookup.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        try:
+            return queryset.filter(id=uuid.UUID(search_term)), False
+        except ValueError:
+            return search(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        before = portfolio.Contribution.of(Transaction.objects.get(pk=obj.pk)) if change else None
+        if change:
+            # An admin edit is a write like any other: ETags issued before it must go stale.
+            obj.version = F("version") + 1
+        super().save_model(request, obj, form, change)
+        if change:
+            obj.refresh_from_db(fields=["version"])
+        index_transaction(obj, participant_emails(obj.participants.select_related("user")))
+        sync_deadlines(obj)
+        portfolio.record_change(portfolio.broker_ids(obj), before, portfolio.Contribution.of(obj))
+
+    def delete_model(self, request, obj):
+        portfolio.record_change(portfolio.broker_ids(obj), portfolio.Contribution.of(obj), None)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            portfolio.record_change(portfolio.broker_ids(obj), portfolio.Contribution.of(obj), None)
+        super().delete_queryset(request, queryset)
+
+
+class SummarizedRowAdmin(admin.ModelAdmin):
+    """Rows counted in their transaction's summary columns, which are recomputed on every change."""
+
+    def save_model(self, request, obj, form, change):
+        previous = type(obj).objects.filter(pk=obj.pk).values_list("transaction_id", flat=True).first() if change else None
+        super().save_model(request, obj, form, change)
+        refresh_summaries({obj.transaction_id, previous} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_summaries([obj.transaction_id])
+
+    def delete_queryset(self, request, queryset):
+        transaction_ids = set(queryset.values_list("transaction_id", flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_summaries(transaction_ids)
 
 
 @admin.register(TransactionParticipant)
-class TransactionParticipantAdmin(admin.ModelAdmin):
+class TransactionParticipantAdmin(SummarizedRowAdmin):
     list_display = ("transaction", "role", "invited_email", "user", "joined_at")
     list_filter = ("role",)
 
 
 @admin.register(TransactionInvitation)
-class TransactionInvitationAdmin(admin.ModelAdmin):
+class TransactionInvitationAdmin(SummarizedRowAdmin):
     list_display = ("transaction", "participant", "status", "expires_at")
     list_filter = ("status",)
     search_fields = ("token",)
@@ -0,0 +1,125 @@
+"""Request-scoped identity map for transaction aggregates.
+
+Services register every row they read or write for a transaction here. The rows are
+pushed into Django's relation caches on the ``Transaction`` instance, so serializers
+that walk ``participants``, ``invitations``, ``details`` and ``commission_split``
+render the aggregate without follow-up SELECTs.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator
+
+from .models import CommissionSplit, Transaction, TransactionDetails, TransactionInvitation, TransactionParticipant
+
+_identity_map: ContextVar[dict | None] = ContextVar("transaction_identity_map", default=None)
+
+
+@contextmanager
+def request_scope() -> Iterator[None]:
+    token = _identity_map.set({})
+    try:
+        yield
+    finally:
+        _identity_map.reset(token)
+
+
+class TransactionAggregate:
+    def __init__(
+        self,
+        transaction_obj: Transaction,
+        participants: Iterable[TransactionParticipant] = (),
+        invitations: Iterable[TransactionInvitation] = (),
+    ) -> None:
+        self.transaction = transaction_obj
+        self.participants: list[TransactionParticipant] = []
+        self.invitations: list[TransactionInvitation] = []
+        for participant in participants:
+            self.add_participant(participant)
+        for invitation in invitations:
+            self.add_invitation(invitation)
+        self._sync()
+
+    def participant(self, pk: int) -> TransactionParticipant | None:
+        return next((participant for participant in self.participants if participant.pk == pk), None)
+
+    def participant_for_role(self, role: str) -> TransactionParticipant | None:
+        return next((participant for participant in self.participants if participant.role == role), None)
+
+    def invitation(self, pk: int) -> TransactionInvitation | None:
+        return next((invitation for invitation in self.invitations if invitation.pk == pk), None)
+
+    def add_participant(self, participant: TransactionParticipant) -> TransactionParticipant:
+        TransactionParticipant.transaction.field.set_cached_value(participant, self.transaction)
+        self.participants.append(participant)
+        self._sync()
+        return participant
+
+    def add_invitation(self, invitation: TransactionInvitation) -> TransactionInvitation:
+        # Point the invitation at the participant instance we already hold, so both
+        # sides of the aggregate observe the same in-memory row.
+        participant = self.participant(invitation.participant_id)
+        if participant is not None:
+            TransactionInvitation.participant.field.set_cached_value(invitation, participant)
+        TransactionInvitation.transaction.field.set_cached_value(invitation, self.transaction)
+        self.invitations.append(invitation)
+        self._sync()
+        return invitation
+
+    def set_details(self, details: TransactionDetails | None) -> None:
+        Transaction.details.related.set_cached_value(self.transaction, details)
+
+    def set_commission_split(self, split: CommissionSplit | None) -> None:
+        Transaction.commission_split.related.set_cached_value(self.transaction, split)
+
+    def _sync(self) -> None:
+        cache = getattr(self.transaction, "_prefetched_objects_cache", None)
+        if cache is None:
+            cache = self.transaction._prefetched_objects_cache = {}
+        cache["participants"] = _cached_queryset(
+            TransactionParticipant.objects.filter(transaction=self.transaction), self.participants
+        )
+        cache["invitations"] = _cached_queryset(
+            TransactionInvitation.objects.filter(transaction=self.transaction), self.invitations
+        )
+
+
+def _cached_queryset(queryset, rows):
+    # Same shape Django's prefetch_related leaves behind: ``.all()`` reads the rows,
+    # any further filtering still goes to the database.
+    queryset._result_cache = rows
+    queryset._prefetch_done = True
+    return queryset
+
+
+def _register(aggregate: TransactionAggregate) -> TransactionAggregate:
+    scope = _identity_map.get()
+    if scope is not None:
+        scope[aggregate.transaction.pk] = aggregate
+    return aggregate
+
+
+def track(transaction_obj: Transaction) -> TransactionAggregate:
+    """Start an empty aggregate for a transaction created in this request."""
+    aggregate = TransactionAggregate(transaction_obj)
+    aggregate.set_details(None)
+    aggregate.set_commission_split(None)
+    return _register(aggregate)
+
+
+def load(transaction_obj: Transaction) -> TransactionAggregate:
+    """Return the aggregate for ``transaction_obj``, reading its child rows at most once per request.
+
+    ``details`` and ``commission_split`` are expected to be select_related onto
+    ``transaction_obj`` by the caller when they are needed.
+    """
+    scope = _identity_map.get()
+    if scope is not None and transaction_obj.pk in scope:
+        return scope[transaction_obj.pk]
+    aggregate = TransactionAggregate(
+        transaction_obj,
+        participants=TransactionParticipant.objects.filter(transaction=transaction_obj).select_related("user").order_by("pk"),
+        invitations=TransactionInvitation.objects.filter(transaction=transaction_obj).order_by("pk"),
+    )
+    return _register(aggregate)
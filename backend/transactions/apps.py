@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class TransactionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "transactions"
+
+    def ready(self):
+        from . import search
+
+        post_delete.connect(search.transaction_deleted, sender="transactions.Transaction", dispatch_uid="transactions.search")
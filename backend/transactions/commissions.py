@@ -0,0 +1,95 @@
+"""Commission payouts: ``purchase_price * COMMISSION_RATE``, divided by the transaction's split.
+
+All arithmetic is ``Decimal``; amounts are carried unrounded and quantized to cents only
+when reported, so per-broker totals do not drift with the number of deals.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db.models import OuterRef, QuerySet, Subquery
+
+from .models import ParticipantRole, Transaction, TransactionParticipant, TransactionStatus
+
+CENT = Decimal("0.01")
+HUNDRED = Decimal(100)
+STREAM_CHUNK_SIZE = 2000
+
+# (transaction id, purchase_price, primary broker id, primary %, secondary %, secondary broker id)
+PayoutRow = tuple
+
+
+@dataclass
+class BrokerPayout:
+    broker_id: int | None
+    transactions: int = 0
+    commission: Decimal = Decimal(0)
+
+    @property
+    def amount(self) -> Decimal:
+        return self.commission.quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+
+def commission_rate() -> Decimal:
+    return Decimal(str(settings.COMMISSION_RATE))
+
+
+def payout_rows(queryset: QuerySet) -> Iterator[PayoutRow]:
+    """Stream the columns a payout needs; ``iterator()`` uses a server-side cursor on PostgreSQL."""
+    secondary_broker = TransactionParticipant.objects.filter(
+        transaction=OuterRef("pk"), role=ParticipantRole.BROKER_SECONDARY
+    ).values("user_id")[:1]
+    return (
+        queryset.order_by()
+        .annotate(secondary_broker_id=Subquery(secondary_broker))
+        .values_list(
+            "id",
+            "purchase_price",
+            "created_by_id",
+            "commission_split__primary_broker_pct",
+            "commission_split__secondary_broker_pct",
+            "secondary_broker_id",
+        )
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+
+
+def split_commission(row: PayoutRow, rate: Decimal) -> Iterator[tuple[int | None, Decimal]]:
+    """Yield (broker id, unrounded amount) for one transaction; ``None`` is an unclaimed share."""
+    _, price, primary_id, primary_pct, secondary_pct, secondary_id = row
+    commission = price * rate
+    if primary_pct is None:
+        yield primary_id, commission
+        return
+    primary_share = commission * primary_pct / HUNDRED
+    yield primary_id, primary_share
+    if secondary_pct:
+        yield secondary_id, commission - primary_share
+
+
+def accumulate_payouts(rows: Iterable[PayoutRow], rate: Decimal) -> dict[int | None, BrokerPayout]:
+    payouts: dict[int | None, BrokerPayout] = {}
+    for row in rows:
+        for broker_id, amount in split_commission(row, rate):
+            payout = payouts.get(broker_id)
+            if payout is None:
+                payout = payouts[broker_id] = BrokerPayout(broker_id)
+            payout.transactions += 1
+            payout.commission += amount
+    return payouts
+
+
+def total(payouts: dict[int | None, BrokerPayout]) -> Decimal:
+    return sum((payout.commission for payout in payouts.values()), Decimal(0)).quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+
+def closed_transactions(closing_from=None, closing_to=None) -> QuerySet:
+    queryset = Transaction.objects.filter(status=TransactionStatus.COMPLETED)
+    if closing_from:
+        queryset = queryset.filter(estimated_closing_date__gte=closing_from)
+    if closing_to:
+        queryset = queryset.filter(estimated_closing_date__lte=closing_to)
+    return queryset
@@ -0,0 +1,124 @@
+"""Upcoming deadlines and the per-user iCalendar feed.
+
+``TransactionDeadline`` rows mirror the open transactions' key dates and are written only
+when a date or status actually changes, so their ``updated_at`` doubles as a cheap
+validator for ETags.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import date, timedelta, timezone as dt_timezone
+from typing import Iterable
+
+from django.db.models import Count, Max, QuerySet
+from django.utils import timezone
+
+from .models import DEADLINE_DATE_FIELDS, Transaction, TransactionDeadline, TransactionStatus
+
+OPEN_STATUSES = (TransactionStatus.DRAFT, TransactionStatus.INVITING, TransactionStatus.ACTIVE)
+DEFAULT_WINDOW_DAYS = 14
+MAX_WINDOW_DAYS = 366
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 365
+
+
+def create_deadlines(transaction_obj: Transaction) -> list[TransactionDeadline]:
+    """Insert the deadlines of a transaction created in this request (nothing to reconcile)."""
+    if transaction_obj.status not in OPEN_STATUSES:
+        return []
+    return TransactionDeadline.objects.bulk_create(
+        TransactionDeadline(transaction=transaction_obj, kind=kind, due_date=getattr(transaction_obj, field))
+        for kind, field in DEADLINE_DATE_FIELDS.items()
+    )
+
+
+def sync_deadlines(transaction_obj: Transaction) -> None:
+    """Reconcile deadline rows with the transaction's current dates and status."""
+    if transaction_obj.status not in OPEN_STATUSES:
+        TransactionDeadline.objects.filter(transaction=transaction_obj).delete()
+        return
+    existing = {deadline.kind: deadline for deadline in TransactionDeadline.objects.filter(transaction=transaction_obj)}
+    missing = []
+    for kind, field in DEADLINE_DATE_FIELDS.items():
+        due_date = getattr(transaction_obj, field)
+        deadline = existing.get(kind)
+        if deadline is None:
+            missing.append(TransactionDeadline(transaction=transaction_obj, kind=kind, due_date=due_date))
+        elif deadline.due_date != due_date:
+            deadline.due_date = due_date
+            deadline.save(update_fields=["due_date", "updated_at"])
+    TransactionDeadline.objects.bulk_create(missing)
+
+
+def upcoming(user, start: date, end: date) -> QuerySet:
+    return TransactionDeadline.objects.filter(
+        due_date__range=(start, end),
+        transaction__in=Transaction.objects.visible_to(user).values("pk"),
+    ).select_related("transaction")
+
+
+def window(days: int) -> tuple[date, date]:
+    today = timezone.localdate()
+    return today, today + timedelta(days=days)
+
+
+def feed_window() -> tuple[date, date]:
+    today = timezone.localdate()
+    return today - timedelta(days=FEED_PAST_DAYS), today + timedelta(days=FEED_FUTURE_DAYS)
+
+
+def etag(user, deadlines: QuerySet, start: date, end: date) -> str:
+    """Validator for a deadline window: one aggregate query instead of building the body."""
+    summary = deadlines.order_by().aggregate(
+        count=Count("pk"), deadline=Max("updated_at"), transaction=Max("transaction__updated_at")
+    )
+    stamps = [value.isoformat() if value else "-" for value in (summary["deadline"], summary["transaction"])]
+    key = f"{user.pk}:{start}:{end}:{summary['count']}:{':'.join(stamps)}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    # RFC 5545 3.1: content lines are folded at 75 octets, continuations start with a space.
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts, current = [], b""
+    for char in line:
+        char_bytes = char.encode()
+        if len(current) + len(char_bytes) > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b""
+        current += char_bytes
+    parts.append(current.decode())
+    return "\r\n ".join(parts)
+
+
+def render_ics(deadlines: Iterable[TransactionDeadline], *, host: str) -> str:
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Escrow//Transaction deadlines//EN",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:Escrow deadlines",
+    ]
+    for deadline in deadlines:
+        transaction_obj = deadline.transaction
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{transaction_obj.pk}-{deadline.kind}@{host}",
+            f"DTSTAMP:{stamp}",
+            f"LAST-MODIFIED:{deadline.updated_at.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')}",
+            f"DTSTART;VALUE=DATE:{deadline.due_date:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{deadline.due_date + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{_escape(f'{deadline.get_kind_display()}: {transaction_obj.title}')}",
+            f"DESCRIPTION:{_escape(f'Status: {transaction_obj.get_status_display()}')}",
+            "TRANSP:TRANSPARENT",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
@@ -0,0 +1,193 @@
+"""Serialization fast path for the hot transaction read endpoints.
+
+``CompiledSerializer`` walks a ``ModelSerializer``'s fields once and produces a flat
+plan of ``(output key, values() column, encoder)`` steps; each encoder is a closure
+specialised from the DRF field's own settings (decimal places, ISO formats, choice map).
+Rows come from ``QuerySet.values()``, so no model instances or bound fields are built per
+row. Method fields are supplied as functions of the row. The output matches the DRF
+serializers key for key and renders byte-identically; ``FastPathTests`` holds it to that.
+"""
+from __future__ import annotations
+
+import decimal
+from typing import Any, Callable, Iterable
+
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework import ISO_8601, fields, serializers
+from rest_framework.settings import api_settings
+
+from .models import TransactionInvitation, TransactionParticipant
+from .serializers import (
+    TransactionDetailSerializer,
+    TransactionListSerializer,
+    required_next_action,
+)
+
+Row = dict[str, Any]
+Computed = Callable[[Row], Any]
+
+
+def _decimal_encoder(field: fields.DecimalField):
+    coerce = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.normalize_output or field.localize or not coerce:
+        return field.to_representation
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def encode(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+
+    return encode
+
+
+def _datetime_encoder(field: fields.DateTimeField):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, "timezone"):
+        return field.to_representation
+
+    def encode(value):
+        if not value:
+            return None
+        if timezone.is_aware(value):
+            value = value.astimezone(timezone.get_current_timezone())
+        else:
+            return field.to_representation(value)
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return encode
+
+
+def _date_encoder(field: fields.DateField):
+    output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat() if value else None
+
+
+def _choice_encoder(field: fields.ChoiceField):
+    mapping = field.choice_strings_to_values
+    return lambda value: mapping.get(value, value) if value != "" else value
+
+
+def encoder_for(field: fields.Field) -> Callable[[Any], Any] | None:
+    """Return the field's ``to_representation`` specialised to its settings; ``None`` means pass through."""
+    if type(field) is fields.ReadOnlyField:
+        return None
+    if isinstance(field, fields.DecimalField):
+        return _decimal_encoder(field)
+    if isinstance(field, fields.DateTimeField):
+        return _datetime_encoder(field)
+    if isinstance(field, fields.DateField):
+        return _date_encoder(field)
+    if isinstance(field, fields.ChoiceField):
+        return _choice_encoder(field)
+    if isinstance(field, fields.UUIDField) and field.uuid_format == "hex_verbose":
+        return str
+    if isinstance(field, fields.IntegerField):
+        return int
+    if type(field) is fields.CharField:
+        return str
+    return field.to_representation
+
+
+RAW, COMPUTED, NESTED = object(), object(), object()
+
+
+class CompiledSerializer:
+    """A serializer's fields flattened into ``values()`` columns and per-column encoders."""
+
+    __slots__ = ("columns", "plan", "presence")
+
+    def __init__(self, serializer_class, *, computed: dict[str, Computed] | None = None, prefix: str = ""):
+        computed = computed or {}
+        self.columns: list[str] = []
+        self.plan: list[tuple] = []
+        self.presence = f"{prefix}pk" if prefix else None
+        for name, field in serializer_class().fields.items():
+            if name in computed or isinstance(field, serializers.SerializerMethodField):
+                self.plan.append((name, COMPUTED, computed[name]))
+            elif isinstance(field, serializers.BaseSerializer):
+                nested = CompiledSerializer(type(field), prefix=f"{prefix}{field.source}__")
+                self.columns += [nested.presence, *nested.columns]
+                self.plan.append((name, NESTED, nested))
+            else:
+                column = prefix + field.source.replace(".", "__")
+                self.columns.append(column)
+                encode = encoder_for(field)
+                self.plan.append((name, column, encode) if encode else (name, RAW, column))
+
+    def row(self, row: Row) -> dict[str, Any] | None:
+        if self.presence is not None and row[self.presence] is None:
+            return None
+        data = {}
+        for name, step, arg in self.plan:
+            if step is RAW:
+                data[name] = row[arg]
+            elif step is COMPUTED:
+                data[name] = arg(row)
+            elif step is NESTED:
+                data[name] = arg.row(row)
+            else:
+                value = row[step]
+                data[name] = None if value is None else arg(value)
+        return data
+
+    def rows(self, rows: Iterable[Row]) -> list[dict[str, Any]]:
+        return [self.row(row) for row in rows]
+
+
+LIST = CompiledSerializer(
+    TransactionListSerializer,
+    computed={
+        "my_role": lambda row: row["my_role"],
+        "required_next_action": lambda row: required_next_action(row["type"], row["roles_present"], row["roles_accepted"]),
+    },
+)
+
+
+def list_rows(queryset: QuerySet, user) -> list[dict[str, Any]]:
+    # The caller's own participations, looked up once instead of a subquery per row;
+    # reversed so the lowest pk wins, as in the prefetched participants' order.
+    roles = dict(
+        TransactionParticipant.objects.filter(user=user).order_by("-pk").values_list("transaction_id", "role")
+    )
+    rows = list(queryset.prefetch_related(None).values(*LIST.columns, "roles_present", "roles_accepted"))
+    for row in rows:
+        row["my_role"] = roles.get(row["id"])
+    return LIST.rows(rows)
+
+
+DETAIL = CompiledSerializer(
+    TransactionDetailSerializer,
+    computed={
+        "participants": lambda row: row["participants"],
+        "invitations": lambda row: row["invitations"],
+        "details": lambda row: row["details__data"] if row["details__pk"] is not None else {},
+    },
+)
+
+
+def detail_row(queryset: QuerySet) -> dict[str, Any] | None:
+    row = queryset.prefetch_related(None).values(*DETAIL.columns, "details__pk", "details__data").first()
+    if row is None:
+        return None
+    row["participants"] = [
+        {"role": role, "invited_email": email, "user": user_id, "joined_at": joined_at}
+        for role, email, user_id, joined_at in TransactionParticipant.objects.filter(transaction_id=row["id"])
+        .order_by("pk")
+        .values_list("role", "invited_email", "user_id", "joined_at")
+    ]
+    row["invitations"] = [
+        {"participant_role": role, "status": status, "expires_at": expires_at}
+        for role, status, expires_at in TransactionInvitation.objects.filter(transaction_id=row["id"])
+        .order_by("pk")
+        .values_list("participant__role", "status", "expires_at")
+    ]
+    return DETAIL.row(row)
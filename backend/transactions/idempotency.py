@@ -0,0 +1,185 @@
+"""``Idempotency-Key`` support for the transaction write endpoints.
+
+The first request with a given key claims an ``IdempotencyRecord`` (the unique
+``(user, key)`` constraint arbitrates races), runs the view, and stores its response.
+Retries with the same key and request fingerprint get that response back without
+running the view again; a retry that arrives while the first is still running waits
+for it. The view runs in the same database transaction that stores its response, so a
+crash between the two cannot leave a committed write without its record. Only successful
+(2xx/3xx) responses are stored: a 4xx or 5xx, returned or raised, releases the key so the
+request can be corrected or retried as-is.
+
+An in-progress claim is a lease of ``IDEMPOTENCY_LEASE_SECONDS``. If its worker dies
+before finishing, the next request with the key takes the claim over instead of waiting
+out the record's TTL.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .exceptions import IdempotencyKeyReused, IdempotentRequestInProgress
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+STORED_HEADERS = ("ETag", "Location")
+# Raised by views and services for a bad request, after their own atomic blocks rolled back.
+CLIENT_ERRORS = (APIException, Http404, PermissionDenied, ValidationError)
+
+
+def fingerprint(request) -> str:
+    # The parsed payload rather than ``request.body``: the stream may already have been read,
+    # and key order or whitespace should not make a retry look like a different request.
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.headers.get("If-Match", "")):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode())
+    return digest.hexdigest()
+
+
+def _is_live(record: IdempotencyRecord) -> bool:
+    now = timezone.now()
+    if record.expires_at <= now:
+        return False
+    if record.state == IdempotencyRecord.State.IN_PROGRESS:
+        return record.claimed_at > now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    return True
+
+
+def _claim(user, key: str, request_fingerprint: str) -> tuple[IdempotencyRecord, bool]:
+    """Return ``(record, created)``; an expired record or an abandoned claim is taken over."""
+    while True:
+        now = timezone.now()
+        claim = {
+            "fingerprint": request_fingerprint,
+            "state": IdempotencyRecord.State.IN_PROGRESS,
+            "claimed_at": now,
+            "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        }
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(user=user, key=key, **claim)
+            return record, True
+        except IntegrityError:
+            pass
+        record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+        if record is None:
+            continue
+        if _is_live(record):
+            return record, False
+        # Conditional on the claim we read, so only one of several racing requests wins.
+        taken = IdempotencyRecord.objects.filter(
+            pk=record.pk, state=record.state, claimed_at=record.claimed_at, expires_at=record.expires_at
+        ).update(status_code=None, response_body=None, response_headers={}, **claim)
+        if taken:
+            record.refresh_from_db()
+            return record, True
+
+
+def _wait_for(record: IdempotencyRecord) -> IdempotencyRecord | None:
+    """Poll an in-flight record until it completes; ``None`` if its request failed or was abandoned."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while record.state == IdempotencyRecord.State.IN_PROGRESS:
+        if not _is_live(record):
+            return None
+        if time.monotonic() >= deadline:
+            raise IdempotentRequestInProgress()
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+        record = IdempotencyRecord.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None
+    return record
+
+
+def _own(record: IdempotencyRecord):
+    # The record as long as this request's claim on it stands; empty once another request took it over.
+    return IdempotencyRecord.objects.filter(pk=record.pk, claimed_at=record.claimed_at)
+
+
+def _replay(record: IdempotencyRecord) -> Response:
+    headers = {**record.response_headers, REPLAYED_HEADER: "true"}
+    return Response(record.response_body, status=record.status_code, headers=headers)
+
+
+def _store(record: IdempotencyRecord, response: Response) -> None:
+    # Round-trip through the API renderer so the replay is byte-identical to the original.
+    body = JSONRenderer().render(response.data)
+    stored = _own(record).update(
+        state=IdempotencyRecord.State.COMPLETED,
+        status_code=response.status_code,
+        response_body=json.loads(body),
+        response_headers={name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+    )
+    if not stored:
+        # Our lease ran out and another request took the key over; roll our write back.
+        raise IdempotentRequestInProgress()
+
+
+def idempotent(handler):
+    """Decorate a DRF view method (``post``/``create``) to honour ``Idempotency-Key``."""
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ParseError(f"{HEADER} must be between 1 and {MAX_KEY_LENGTH} characters.")
+
+        request_fingerprint = fingerprint(request)
+        while True:
+            record, created = _claim(request.user, key, request_fingerprint)
+            if created:
+                break
+            if record.fingerprint != request_fingerprint:
+                raise IdempotencyKeyReused()
+            record = _wait_for(record)
+            if record is not None:
+                return _replay(record)
+
+        client_error = None
+        try:
+            with transaction.atomic():
+                try:
+                    response = handler(view, request, *args, **kwargs)
+                except CLIENT_ERRORS as exc:
+                    # Whatever the services kept before raising (an invitation's expiry)
+                    # commits along with the released key.
+                    client_error = exc
+                    _own(record).delete()
+                else:
+                    if response.status_code >= 400 or not isinstance(response, Response):
+                        _own(record).delete()
+                    else:
+                        _store(record, response)
+        except BaseException:
+            _own(record).delete()
+            raise
+        if client_error is not None:
+            raise client_error
+        return response
+
+    return wrapper
+
+
+def purge_expired() -> int:
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from transactions import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses past IDEMPOTENCY_TTL_SECONDS. Run it from cron."
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired idempotency records."))
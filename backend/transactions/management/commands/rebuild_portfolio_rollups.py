@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from transactions import portfolio
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-broker portfolio rollups from the transactions table. Deltas written "
+        "while the rebuild runs can be lost, so run it when transaction writes are quiet."
+    )
+
+    def handle(self, *args, **options):
+        rows = portfolio.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} portfolio rollup rows."))
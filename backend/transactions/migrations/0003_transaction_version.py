@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0002_transaction_depositor_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:23
+
+from django.db import migrations, models
+
+ROLE_BITS = {
+    role: 1 << index
+    for index, role in enumerate(["broker_primary", "broker_secondary", "buyer", "seller", "other"])
+}
+
+
+def backfill_summaries(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionParticipant = apps.get_model("transactions", "TransactionParticipant")
+    TransactionInvitation = apps.get_model("transactions", "TransactionInvitation")
+
+    summaries = {}
+    for transaction_id, role, user_id in TransactionParticipant.objects.values_list(
+        "transaction_id", "role", "user_id"
+    ):
+        summary = summaries.setdefault(transaction_id, [0, 0, 0])
+        summary[0] |= ROLE_BITS[role]
+        if user_id is not None:
+            summary[1] |= ROLE_BITS[role]
+    for transaction_id in TransactionInvitation.objects.filter(status="pending").values_list(
+        "transaction_id", flat=True
+    ):
+        summaries.setdefault(transaction_id, [0, 0, 0])[2] += 1
+
+    for transaction_id, (present, accepted, pending) in summaries.items():
+        Transaction.objects.filter(pk=transaction_id).update(
+            roles_present=present, roles_accepted=accepted, pending_invites_count=pending
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0003_transaction_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="pending_invites_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="roles_accepted",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="roles_present",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
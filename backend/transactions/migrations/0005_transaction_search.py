@@ -0,0 +1,72 @@
+import re
+
+from django.db import migrations
+
+TOKEN = re.compile(r"\w+")
+
+
+def _normalize(text):
+    return " ".join(TOKEN.findall((text or "").lower()))
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE transactions_transaction ADD COLUMN search_document tsvector")
+        schema_editor.execute(
+            "CREATE INDEX transactions_search_document_gin ON transactions_transaction USING GIN (search_document)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE transactions_search USING fts5("
+            "transaction_id UNINDEXED, document, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    else:
+        return
+
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionParticipant = apps.get_model("transactions", "TransactionParticipant")
+    emails = {}
+    for transaction_id, invited_email, user_email in TransactionParticipant.objects.values_list(
+        "transaction_id", "invited_email", "user__email"
+    ):
+        emails.setdefault(transaction_id, []).append(invited_email)
+        if user_email and user_email != invited_email:
+            emails[transaction_id].append(user_email)
+
+    for transaction_id, title, description, address in Transaction.objects.values_list(
+        "id", "title", "property_description", "property_address"
+    ).iterator():
+        parts = [title, description, address, *emails.get(transaction_id, [])]
+        document = " ".join(filter(None, (_normalize(part) for part in parts)))
+        if vendor == "postgresql":
+            schema_editor.execute(
+                "UPDATE transactions_transaction SET search_document = to_tsvector('simple', %s) WHERE id = %s",
+                [document, transaction_id],
+            )
+        else:
+            schema_editor.execute(
+                "INSERT INTO transactions_search (transaction_id, document) VALUES (%s, %s)",
+                [transaction_id.hex, document],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS transactions_search_document_gin")
+        schema_editor.execute("ALTER TABLE transactions_transaction DROP COLUMN IF EXISTS search_document")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS transactions_search")
+
+
+class Migration(migrations.Migration):
+    # The search column / FTS table lives outside the model so it stays vendor specific.
+
+    dependencies = [
+        ("transactions", "0004_transaction_summary_columns"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0005_transaction_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["status", "estimated_closing_date"],
+                name="transaction_status_closing_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["status", "due_diligence_end_date"],
+                name="transaction_status_dd_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["status", "purchase_price"], name="transaction_status_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["type", "status", "estimated_closing_date"],
+                name="transaction_type_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["estimated_closing_date"], name="transaction_closing_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:43
+
+import django.db.models.deletion
+import secrets
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_deadlines(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionDeadline = apps.get_model("transactions", "TransactionDeadline")
+    open_transactions = Transaction.objects.filter(status__in=["draft", "inviting", "active"]).values_list(
+        "id", "due_diligence_end_date", "estimated_closing_date"
+    )
+    TransactionDeadline.objects.bulk_create(
+        (
+            TransactionDeadline(transaction_id=transaction_id, kind=kind, due_date=due_date)
+            for transaction_id, due_diligence_end, closing in open_transactions.iterator()
+            for kind, due_date in (("due_diligence_end", due_diligence_end), ("estimated_closing", closing))
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0006_transaction_filter_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CalendarSubscription",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "token",
+                    models.CharField(
+                        default=secrets.token_urlsafe, max_length=64, unique=True
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="calendar_subscription",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TransactionDeadline",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("due_diligence_end", "Due diligence ends"),
+                            ("estimated_closing", "Estimated closing"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("due_date", models.DateField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deadlines",
+                        to="transactions.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("due_date", "kind"),
+                "indexes": [
+                    models.Index(
+                        fields=["due_date", "transaction"], name="deadline_due_date_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("transaction", "kind"),
+                        name="unique_transaction_deadline",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
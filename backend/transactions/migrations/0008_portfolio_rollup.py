@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionParticipant = apps.get_model("transactions", "TransactionParticipant")
+    PortfolioRollup = apps.get_model("transactions", "PortfolioRollup")
+
+    totals = {}
+    secondaries = dict(
+        TransactionParticipant.objects.filter(role="broker_secondary", user__isnull=False).values_list(
+            "transaction_id", "user_id"
+        )
+    )
+    for pk, created_by_id, status, type_, price, deposit in Transaction.objects.values_list(
+        "pk", "created_by_id", "status", "type", "purchase_price", "earnest_deposit"
+    ).iterator():
+        for broker_id in filter(None, (created_by_id, secondaries.get(pk))):
+            entry = totals.setdefault((broker_id, status, type_), [0, 0, 0])
+            entry[0] += 1
+            entry[1] += price
+            entry[2] += deposit
+
+    PortfolioRollup.objects.bulk_create(
+        PortfolioRollup(
+            broker_id=broker_id,
+            status=status,
+            type=type_,
+            transaction_count=count,
+            purchase_price_total=price,
+            earnest_deposit_total=deposit,
+        )
+        for (broker_id, status, type_), (count, price, deposit) in totals.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0007_transaction_deadlines"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortfolioRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("draft", "Draft"),
+                            ("inviting", "Inviting"),
+                            ("active", "Active"),
+                            ("completed", "Completed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("single_broker_sale", "Single Broker Sale"),
+                            ("double_broker_split", "Double Broker Split"),
+                            ("due_diligence", "Due Diligence"),
+                            ("hidden_defects", "Hidden Defects"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("transaction_count", models.IntegerField(default=0)),
+                (
+                    "purchase_price_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=18),
+                ),
+                (
+                    "earnest_deposit_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=18),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "broker",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="portfolio_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("status", "type"),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("broker", "status", "type"),
+                        name="unique_portfolio_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
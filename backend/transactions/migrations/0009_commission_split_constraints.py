@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:48
+
+import django.db.models.expressions
+import django.db.models.functions.math
+import django.db.models.lookups
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0008_portfolio_rollup"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="commissionsplit",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    ("primary_broker_pct__gte", 0), ("secondary_broker_pct__gte", 0)
+                ),
+                name="commission_split_non_negative",
+                violation_error_message="Commission split percentages cannot be negative",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="commissionsplit",
+            constraint=models.CheckConstraint(
+                condition=django.db.models.lookups.Exact(
+                    django.db.models.functions.math.Round(
+                        django.db.models.expressions.CombinedExpression(
+                            models.F("primary_broker_pct"),
+                            "+",
+                            models.F("secondary_broker_pct"),
+                        ),
+                        2,
+                    ),
+                    100,
+                ),
+                name="commission_split_totals_100",
+                violation_error_message="Commission split must total 100%",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2'"
+
+
+def key_search_by_rowid(apps, schema_editor):
+    # FTS5 can only look rows up by rowid; the UNINDEXED transaction_id column made every
+    # re-index a full scan. Map transactions to integer rowids in a regular table instead.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("ALTER TABLE transactions_search RENAME TO transactions_search_old")
+    schema_editor.execute(
+        "CREATE TABLE transactions_search_rowid ("
+        "id INTEGER PRIMARY KEY, transaction_id char(32) NOT NULL UNIQUE)"
+    )
+    schema_editor.execute(f"CREATE VIRTUAL TABLE transactions_search USING fts5(document, {FTS_OPTIONS})")
+    schema_editor.execute(
+        "INSERT INTO transactions_search_rowid (transaction_id) "
+        "SELECT DISTINCT old.transaction_id FROM transactions_search_old old "
+        "JOIN transactions_transaction t ON t.id = old.transaction_id"
+    )
+    schema_editor.execute(
+        "INSERT INTO transactions_search (rowid, document) "
+        "SELECT keys.id, old.document FROM transactions_search_old old "
+        "JOIN transactions_search_rowid keys ON keys.transaction_id = old.transaction_id "
+        "GROUP BY keys.id"
+    )
+    schema_editor.execute("DROP TABLE transactions_search_old")
+
+
+def key_search_by_transaction_id(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("ALTER TABLE transactions_search RENAME TO transactions_search_new")
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE transactions_search USING fts5(transaction_id UNINDEXED, document, {FTS_OPTIONS})"
+    )
+    schema_editor.execute(
+        "INSERT INTO transactions_search (transaction_id, document) "
+        "SELECT keys.transaction_id, new.document FROM transactions_search_new new "
+        "JOIN transactions_search_rowid keys ON keys.id = new.rowid"
+    )
+    schema_editor.execute("DROP TABLE transactions_search_new")
+    schema_editor.execute("DROP TABLE transactions_search_rowid")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0011_idempotency_record_claimed_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_by_rowid, key_search_by_transaction_id),
+    ]
@@ -5,6 +5,8 @@ import uuid
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Round
+from django.db.models.lookups import Exact
 from django.utils import timezone
 
 
@@ -31,6 +33,17 @@ class ParticipantRole(models.TextChoices):
     OTHER = "other", "Other"
 
 
+# Bit assigned to each role in Transaction.roles_present / roles_accepted.
+ROLE_BITS = {role: 1 << index for index, role in enumerate(ParticipantRole.values)}
+
+
+def role_mask(roles) -> int:
+    mask = 0
+    for role in roles:
+        mask |= ROLE_BITS[role]
+    return mask
+
+
 class InvitationStatus(models.TextChoices):
     PENDING = "pending", "Pending"
     ACCEPTED = "accepted", "Accepted"
@@ -38,6 +51,13 @@ class InvitationStatus(models.TextChoices):
     REVOKED = "revoked", "Revoked"
 
 
+class TransactionQuerySet(models.QuerySet):
+    def visible_to(self, user) -> "TransactionQuerySet":
+        return self.filter(
+            models.Q(participants__user=user) | models.Q(participants__invited_email=user.email) | models.Q(created_by=user)
+        ).distinct()
+
+
 class Transaction(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="transactions_created")
@@ -56,9 +76,32 @@ class Transaction(models.Model):
         help_text="Only required if depositor is not the purchaser",
     )
     property_address = models.CharField(max_length=255, blank=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    roles_present = models.PositiveSmallIntegerField(default=0, editable=False)
+    roles_accepted = models.PositiveSmallIntegerField(default=0, editable=False)
+    pending_invites_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        # Composite indexes for the list filters: equality on status/type first, then the
+        # range column, so "active deals closing this month" is a single index range scan.
+        indexes = [
+            models.Index(fields=["status", "estimated_closing_date"], name="transaction_status_closing_idx"),
+            models.Index(fields=["status", "due_diligence_end_date"], name="transaction_status_dd_idx"),
+            models.Index(fields=["status", "purchase_price"], name="transaction_status_price_idx"),
+            models.Index(fields=["type", "status", "estimated_closing_date"], name="transaction_type_status_idx"),
+            models.Index(fields=["estimated_closing_date"], name="transaction_closing_idx"),
+        ]
+
+    def has_role(self, role: str) -> bool:
+        return bool(self.roles_present & ROLE_BITS[role])
+
+    def has_accepted(self, role: str) -> bool:
+        return bool(self.roles_accepted & ROLE_BITS[role])
+
     def __str__(self) -> str:  # pragma: no cover - representation helper
         return f"{self.get_type_display()} ({self.id})"
 
@@ -100,23 +143,33 @@ class TransactionDetails(models.Model):
     data = models.JSONField(default=dict, blank=True)
 
 
+def validate_split(primary_broker_pct, secondary_broker_pct) -> None:
+    """The rule ``CommissionSplit``'s check constraints enforce, for validating before writing."""
+    if primary_broker_pct < 0 or secondary_broker_pct < 0:
+        raise ValidationError("Commission split percentages cannot be negative")
+    if primary_broker_pct + secondary_broker_pct != 100:
+        raise ValidationError("Commission split must total 100%")
+
+
 class CommissionSplit(models.Model):
     transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, related_name="commission_split")
     primary_broker_pct = models.DecimalField(max_digits=5, decimal_places=2)
     secondary_broker_pct = models.DecimalField(max_digits=5, decimal_places=2)
 
-    def clean(self) -> None:
-        total = (self.primary_broker_pct or 0) + (self.secondary_broker_pct or 0)
-        if total != 100:
-            raise ValidationError("Commission split must total 100%")
-
-    def full_clean(self, *args, **kwargs):
-        super().full_clean(*args, **kwargs)
-        self.clean()
-
-    def save(self, *args, **kwargs):
-        self.full_clean()
-        return super().save(*args, **kwargs)
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(primary_broker_pct__gte=0, secondary_broker_pct__gte=0),
+                name="commission_split_non_negative",
+                violation_error_message="Commission split percentages cannot be negative",
+            ),
+            models.CheckConstraint(
+                # Rounded so SQLite, which stores decimals as REAL, compares like PostgreSQL.
+                condition=Exact(Round(models.F("primary_broker_pct") + models.F("secondary_broker_pct"), 2), 100),
+                name="commission_split_totals_100",
+                violation_error_message="Commission split must total 100%",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.primary_broker_pct}/{self.secondary_broker_pct} for {self.transaction_id}"
@@ -124,3 +177,92 @@ class CommissionSplit(models.Model):
 
 def default_invitation_expiry(days: int = 7) -> timezone.datetime:
     return timezone.now() + timedelta(days=days)
+
+
+class DeadlineKind(models.TextChoices):
+    DUE_DILIGENCE_END = "due_diligence_end", "Due diligence ends"
+    ESTIMATED_CLOSING = "estimated_closing", "Estimated closing"
+
+
+# Transaction date column behind each deadline kind.
+DEADLINE_DATE_FIELDS = {
+    DeadlineKind.DUE_DILIGENCE_END: "due_diligence_end_date",
+    DeadlineKind.ESTIMATED_CLOSING: "estimated_closing_date",
+}
+
+
+class TransactionDeadline(models.Model):
+    """One row per open transaction date, so "what is due soon" is a single range scan on ``due_date``."""
+
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name="deadlines")
+    kind = models.CharField(max_length=30, choices=DeadlineKind.choices)
+    due_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["transaction", "kind"], name="unique_transaction_deadline"),
+        ]
+        indexes = [
+            models.Index(fields=["due_date", "transaction"], name="deadline_due_date_idx"),
+        ]
+        ordering = ("due_date", "kind")
+
+    def __str__(self) -> str:  # pragma: no cover - representation helper
+        return f"{self.get_kind_display()} {self.due_date}"
+
+
+class CalendarSubscription(models.Model):
+    """Secret feed token for a user's deadline calendar; calendar clients cannot send JWTs."""
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="calendar_subscription")
+    token = models.CharField(max_length=64, unique=True, default=secrets.token_urlsafe)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def rotate(self) -> None:
+        self.token = secrets.token_urlsafe()
+        self.save(update_fields=["token"])
+
+
+class PortfolioRollup(models.Model):
+    """Per-broker totals by (status, type), maintained with delta updates by ``transactions.portfolio``."""
+
+    broker = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="portfolio_rollups")
+    status = models.CharField(max_length=20, choices=TransactionStatus.choices)
+    type = models.CharField(max_length=50, choices=TransactionType.choices)
+    transaction_count = models.IntegerField(default=0)
+    purchase_price_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    earnest_deposit_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["broker", "status", "type"], name="unique_portfolio_rollup"),
+        ]
+        ordering = ("status", "type")
+
+
+class IdempotencyRecord(models.Model):
+    """First response to a request sent with an ``Idempotency-Key``, replayed to retries of it."""
+
+    class State(models.TextChoices):
+        IN_PROGRESS = "in_progress", "In progress"
+        COMPLETED = "completed", "Completed"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_records")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(max_length=20, choices=State.choices, default=State.IN_PROGRESS)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    response_headers = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Start of the current in-progress claim; a claim older than IDEMPOTENCY_LEASE_SECONDS
+    # belongs to a worker that died and may be taken over.
+    claimed_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key"),
+        ]
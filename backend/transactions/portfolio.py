@@ -0,0 +1,118 @@
+"""Per-broker portfolio rollups.
+
+Every write that changes a transaction's status, type or amounts calls ``record_change``
+with its before/after contribution; each affected (broker, status, type) row is moved by
+a single ``UPDATE ... SET total = total + delta``, so concurrent writers never read-modify-
+write the same row. ``rebuild`` recomputes the table from scratch.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import ParticipantRole, PortfolioRollup, Transaction, TransactionParticipant
+
+
+@dataclass(frozen=True)
+class Contribution:
+    status: str
+    type: str
+    purchase_price: Decimal
+    earnest_deposit: Decimal
+
+    @classmethod
+    def of(cls, transaction_obj: Transaction) -> "Contribution":
+        return cls(
+            status=transaction_obj.status,
+            type=transaction_obj.type,
+            purchase_price=Decimal(transaction_obj.purchase_price),
+            earnest_deposit=Decimal(transaction_obj.earnest_deposit),
+        )
+
+
+def broker_ids(transaction_obj: Transaction) -> list[int]:
+    """Brokers a transaction counts for: its creator and, once joined, the secondary broker."""
+    secondary = TransactionParticipant.objects.filter(
+        transaction=transaction_obj, role=ParticipantRole.BROKER_SECONDARY, user__isnull=False
+    ).values_list("user_id", flat=True)
+    return [transaction_obj.created_by_id, *secondary]
+
+
+def record_change(
+    brokers: Iterable[int], before: Contribution | None, after: Contribution | None
+) -> None:
+    if before == after:
+        return
+    for broker_id in brokers:
+        if before is not None:
+            _apply(broker_id, before, -1)
+        if after is not None:
+            _apply(broker_id, after, 1)
+
+
+def _apply(broker_id: int, contribution: Contribution, sign: int) -> None:
+    rows = PortfolioRollup.objects.filter(broker_id=broker_id, status=contribution.status, type=contribution.type)
+    changes = {
+        "transaction_count": F("transaction_count") + sign,
+        "purchase_price_total": F("purchase_price_total") + sign * contribution.purchase_price,
+        "earnest_deposit_total": F("earnest_deposit_total") + sign * contribution.earnest_deposit,
+        "updated_at": timezone.now(),
+    }
+    if rows.update(**changes):
+        return
+    try:
+        # Savepoint, so losing the insert race does not poison the caller's transaction.
+        with transaction.atomic():
+            PortfolioRollup.objects.create(
+                broker_id=broker_id,
+                status=contribution.status,
+                type=contribution.type,
+                transaction_count=sign,
+                purchase_price_total=sign * contribution.purchase_price,
+                earnest_deposit_total=sign * contribution.earnest_deposit,
+            )
+    except IntegrityError:
+        rows.update(**changes)
+
+
+def rebuild() -> int:
+    """Recompute every rollup row from the transactions table; returns the number of rows written."""
+    totals: dict[tuple[int, str, str], list] = {}
+    sources = [
+        (Transaction.objects.values_list("created_by_id", "status", "type"), ""),
+        (
+            TransactionParticipant.objects.filter(
+                role=ParticipantRole.BROKER_SECONDARY, user__isnull=False
+            ).values_list("user_id", "transaction__status", "transaction__type"),
+            "transaction__",
+        ),
+    ]
+    for queryset, path in sources:
+        rows = queryset.order_by().annotate(
+            count=Count("pk"), purchase=Sum(f"{path}purchase_price"), earnest=Sum(f"{path}earnest_deposit")
+        )
+        for broker_id, status, type_, count, purchase, earnest in rows:
+            entry = totals.setdefault((broker_id, status, type_), [0, Decimal("0"), Decimal("0")])
+            entry[0] += count
+            entry[1] += purchase or 0
+            entry[2] += earnest or 0
+
+    with transaction.atomic():
+        PortfolioRollup.objects.all().delete()
+        PortfolioRollup.objects.bulk_create(
+            PortfolioRollup(
+                broker_id=broker_id,
+                status=status,
+                type=type_,
+                transaction_count=count,
+                purchase_price_total=purchase,
+                earnest_deposit_total=earnest,
+            )
+            for (broker_id, status, type_), (count, purchase, earnest) in totals.items()
+        )
+    return len(totals)
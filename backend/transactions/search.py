@@ -0,0 +1,133 @@
+"""Full-text search over transactions.
+
+PostgreSQL keeps a ``search_document`` tsvector column on the transaction table behind a
+GIN index; SQLite keeps an FTS5 table, ``transactions_search``, whose rows are keyed by
+rowid through ``transactions_search_rowid`` so that re-indexing and deleting are rowid
+lookups. Both are created by migrations outside the model, and are written by the
+services from the data they already hold in memory, so indexing never re-reads the
+transaction. A deleted transaction's PostgreSQL document goes with its row; its FTS5 row
+is removed by ``unindex_transaction`` (a ``post_delete`` receiver). Other backends have no
+index and fall back to unranked ``icontains`` filtering.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Transaction
+
+TS_CONFIG = "simple"
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: str | None) -> str:
+    # Emails and addresses become plain words ("jane.doe@x.com" -> "jane doe x com"),
+    # which both engines tokenize the same way.
+    return " ".join(_TOKEN.findall((text or "").lower()))
+
+
+def document_for(transaction_obj: Transaction, emails: Iterable[str | None]) -> str:
+    parts = [
+        transaction_obj.title,
+        transaction_obj.property_description,
+        transaction_obj.property_address,
+        *emails,
+    ]
+    return " ".join(filter(None, (normalize(part) for part in parts)))
+
+
+def participant_emails(participants) -> list[str]:
+    emails = []
+    for participant in participants:
+        emails.append(participant.invited_email)
+        if participant.user_id and participant.user.email != participant.invited_email:
+            emails.append(participant.user.email)
+    return emails
+
+
+def index_transaction(transaction_obj: Transaction, emails: Iterable[str | None]) -> None:
+    document = document_for(transaction_obj, emails)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"UPDATE transactions_transaction SET search_document = to_tsvector('{TS_CONFIG}', %s) WHERE id = %s",
+                [document, transaction_obj.pk],
+            )
+        elif connection.vendor == "sqlite":
+            key = transaction_obj.pk.hex
+            cursor.execute("INSERT OR IGNORE INTO transactions_search_rowid (transaction_id) VALUES (%s)", [key])
+            cursor.execute("SELECT id FROM transactions_search_rowid WHERE transaction_id = %s", [key])
+            (rowid,) = cursor.fetchone()
+            cursor.execute("DELETE FROM transactions_search WHERE rowid = %s", [rowid])
+            cursor.execute("INSERT INTO transactions_search (rowid, document) VALUES (%s, %s)", [rowid, document])
+
+
+def unindex_transaction(transaction_pk) -> None:
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM transactions_search_rowid WHERE transaction_id = %s", [transaction_pk.hex])
+        row = cursor.fetchone()
+        if row is not None:
+            cursor.execute("DELETE FROM transactions_search WHERE rowid = %s", row)
+            cursor.execute("DELETE FROM transactions_search_rowid WHERE id = %s", row)
+
+
+def transaction_deleted(sender, instance: Transaction, **kwargs) -> None:
+    unindex_transaction(instance.pk)
+
+
+def _search_without_index(queryset: QuerySet, tokens: list[str]) -> QuerySet:
+    # Backends without a full-text index (MySQL, Oracle): every word must appear in one of
+    # the indexed fields, unranked.
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(title__icontains=token)
+            | Q(property_description__icontains=token)
+            | Q(property_address__icontains=token)
+            | Q(participants__invited_email__icontains=token)
+            | Q(participants__user__email__icontains=token)
+        )
+    return queryset.distinct().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search(queryset: QuerySet, query: str) -> QuerySet:
+    """Restrict ``queryset`` to transactions matching every word of ``query`` (as prefixes), best first.
+
+    Rows carry a ``search_rank`` annotation, higher is better.
+    """
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return queryset.none()
+
+    table = Transaction._meta.db_table
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        queryset = queryset.filter(
+            RawSQL(f"{table}.search_document @@ to_tsquery('{TS_CONFIG}', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({table}.search_document, to_tsquery('{TS_CONFIG}', %s))", [tsquery], output_field=FloatField()
+            )
+        )
+    elif connection.vendor == "sqlite":
+        match = " ".join(f'"{token}"*' for token in tokens)
+        # Join the MATCH result once; bm25() is read from the joined row, and negated
+        # (it is lower-is-better) so both backends sort descending.
+        queryset = queryset.extra(
+            select={"search_rank": "-bm25(transactions_search)"},
+            tables=["transactions_search_rowid", "transactions_search"],
+            where=[
+                f"transactions_search_rowid.transaction_id = {table}.id",
+                "transactions_search.rowid = transactions_search_rowid.id",
+                "transactions_search MATCH %s",
+            ],
+            params=[match],
+        )
+    else:
+        queryset = _search_without_index(queryset, tokens)
+    return queryset.order_by("-search_rank", "-created_at")
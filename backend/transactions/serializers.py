@@ -2,19 +2,37 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 
 from accounts.models import User
+from . import deadlines
 from .models import (
+    ROLE_BITS,
     CommissionSplit,
-    InvitationStatus,
     ParticipantRole,
+    PortfolioRollup,
     Transaction,
+    TransactionDeadline,
     TransactionDetails,
     TransactionInvitation,
     TransactionStatus,
     TransactionType,
 )
+from .types import plan_for
+
+
+def required_next_action(transaction_type: str, roles_present: int, roles_accepted: int) -> str | None:
+    if transaction_type == TransactionType.DOUBLE_BROKER_SPLIT:
+        if not roles_accepted & ROLE_BITS[ParticipantRole.BROKER_SECONDARY]:
+            return "Waiting for secondary broker"
+        has_buyer = roles_present & ROLE_BITS[ParticipantRole.BUYER]
+        has_seller = roles_present & ROLE_BITS[ParticipantRole.SELLER]
+        if has_buyer and not has_seller:
+            return "Secondary broker must invite seller"
+        if has_seller and not has_buyer:
+            return "Secondary broker must invite buyer"
+    return None
 
 
 class CommissionSplitSerializer(serializers.ModelSerializer):
@@ -25,7 +43,6 @@ class CommissionSplitSerializer(serializers.ModelSerializer):
 
 class TransactionListSerializer(serializers.ModelSerializer):
     my_role = serializers.SerializerMethodField()
-    pending_invites_count = serializers.SerializerMethodField()
     required_next_action = serializers.SerializerMethodField()
 
     class Meta:
@@ -42,6 +59,7 @@ class TransactionListSerializer(serializers.ModelSerializer):
             "estimated_closing_date",
             "depositor_name",
             "property_address",
+            "version",
             "updated_at",
             "my_role",
             "pending_invites_count",
@@ -50,23 +68,11 @@ class TransactionListSerializer(serializers.ModelSerializer):
 
     def get_my_role(self, obj: Transaction) -> str | None:
         user: User = self.context.get("request").user
-        participation = obj.participants.filter(user=user).first()
+        participation = next((p for p in obj.participants.all() if p.user_id == user.id), None)
         return participation.role if participation else None
 
-    def get_pending_invites_count(self, obj: Transaction) -> int:
-        return obj.invitations.filter(status=InvitationStatus.PENDING).count()
-
     def get_required_next_action(self, obj: Transaction) -> str | None:
-        roles = set(obj.participants.values_list("role", flat=True))
-        accepted_roles = set(obj.participants.filter(joined_at__isnull=False).values_list("role", flat=True))
-        if obj.type == TransactionType.DOUBLE_BROKER_SPLIT:
-            if ParticipantRole.BROKER_SECONDARY not in accepted_roles:
-                return "Waiting for secondary broker"
-            if ParticipantRole.BUYER in roles and ParticipantRole.SELLER not in roles:
-                return "Secondary broker must invite seller"
-            if ParticipantRole.SELLER in roles and ParticipantRole.BUYER not in roles:
-                return "Secondary broker must invite buyer"
-        return None
+        return required_next_action(obj.type, obj.roles_present, obj.roles_accepted)
 
 
 class TransactionDetailSerializer(serializers.ModelSerializer):
@@ -89,6 +95,7 @@ class TransactionDetailSerializer(serializers.ModelSerializer):
             "estimated_closing_date",
             "depositor_name",
             "property_address",
+            "version",
             "created_at",
             "updated_at",
             "participants",
@@ -150,14 +157,10 @@ class TransactionCreateSerializer(serializers.Serializer):
                 {"estimated_closing_date": "Estimated closing must be after due diligence end date."}
             )
 
-        if tx_type == TransactionType.SINGLE_BROKER_SALE:
-            for field in ("buyer_email", "seller_email"):
-                if not payload.get(field):
-                    raise serializers.ValidationError({"payload": f"{field} is required"})
-        elif tx_type == TransactionType.DOUBLE_BROKER_SPLIT:
-            for field in ("known_party_role", "known_party_email", "secondary_broker_email"):
-                if not payload.get(field):
-                    raise serializers.ValidationError({"payload": f"{field} is required"})
+        try:
+            attrs["plan"] = plan_for(tx_type, payload)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"payload": exc.messages}) from exc
         return attrs
 
     def core_fields(self) -> Dict[str, Any]:
@@ -174,9 +177,90 @@ class TransactionCreateSerializer(serializers.Serializer):
         return {field: self.validated_data[field] for field in allowed_fields if field in self.validated_data}
 
 
+class TransactionFilterSerializer(serializers.Serializer):
+    """Query parameters accepted by the transaction list; repeat ``status``/``type`` to match several."""
+
+    status = serializers.MultipleChoiceField(choices=TransactionStatus.choices, required=False)
+    type = serializers.MultipleChoiceField(choices=TransactionType.choices, required=False)
+    due_diligence_end_date_after = serializers.DateField(required=False)
+    due_diligence_end_date_before = serializers.DateField(required=False)
+    estimated_closing_date_after = serializers.DateField(required=False)
+    estimated_closing_date_before = serializers.DateField(required=False)
+    purchase_price_min = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    purchase_price_max = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+
+    RANGES = {
+        "due_diligence_end_date": ("due_diligence_end_date_after", "due_diligence_end_date_before"),
+        "estimated_closing_date": ("estimated_closing_date_after", "estimated_closing_date_before"),
+        "purchase_price": ("purchase_price_min", "purchase_price_max"),
+    }
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        for lower, upper in self.RANGES.values():
+            if lower in attrs and upper in attrs and attrs[lower] > attrs[upper]:
+                raise serializers.ValidationError({upper: f"Must not be less than {lower}."})
+        return attrs
+
+    def lookups(self) -> Dict[str, Any]:
+        data = self.validated_data
+        lookups: Dict[str, Any] = {}
+        for field in ("status", "type"):
+            if data.get(field):
+                lookups[f"{field}__in"] = sorted(data[field])
+        for field, (lower, upper) in self.RANGES.items():
+            if lower in data:
+                lookups[f"{field}__gte"] = data[lower]
+            if upper in data:
+                lookups[f"{field}__lte"] = data[upper]
+        return lookups
+
+
 class AcceptInvitationSerializer(serializers.Serializer):
     token = serializers.CharField()
 
 
 class InviteCounterpartySerializer(serializers.Serializer):
     counterparty_email = serializers.EmailField()
+
+
+class DeadlineQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=deadlines.MAX_WINDOW_DAYS, default=deadlines.DEFAULT_WINDOW_DAYS)
+
+
+class TransactionDeadlineSerializer(serializers.ModelSerializer):
+    transaction_id = serializers.UUIDField(source="transaction.id")
+    title = serializers.CharField(source="transaction.title")
+    status = serializers.CharField(source="transaction.status")
+
+    class Meta:
+        model = TransactionDeadline
+        fields = ("transaction_id", "title", "status", "kind", "due_date")
+
+
+class PortfolioRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PortfolioRollup
+        fields = ("status", "type", "transaction_count", "purchase_price_total", "earnest_deposit_total")
+
+
+class CommissionPayoutQuerySerializer(serializers.Serializer):
+    closing_from = serializers.DateField(required=False)
+    closing_to = serializers.DateField(required=False)
+    export = serializers.ChoiceField(choices=["csv"], required=False)
+
+
+class CommissionSplitUpdateSerializer(serializers.Serializer):
+    transaction_id = serializers.UUIDField()
+    primary_broker_pct = serializers.DecimalField(max_digits=5, decimal_places=2)
+    secondary_broker_pct = serializers.DecimalField(max_digits=5, decimal_places=2)
+    version = serializers.IntegerField(min_value=1, required=False)
+
+
+class BulkCommissionSplitSerializer(serializers.Serializer):
+    splits = serializers.ListField(child=CommissionSplitUpdateSerializer(), allow_empty=False, max_length=500)
+
+    def validate_splits(self, value: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        ids = [item["transaction_id"] for item in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Each transaction can appear only once.")
+        return value
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any, Dict
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
 from django.utils import timezone
 
+from . import aggregates, deadlines, portfolio, search
+from .exceptions import VersionConflict
 from .models import (
+    ROLE_BITS,
     CommissionSplit,
     InvitationStatus,
     ParticipantRole,
@@ -19,17 +22,14 @@ from .models import (
     TransactionInvitation,
     TransactionStatus,
     TransactionType,
+    role_mask,
+    validate_split,
 )
+from .types import CreationPlan, plan_for
 
 User = get_user_model()
 
 
-@dataclass
-class TransactionCreationPayload:
-    type: str
-    payload: Dict[str, Any]
-
-
 INVITE_EXPIRY_DAYS = 7
 
 
@@ -38,6 +38,57 @@ def _require_broker(user: User) -> None:
         raise PermissionDenied("Only brokers can perform this action.")
 
 
+def _conditional_update(transaction_obj: Transaction, expected_version: int | None = None, **changes: Any) -> None:
+    # Conditional bump instead of SELECT ... FOR UPDATE: a concurrent writer that read the
+    # same version matches zero rows and gets a 412 rather than queueing behind our lock.
+    # Because the row is guarded by the version we read, ``changes`` may be computed from
+    # the in-memory instance (summary masks, counters) without re-reading it.
+    if expected_version is None:
+        expected_version = transaction_obj.version
+    now = timezone.now()
+    updated = Transaction.objects.filter(pk=transaction_obj.pk, version=expected_version).update(
+        version=F("version") + 1, updated_at=now, **changes
+    )
+    if not updated:
+        raise VersionConflict()
+    for field, value in changes.items():
+        setattr(transaction_obj, field, value)
+    transaction_obj.version = expected_version + 1
+    transaction_obj.updated_at = now
+
+
+def refresh_summaries(transaction_ids) -> None:
+    """Recompute the summary columns from the participant and invitation rows.
+
+    For edits that bypass the services (the admin); the version is bumped like any write.
+    """
+    for transaction_id in set(transaction_ids):
+        present = accepted = 0
+        for role, user_id in TransactionParticipant.objects.filter(transaction_id=transaction_id).values_list(
+            "role", "user_id"
+        ):
+            present |= ROLE_BITS[role]
+            if user_id is not None:
+                accepted |= ROLE_BITS[role]
+        pending = TransactionInvitation.objects.filter(
+            transaction_id=transaction_id, status=InvitationStatus.PENDING
+        ).count()
+        Transaction.objects.filter(pk=transaction_id).update(
+            roles_present=present,
+            roles_accepted=accepted,
+            pending_invites_count=pending,
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+
+
+def _required_roles(transaction_obj: Transaction) -> int:
+    roles = [ParticipantRole.BROKER_PRIMARY, ParticipantRole.BUYER, ParticipantRole.SELLER]
+    if transaction_obj.type == TransactionType.DOUBLE_BROKER_SPLIT:
+        roles.append(ParticipantRole.BROKER_SECONDARY)
+    return role_mask(roles)
+
+
 def _create_invitation(participant: "TransactionParticipant") -> TransactionInvitation:
     return TransactionInvitation.objects.create(
         transaction=participant.transaction,
@@ -48,114 +99,84 @@ def _create_invitation(participant: "TransactionParticipant") -> TransactionInvi
 
 @transaction.atomic
 def create_transaction(
-    *, created_by: User, type: str, payload: Dict[str, Any], core_fields: Dict[str, Any]
+    *,
+    created_by: User,
+    type: str,
+    payload: Dict[str, Any],
+    core_fields: Dict[str, Any],
+    plan: CreationPlan | None = None,
 ) -> Transaction:
+    """Create a transaction from its type's ``CreationPlan``.
+
+    Callers that already validated the payload (``TransactionCreateSerializer``) pass the
+    plan they built; otherwise it is built here.
+    """
     _require_broker(created_by)
+    if plan is None:
+        plan = plan_for(type, payload)
 
-    if type not in TransactionType.values:
-        raise ValidationError("Invalid transaction type")
+    # Primary broker is always creator
+    participants = [{"role": ParticipantRole.BROKER_PRIMARY, "user": created_by, "invited_email": created_by.email}]
+    participants += [{"role": invitee.role, "invited_email": invitee.invited_email} for invitee in plan.invitees]
 
+    # Summary columns are known up front, so the row is written once with its final state.
     transaction_obj = Transaction.objects.create(
         created_by=created_by,
-        type=type,
-        status=TransactionStatus.DRAFT,
+        type=plan.type,
+        status=TransactionStatus.INVITING if plan.invitees else TransactionStatus.DRAFT,
+        roles_present=role_mask(participant["role"] for participant in participants),
+        roles_accepted=ROLE_BITS[ParticipantRole.BROKER_PRIMARY],
+        pending_invites_count=len(plan.invitees),
         **core_fields,
     )
 
-    details = payload.copy()
-    participants = []
-
-    # Primary broker is always creator
-    participants.append(
-        {
-            "role": ParticipantRole.BROKER_PRIMARY,
-            "user": created_by,
-            "invited_email": created_by.email,
-        }
-    )
-
-    if type == TransactionType.SINGLE_BROKER_SALE:
-        buyer_email = payload.get("buyer_email")
-        seller_email = payload.get("seller_email")
-        if not buyer_email or not seller_email:
-            raise ValidationError("buyer_email and seller_email are required")
-
-        TransactionDetails.objects.create(transaction=transaction_obj, data=details)
-
-        participants.extend(
-            [
-                {
-                    "role": ParticipantRole.BUYER,
-                    "invited_email": buyer_email,
-                },
-                {
-                    "role": ParticipantRole.SELLER,
-                    "invited_email": seller_email,
-                },
-            ]
-        )
-    elif type == TransactionType.DOUBLE_BROKER_SPLIT:
-        known_role = payload.get("known_party_role")
-        known_email = payload.get("known_party_email")
-        secondary_email = payload.get("secondary_broker_email")
-        if known_role not in (ParticipantRole.BUYER, ParticipantRole.SELLER):
-            raise ValidationError("known_party_role must be buyer or seller")
-        if not known_email or not secondary_email:
-            raise ValidationError("known_party_email and secondary_broker_email are required")
-
-        split = payload.get("commission_split") or {"primary_broker_pct": 50, "secondary_broker_pct": 50}
-        CommissionSplit.objects.create(
-            transaction=transaction_obj,
-            primary_broker_pct=split.get("primary_broker_pct", 50),
-            secondary_broker_pct=split.get("secondary_broker_pct", 50),
-        )
-        TransactionDetails.objects.create(transaction=transaction_obj, data=details)
-
-        participants.extend(
-            [
-                {
-                    "role": ParticipantRole.BROKER_SECONDARY,
-                    "invited_email": secondary_email,
-                },
-                {
-                    "role": known_role,
-                    "invited_email": known_email,
-                },
-            ]
+    aggregate = aggregates.track(transaction_obj)
+    if plan.commission_split is not None:
+        primary_pct, secondary_pct = plan.commission_split
+        aggregate.set_commission_split(
+            CommissionSplit.objects.create(
+                transaction=transaction_obj, primary_broker_pct=primary_pct, secondary_broker_pct=secondary_pct
+            )
         )
-    else:
-        TransactionDetails.objects.create(transaction=transaction_obj, data=details)
+    aggregate.set_details(TransactionDetails.objects.create(transaction=transaction_obj, data=plan.details))
 
-    participant_objs = []
     for participant in participants:
-        participant_objs.append(
-            transaction_obj.participants.create(
+        aggregate.add_participant(
+            TransactionParticipant.objects.create(
+                transaction=transaction_obj,
                 role=participant["role"],
                 invited_email=participant["invited_email"],
                 invited_by=created_by,
                 user=participant.get("user"),
+                joined_at=timezone.now() if participant.get("user") else None,
             )
         )
 
     # Create invitations for non-creator participants
-    for part in participant_objs:
+    for part in list(aggregate.participants):
         if part.user_id != created_by.id:
-            _create_invitation(part)
-
-    transaction_obj.status = TransactionStatus.INVITING if len(participant_objs) > 1 else TransactionStatus.DRAFT
-    transaction_obj.save(update_fields=["status"])
+            aggregate.add_invitation(_create_invitation(part))
 
+    deadlines.create_deadlines(transaction_obj)
+    portfolio.record_change([created_by.id], None, portfolio.Contribution.of(transaction_obj))
+    search.index_transaction(transaction_obj, search.participant_emails(aggregate.participants))
     return transaction_obj
 
 
 @transaction.atomic
-def invite_counterparty(*, transaction_obj: Transaction, acting_user: User, counterparty_email: str):
+def invite_counterparty(
+    *,
+    transaction_obj: Transaction,
+    acting_user: User,
+    counterparty_email: str,
+    expected_version: int | None = None,
+):
     if transaction_obj.type != TransactionType.DOUBLE_BROKER_SPLIT:
         raise ValidationError("Counterparty invites only valid for double broker split")
 
-    try:
-        secondary_participant = transaction_obj.participants.get(role=ParticipantRole.BROKER_SECONDARY)
-    except TransactionParticipant.DoesNotExist:
+    aggregate = aggregates.load(transaction_obj)
+    secondary_participant = aggregate.participant_for_role(ParticipantRole.BROKER_SECONDARY)
+    if secondary_participant is None:
         raise ValidationError("Secondary broker not found")
 
     if secondary_participant.user_id != acting_user.id:
@@ -164,40 +185,86 @@ def invite_counterparty(*, transaction_obj: Transaction, acting_user: User, coun
     if not secondary_participant.joined_at:
         raise PermissionDenied("Secondary broker must accept invitation first")
 
-    roles_present = set(transaction_obj.participants.values_list("role", flat=True))
-    if ParticipantRole.BUYER in roles_present and ParticipantRole.SELLER in roles_present:
+    if transaction_obj.has_role(ParticipantRole.BUYER) and transaction_obj.has_role(ParticipantRole.SELLER):
         raise ValidationError("All parties already present")
 
-    missing_role = ParticipantRole.SELLER if ParticipantRole.BUYER in roles_present else ParticipantRole.BUYER
-    participant = transaction_obj.participants.create(
-        role=missing_role,
-        invited_email=counterparty_email,
-        invited_by=acting_user,
+    missing_role = ParticipantRole.SELLER if transaction_obj.has_role(ParticipantRole.BUYER) else ParticipantRole.BUYER
+    _conditional_update(
+        transaction_obj,
+        expected_version,
+        roles_present=transaction_obj.roles_present | ROLE_BITS[missing_role],
+        pending_invites_count=transaction_obj.pending_invites_count + 1,
+    )
+    participant = aggregate.add_participant(
+        TransactionParticipant.objects.create(
+            transaction=transaction_obj,
+            role=missing_role,
+            invited_email=counterparty_email,
+            invited_by=acting_user,
+        )
     )
-    invitation = _create_invitation(participant)
+    invitation = aggregate.add_invitation(_create_invitation(participant))
+    search.index_transaction(transaction_obj, search.participant_emails(aggregate.participants))
     return participant, invitation
 
 
-@transaction.atomic
-def accept_invitation(*, token: str, user: User) -> Transaction:
-    try:
-        invitation = TransactionInvitation.objects.select_related("participant", "transaction").get(token=token)
-    except TransactionInvitation.DoesNotExist as exc:  # pragma: no cover - defensive
-        raise ValidationError("Invalid invitation token") from exc
+def _expire_invitation(invitation: TransactionInvitation) -> None:
+    invitation.status = InvitationStatus.EXPIRED
+    invitation.save(update_fields=["status"])
+    transaction_obj = invitation.transaction
+    _conditional_update(transaction_obj, pending_invites_count=transaction_obj.pending_invites_count - 1)
 
-    if invitation.status != InvitationStatus.PENDING:
-        raise ValidationError("Invitation is not pending")
 
-    if invitation.is_expired():
-        invitation.status = InvitationStatus.EXPIRED
-        invitation.save(update_fields=["status"])
-        raise ValidationError("Invitation has expired")
+def accept_invitation(*, token: str, user: User, expected_version: int | None = None) -> Transaction:
+    with transaction.atomic():
+        try:
+            invitation = TransactionInvitation.objects.select_related(
+                "participant", "transaction", "transaction__details", "transaction__commission_split"
+            ).get(token=token)
+        except TransactionInvitation.DoesNotExist as exc:  # pragma: no cover - defensive
+            raise ValidationError("Invalid invitation token") from exc
 
-    participant = invitation.participant
+        if invitation.status != InvitationStatus.PENDING:
+            raise ValidationError("Invitation is not pending")
 
-    if participant.role == ParticipantRole.BROKER_SECONDARY and not getattr(user, "is_broker", False):
+        if not invitation.is_expired():
+            return _accept_pending_invitation(invitation, user, expected_version)
+
+        # Commit the expiry (and its counter decrement) before reporting it.
+        _expire_invitation(invitation)
+    raise ValidationError("Invitation has expired")
+
+
+def _accept_pending_invitation(
+    invitation: TransactionInvitation, user: User, expected_version: int | None
+) -> Transaction:
+    if invitation.participant.role == ParticipantRole.BROKER_SECONDARY and not getattr(user, "is_broker", False):
         raise PermissionDenied("Secondary broker must be a broker user")
 
+    transaction_obj = invitation.transaction
+    # Swap in the aggregate's instances so the response renders from what we write here.
+    aggregate = aggregates.load(transaction_obj)
+    invitation = aggregate.invitation(invitation.pk)
+    participant = invitation.participant
+    brokers = [
+        broker.user_id
+        for broker in aggregate.participants
+        if broker.role in (ParticipantRole.BROKER_PRIMARY, ParticipantRole.BROKER_SECONDARY) and broker.user_id
+    ]
+    before = portfolio.Contribution.of(transaction_obj)
+    roles_accepted = transaction_obj.roles_accepted | ROLE_BITS[participant.role]
+    required = _required_roles(transaction_obj)
+    status = transaction_obj.status
+    if status == TransactionStatus.INVITING and roles_accepted & required == required:
+        status = TransactionStatus.ACTIVE
+    _conditional_update(
+        transaction_obj,
+        expected_version,
+        status=status,
+        roles_accepted=roles_accepted,
+        pending_invites_count=transaction_obj.pending_invites_count - 1,
+    )
+
     participant.user = user
     participant.joined_at = timezone.now()
     participant.save(update_fields=["user", "joined_at"])
@@ -205,17 +272,79 @@ def accept_invitation(*, token: str, user: User) -> Transaction:
     invitation.status = InvitationStatus.ACCEPTED
     invitation.save(update_fields=["status"])
 
-    transaction_obj = invitation.transaction
+    after = portfolio.Contribution.of(transaction_obj)
+    portfolio.record_change(brokers, before, after)
+    if participant.role == ParticipantRole.BROKER_SECONDARY:
+        portfolio.record_change([user.id], None, after)
+
+    if user.email != participant.invited_email:
+        search.index_transaction(transaction_obj, search.participant_emails(aggregate.participants))
+    return transaction_obj
 
-    required_roles = {ParticipantRole.BROKER_PRIMARY, ParticipantRole.BUYER, ParticipantRole.SELLER}
-    if transaction_obj.type == TransactionType.DOUBLE_BROKER_SPLIT:
-        required_roles.add(ParticipantRole.BROKER_SECONDARY)
 
-    accepted_roles = set(
-        transaction_obj.participants.filter(joined_at__isnull=False).values_list("role", flat=True)
+@transaction.atomic
+def update_commission_splits(*, acting_user: User, splits: list[Dict[str, Any]]) -> list[Transaction]:
+    """Renegotiate many commission splits at once.
+
+    Every item (``transaction_id``, ``primary_broker_pct``, ``secondary_broker_pct`` and an
+    optional ``version``) is checked before anything is written; then one UPDATE bumps the
+    versions and one CASE UPDATE rewrites the splits. A transaction the caller does not own
+    fails the batch with PermissionDenied, before any item is validated; any stale version
+    fails it too.
+    """
+    _require_broker(acting_user)
+    transactions = Transaction.objects.select_related("commission_split").in_bulk(
+        [item["transaction_id"] for item in splits]
+    )
+    if not acting_user.is_staff and any(
+        transaction_obj.created_by_id != acting_user.id for transaction_obj in transactions.values()
+    ):
+        raise PermissionDenied("Only the primary broker can change the commission split")
+
+    errors: Dict[str, list[str]] = {}
+    for index, item in enumerate(splits):
+        transaction_obj = transactions.get(item["transaction_id"])
+        try:
+            if transaction_obj is None or transaction_obj.type != TransactionType.DOUBLE_BROKER_SPLIT:
+                raise ValidationError("Double broker transaction not found")
+            validate_split(item["primary_broker_pct"], item["secondary_broker_pct"])
+        except ValidationError as exc:
+            errors[str(index)] = exc.messages
+    if errors:
+        raise ValidationError(errors)
+
+    versions = Q()
+    for item in splits:
+        transaction_obj = transactions[item["transaction_id"]]
+        versions |= Q(pk=transaction_obj.pk, version=item.get("version") or transaction_obj.version)
+    now = timezone.now()
+    if Transaction.objects.filter(versions).update(version=F("version") + 1, updated_at=now) != len(splits):
+        raise VersionConflict()
+
+    percentage = DecimalField(max_digits=5, decimal_places=2)
+    CommissionSplit.objects.filter(transaction_id__in=[item["transaction_id"] for item in splits]).update(
+        primary_broker_pct=Case(
+            *(When(transaction_id=item["transaction_id"], then=Value(item["primary_broker_pct"])) for item in splits),
+            output_field=percentage,
+        ),
+        secondary_broker_pct=Case(
+            *(When(transaction_id=item["transaction_id"], then=Value(item["secondary_broker_pct"])) for item in splits),
+            output_field=percentage,
+        ),
     )
-    if transaction_obj.status == TransactionStatus.INVITING and required_roles.issubset(accepted_roles):
-        transaction_obj.status = TransactionStatus.ACTIVE
-        transaction_obj.save(update_fields=["status"])
 
-    return transaction_obj
+    updated, missing = [], []
+    for item in splits:
+        transaction_obj = transactions[item["transaction_id"]]
+        transaction_obj.version += 1
+        transaction_obj.updated_at = now
+        try:
+            split = transaction_obj.commission_split
+        except CommissionSplit.DoesNotExist:
+            split = CommissionSplit(transaction=transaction_obj)
+            missing.append(split)
+        split.primary_broker_pct = item["primary_broker_pct"]
+        split.secondary_broker_pct = item["secondary_broker_pct"]
+        updated.append(transaction_obj)
+    CommissionSplit.objects.bulk_create(missing)
+    return updated
@@ -1,9 +1,50 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.admin.sites import site as admin_site
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.transaction import atomic
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
 
-from .models import CommissionSplit, ParticipantRole, Transaction, TransactionInvitation, TransactionType
+from .models import (
+    ROLE_BITS,
+    CommissionSplit,
+    DeadlineKind,
+    IdempotencyRecord,
+    InvitationStatus,
+    ParticipantRole,
+    PortfolioRollup,
+    Transaction,
+    TransactionDeadline,
+    TransactionInvitation,
+    TransactionParticipant,
+    TransactionStatus,
+    TransactionType,
+    role_mask,
+)
+from . import fastpath
+from .admin import TransactionAdmin, TransactionInvitationAdmin, TransactionParticipantAdmin
+from .commissions import accumulate_payouts
+from .deadlines import sync_deadlines
+from .exceptions import IdempotentRequestInProgress
+from .idempotency import fingerprint, idempotent
+from .serializers import TransactionDetailSerializer, TransactionListSerializer
+from .services import accept_invitation
 
 User = get_user_model()
 
@@ -98,11 +139,13 @@ class TransactionServiceTests(TestCase):
         secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
         self.client.force_authenticate(secondary_user)
         self.client.post(reverse("accept-invitation", kwargs={"token": secondary_invite.token}))
-        response = self.client.post(
-            reverse("transaction-invite-counterparty", kwargs={"id": transaction.id}),
-            {"counterparty_email": "seller@example.com"},
-            format="json",
-        )
+        # Re-indexing reads the participants from the aggregate, not with another SELECT.
+        with self.assertNumQueries(12):
+            response = self.client.post(
+                reverse("transaction-invite-counterparty", kwargs={"id": transaction.id}),
+                {"counterparty_email": "seller@example.com"},
+                format="json",
+            )
         self.assertEqual(response.status_code, 201)
         self.assertTrue(transaction.participants.filter(role=ParticipantRole.SELLER).exists())
 
@@ -183,6 +226,59 @@ class TransactionServiceTests(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("estimated_closing_date", response.data)
 
+    def test_payload_is_validated_by_type_schema(self):
+        def create(payload, tx_type=TransactionType.DOUBLE_BROKER_SPLIT):
+            return self.client.post(
+                reverse("transaction-list"),
+                {**self._core_fields(), "type": tx_type, "payload": payload},
+                format="json",
+            )
+
+        valid = {
+            "known_party_role": ParticipantRole.BUYER,
+            "known_party_email": "buyer@example.com",
+            "secondary_broker_email": "second@example.com",
+        }
+        response = create({**valid, "known_party_role": ParticipantRole.OTHER})
+        self.assertEqual(response.data["payload"], ["known_party_role must be buyer or seller"])
+        response = create({**valid, "secondary_broker_email": "not-an-email"})
+        self.assertEqual(response.data["payload"], ["secondary_broker_email must be a valid email address"])
+        response = create({**valid, "commission_split": {"primary_broker_pct": 70, "secondary_broker_pct": 20}})
+        self.assertEqual(response.data["payload"], ["Commission split must total 100%"])
+        self.assertFalse(Transaction.objects.exists())
+
+        response = create({}, tx_type=TransactionType.DUE_DILIGENCE)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["status"], TransactionStatus.DRAFT)
+
+    def test_payload_with_wrong_value_types_is_rejected(self):
+        valid = {
+            "known_party_role": ParticipantRole.BUYER,
+            "known_party_email": "buyer@example.com",
+            "secondary_broker_email": "second@example.com",
+        }
+        cases = [
+            ({"known_party_email": 123}, ["known_party_email must be a valid email address"]),
+            ({"known_party_role": ["buyer"]}, ["known_party_role must be buyer or seller"]),
+            ({"commission_split": {"primary_broker_pct": "NaN"}}, ["primary_broker_pct: Enter a number."]),
+            ({"commission_split": {"primary_broker_pct": "-Infinity"}}, ["primary_broker_pct: Enter a number."]),
+            ({"commission_split": {"primary_broker_pct": {}}}, ["Commission split percentages must be numbers"]),
+            (
+                {"commission_split": {"primary_broker_pct": "40.1234", "secondary_broker_pct": "59.8766"}},
+                ["primary_broker_pct: Ensure that there are no more than 5 digits in total."],
+            ),
+        ]
+        for override, errors in cases:
+            with self.subTest(override=override):
+                response = self.client.post(
+                    reverse("transaction-list"),
+                    {**self._core_fields(), "type": TransactionType.DOUBLE_BROKER_SPLIT, "payload": {**valid, **override}},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data["payload"], errors)
+        self.assertFalse(Transaction.objects.exists())
+
     def test_optional_depositor_name_persists(self):
         response = self.client.post(
             reverse("transaction-list"),
@@ -196,3 +292,777 @@ class TransactionServiceTests(TestCase):
         self.assertEqual(response.status_code, 201)
         transaction = Transaction.objects.get()
         self.assertEqual(transaction.depositor_name, "Escrow Corp")
+
+    def _create_double_broker_transaction(self):
+        self.client.post(
+            reverse("transaction-list"),
+            {
+                **self._core_fields(),
+                "type": TransactionType.DOUBLE_BROKER_SPLIT,
+                "payload": {
+                    "known_party_role": ParticipantRole.BUYER,
+                    "known_party_email": "buyer@example.com",
+                    "secondary_broker_email": "second@example.com",
+                },
+            },
+            format="json",
+        )
+        return Transaction.objects.get()
+
+    def test_detail_exposes_version_as_etag(self):
+        transaction = self._create_double_broker_transaction()
+        response = self.client.get(reverse("transaction-detail", kwargs={"id": transaction.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"1"')
+        self.assertEqual(response.data["version"], 1)
+
+    def test_accept_with_matching_if_match_bumps_version(self):
+        transaction = self._create_double_broker_transaction()
+        secondary_invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BROKER_SECONDARY)
+        secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(secondary_user)
+        response = self.client.post(
+            reverse("accept-invitation", kwargs={"token": secondary_invite.token}),
+            HTTP_IF_MATCH='"1"',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.version, 2)
+
+    def test_if_match_uses_strong_comparison(self):
+        transaction = self._create_double_broker_transaction()
+        secondary_invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BROKER_SECONDARY)
+        secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(secondary_user)
+        url = reverse("accept-invitation", kwargs={"token": secondary_invite.token})
+
+        self.assertEqual(self.client.post(url, HTTP_IF_MATCH='W/"1"').status_code, 412)
+        # The gzip ETag names the same version in another encoding, and stays strong.
+        response = self.client.post(url, HTTP_IF_MATCH='"1-gzip"', HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.version, 2)
+
+    def test_stale_if_match_returns_412_and_rolls_back(self):
+        transaction = self._create_double_broker_transaction()
+        secondary_invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BROKER_SECONDARY)
+        secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(secondary_user)
+        self.client.post(reverse("accept-invitation", kwargs={"token": secondary_invite.token}))
+
+        response = self.client.post(
+            reverse("transaction-invite-counterparty", kwargs={"id": transaction.id}),
+            {"counterparty_email": "seller@example.com"},
+            format="json",
+            HTTP_IF_MATCH='"1"',
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertFalse(transaction.participants.filter(role=ParticipantRole.SELLER).exists())
+
+    def test_admin_edit_bumps_version_and_invalidates_if_match(self):
+        transaction = self._create_double_broker_transaction()
+        transaction.title = "Edited by staff"
+        TransactionAdmin(Transaction, admin_site).save_model(RequestFactory().post("/admin/"), transaction, None, True)
+        self.assertEqual(transaction.version, 2)
+        self.assertIn("version", TransactionAdmin(Transaction, admin_site).readonly_fields)
+
+        secondary_invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BROKER_SECONDARY)
+        secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(secondary_user)
+        response = self.client.post(
+            reverse("accept-invitation", kwargs={"token": secondary_invite.token}), HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, 412)
+
+    def test_summary_columns_track_participants_and_invites(self):
+        transaction = self._create_double_broker_transaction()
+        self.assertEqual(
+            transaction.roles_present,
+            role_mask([ParticipantRole.BROKER_PRIMARY, ParticipantRole.BROKER_SECONDARY, ParticipantRole.BUYER]),
+        )
+        self.assertEqual(transaction.roles_accepted, ROLE_BITS[ParticipantRole.BROKER_PRIMARY])
+        self.assertEqual(transaction.pending_invites_count, 2)
+
+        secondary_invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BROKER_SECONDARY)
+        secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(secondary_user)
+        self.client.post(reverse("accept-invitation", kwargs={"token": secondary_invite.token}))
+        self.client.post(
+            reverse("transaction-invite-counterparty", kwargs={"id": transaction.id}),
+            {"counterparty_email": "seller@example.com"},
+            format="json",
+        )
+
+        transaction.refresh_from_db()
+        self.assertTrue(transaction.has_role(ParticipantRole.SELLER))
+        self.assertTrue(transaction.has_accepted(ParticipantRole.BROKER_SECONDARY))
+        self.assertEqual(transaction.pending_invites_count, 2)
+
+        response = self.client.get(reverse("transaction-list"))
+        self.assertEqual(response.data[0]["pending_invites_count"], 2)
+        self.assertIsNone(response.data[0]["required_next_action"])
+
+    def test_admin_participant_and_invitation_edits_refresh_summary(self):
+        transaction = self._create_double_broker_transaction()
+        request = RequestFactory().post("/admin/")
+        buyer = transaction.participants.get(role=ParticipantRole.BUYER)
+        buyer.user = self.other_user
+        TransactionParticipantAdmin(TransactionParticipant, admin_site).save_model(request, buyer, None, True)
+        invitation = TransactionInvitation.objects.get(participant=buyer)
+        invitation.status = InvitationStatus.REVOKED
+        TransactionInvitationAdmin(TransactionInvitation, admin_site).save_model(request, invitation, None, True)
+
+        transaction.refresh_from_db()
+        self.assertTrue(transaction.has_accepted(ParticipantRole.BUYER))
+        self.assertEqual(transaction.pending_invites_count, 1)
+        self.assertEqual(transaction.version, 3)
+
+        secondary = transaction.participants.get(role=ParticipantRole.BROKER_SECONDARY)
+        TransactionParticipantAdmin(TransactionParticipant, admin_site).delete_model(request, secondary)
+        transaction.refresh_from_db()
+        self.assertFalse(transaction.has_role(ParticipantRole.BROKER_SECONDARY))
+        self.assertEqual(transaction.pending_invites_count, 0)
+
+    def test_transaction_activates_when_all_roles_accept(self):
+        self.client.post(
+            reverse("transaction-list"),
+            {
+                **self._core_fields(),
+                "type": TransactionType.SINGLE_BROKER_SALE,
+                "payload": {"buyer_email": "buyer@example.com", "seller_email": "seller@example.com"},
+            },
+            format="json",
+        )
+        for invite in TransactionInvitation.objects.select_related("participant"):
+            invitee = User.objects.create_user(email=invite.participant.invited_email, password="pass")
+            self.client.force_authenticate(invitee)
+            self.client.post(reverse("accept-invitation", kwargs={"token": invite.token}))
+
+        transaction = Transaction.objects.get()
+        self.assertEqual(transaction.status, TransactionStatus.ACTIVE)
+        self.assertEqual(transaction.pending_invites_count, 0)
+
+    def test_expired_invitation_is_persisted_and_uncounted(self):
+        transaction = self._create_double_broker_transaction()
+        invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BUYER)
+        TransactionInvitation.objects.filter(pk=invite.pk).update(expires_at=timezone.now() - timedelta(days=1))
+
+        with self.assertRaises(ValidationError):
+            accept_invitation(token=invite.token, user=self.other_user)
+
+        invite.refresh_from_db()
+        transaction.refresh_from_db()
+        self.assertEqual(invite.status, InvitationStatus.EXPIRED)
+        self.assertEqual(transaction.pending_invites_count, 1)
+
+    def _transaction_selects(self, queries):
+        return [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and '"transactions_' in query["sql"].split("WHERE")[0]
+        ]
+
+    def test_create_renders_response_without_reloading(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("transaction-list"),
+                {
+                    **self._core_fields(),
+                    "type": TransactionType.DOUBLE_BROKER_SPLIT,
+                    "payload": {
+                        "known_party_role": ParticipantRole.BUYER,
+                        "known_party_email": "buyer@example.com",
+                        "secondary_broker_email": "second@example.com",
+                    },
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        captured = queries.captured_queries
+        last_write = max(i for i, query in enumerate(captured) if query["sql"].startswith("INSERT"))
+        self.assertEqual(self._transaction_selects(captured[last_write:]), [])
+        self.assertEqual(len(response.data["participants"]), 3)
+        self.assertEqual(
+            [invite["participant_role"] for invite in response.data["invitations"]],
+            [ParticipantRole.BROKER_SECONDARY, ParticipantRole.BUYER],
+        )
+        self.assertEqual(response.data["commission_split"]["primary_broker_pct"], "50.00")
+
+    def test_accept_renders_response_from_loaded_aggregate(self):
+        self._create_double_broker_transaction()
+        secondary_invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BROKER_SECONDARY)
+        secondary_user = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(secondary_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("accept-invitation", kwargs={"token": secondary_invite.token}))
+        self.assertEqual(response.status_code, 200)
+        # token lookup + participants + invitations; nothing after the writes
+        self.assertEqual(len(self._transaction_selects(queries.captured_queries)), 3)
+        secondary = next(p for p in response.data["participants"] if p["role"] == ParticipantRole.BROKER_SECONDARY)
+        self.assertEqual(secondary["user"], secondary_user.id)
+        self.assertEqual(
+            {invite["participant_role"]: invite["status"] for invite in response.data["invitations"]},
+            {ParticipantRole.BROKER_SECONDARY: InvitationStatus.ACCEPTED, ParticipantRole.BUYER: InvitationStatus.PENDING},
+        )
+
+    def _create_sale(self, title: str, address: str = "", buyer_email: str = "buyer@example.com"):
+        response = self.client.post(
+            reverse("transaction-list"),
+            {
+                **self._core_fields({"title": title, "property_address": address}),
+                "type": TransactionType.SINGLE_BROKER_SALE,
+                "payload": {"buyer_email": buyer_email, "seller_email": "seller@example.com"},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def test_list_search_matches_prefixes_and_participant_emails(self):
+        lakeside = self._create_sale("Lakeside cabin", "12 Shore Road")
+        downtown = self._create_sale("Downtown loft", "1 Main Street", buyer_email="jane.doe@buyers.com")
+
+        def search_ids(query):
+            response = self.client.get(reverse("transaction-list"), {"q": query})
+            self.assertEqual(response.status_code, 200)
+            return [row["id"] for row in response.data]
+
+        self.assertEqual(search_ids("lakes"), [lakeside])
+        self.assertEqual(search_ids("shore road"), [lakeside])
+        self.assertEqual(search_ids("jane.doe"), [downtown])
+        self.assertEqual(search_ids("loft shore"), [])
+        self.assertEqual(search_ids("!!"), [])
+
+    def test_search_ranks_better_matches_first(self):
+        self._create_sale("Cabin", "Lakeside drive")
+        lakeside = self._create_sale("Lakeside cabin", "Lakeside road")
+        response = self.client.get(reverse("transaction-list"), {"q": "lakeside"})
+        self.assertEqual(response.data[0]["id"], lakeside)
+
+    def test_backends_without_a_full_text_index_fall_back_to_icontains(self):
+        lakeside = self._create_sale("Lakeside cabin", "12 Shore Road")
+        self._create_sale("Downtown loft", buyer_email="jane.doe@buyers.com")
+        with mock.patch("transactions.search.connection", SimpleNamespace(vendor="mysql")):
+            response = self.client.get(reverse("transaction-list"), {"q": "shore lakes"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data], [lakeside])
+
+    def test_deleted_transactions_leave_the_search_index(self):
+        lakeside = self._create_sale("Lakeside cabin")
+        self._create_sale("Lakeside chalet")
+        Transaction.objects.get(pk=lakeside).delete()
+
+        response = self.client.get(reverse("transaction-list"), {"q": "lakeside"})
+        self.assertEqual([row["title"] for row in response.data], ["Lakeside chalet"])
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM transactions_search")
+                self.assertEqual(cursor.fetchone(), (1,))
+                cursor.execute("SELECT count(*) FROM transactions_search_rowid")
+                self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_search_only_returns_visible_transactions(self):
+        self._create_sale("Lakeside cabin")
+        self.client.force_authenticate(self.other_user)
+        response = self.client.get(reverse("transaction-list"), {"q": "lakeside"})
+        self.assertEqual(response.data, [])
+
+    def test_list_filters_by_status_type_dates_and_price(self):
+        double = str(self._create_double_broker_transaction().id)
+        cheap = self._create_sale("Cheap", buyer_email="a@example.com")
+        self.client.post(
+            reverse("transaction-list"),
+            {
+                **self._core_fields({"purchase_price": "500000.00", "estimated_closing_date": "2024-06-01"}),
+                "type": TransactionType.SINGLE_BROKER_SALE,
+                "payload": {"buyer_email": "b@example.com", "seller_email": "seller@example.com"},
+            },
+            format="json",
+        )
+
+        def filtered(params):
+            response = self.client.get(reverse("transaction-list"), params)
+            self.assertEqual(response.status_code, 200)
+            return {row["id"] for row in response.data}
+
+        self.assertEqual(filtered({"type": TransactionType.DOUBLE_BROKER_SPLIT}), {double})
+        self.assertEqual(len(filtered({"status": [TransactionStatus.INVITING, TransactionStatus.ACTIVE]})), 3)
+        self.assertEqual(filtered({"status": TransactionStatus.ACTIVE}), set())
+        self.assertEqual(
+            filtered({"purchase_price_max": "200000", "estimated_closing_date_before": "2024-03-01"}), {double, cheap}
+        )
+        self.assertEqual(
+            filtered({"type": TransactionType.SINGLE_BROKER_SALE, "estimated_closing_date_before": "2024-03-01"}),
+            {cheap},
+        )
+        self.assertEqual(len(filtered({"estimated_closing_date_after": "2024-05-01"})), 1)
+
+    def test_list_rejects_invalid_filters(self):
+        response = self.client.get(reverse("transaction-list"), {"status": "bogus"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("transaction-list"), {"purchase_price_min": "10", "purchase_price_max": "5"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("purchase_price_max", response.data)
+
+    def _rollups(self):
+        return {
+            (row.broker.email, row.status, row.type): (row.transaction_count, str(row.purchase_price_total))
+            for row in PortfolioRollup.objects.select_related("broker").filter(transaction_count__gt=0)
+        }
+
+    def test_portfolio_rollups_follow_creation_acceptance_and_status(self):
+        self._create_double_broker_transaction()
+        key = (self.broker.email, TransactionStatus.INVITING, TransactionType.DOUBLE_BROKER_SPLIT)
+        self.assertEqual(self._rollups(), {key: (1, "100000.00")})
+
+        for invite in TransactionInvitation.objects.select_related("participant").order_by("pk"):
+            invitee = User.objects.create_user(email=invite.participant.invited_email, password="pass", is_broker=True)
+            self.client.force_authenticate(invitee)
+            self.client.post(reverse("accept-invitation", kwargs={"token": invite.token}))
+        self.client.force_authenticate(User.objects.get(email="second@example.com"))
+        self.client.post(
+            reverse("transaction-invite-counterparty", kwargs={"id": Transaction.objects.get().id}),
+            {"counterparty_email": "seller@example.com"},
+            format="json",
+        )
+        invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.SELLER)
+        self.client.force_authenticate(User.objects.create_user(email="seller@example.com", password="pass"))
+        self.client.post(reverse("accept-invitation", kwargs={"token": invite.token}))
+
+        active = (TransactionStatus.ACTIVE, TransactionType.DOUBLE_BROKER_SPLIT)
+        expected = {(self.broker.email, *active): (1, "100000.00"), ("second@example.com", *active): (1, "100000.00")}
+        self.assertEqual(self._rollups(), expected)
+
+        PortfolioRollup.objects.all().delete()
+        call_command("rebuild_portfolio_rollups", stdout=StringIO())
+        self.assertEqual(self._rollups(), expected)
+
+        self.client.force_authenticate(self.broker)
+        response = self.client.get(reverse("portfolio"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["status"], row["transaction_count"], row["purchase_price_total"]) for row in response.data],
+            [(TransactionStatus.ACTIVE, 1, "100000.00")],
+        )
+
+    def test_accepting_under_another_email_reindexes_search(self):
+        self._create_sale("Lakeside cabin", buyer_email="buyer@example.com")
+        invite = TransactionInvitation.objects.get(participant__role=ParticipantRole.BUYER)
+        buyer = User.objects.create_user(email="buyer.alias@example.com", password="pass")
+        self.client.force_authenticate(buyer)
+        with self.assertNumQueries(12):
+            response = self.client.post(reverse("accept-invitation", kwargs={"token": invite.token}))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("transaction-list"), {"q": "buyer alias"})
+        self.assertEqual(len(response.data), 1)
+        # One deadline row per date field, not a second set from the accept.
+        self.assertEqual(
+            sorted(TransactionDeadline.objects.values_list("kind", flat=True)),
+            sorted([DeadlineKind.DUE_DILIGENCE_END, DeadlineKind.ESTIMATED_CLOSING]),
+        )
+
+
+class DeadlineTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.broker = User.objects.create_user(email="broker@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(self.broker)
+        today = timezone.localdate()
+        response = self.client.post(
+            reverse("transaction-list"),
+            {
+                "title": "Harbour view, unit 4",
+                "property_description": "Flat",
+                "purchase_price": "100000.00",
+                "earnest_deposit": "10000.00",
+                "due_diligence_end_date": str(today + timedelta(days=5)),
+                "estimated_closing_date": str(today + timedelta(days=40)),
+                "type": TransactionType.SINGLE_BROKER_SALE,
+                "payload": {"buyer_email": "buyer@example.com", "seller_email": "seller@example.com"},
+            },
+            format="json",
+        )
+        self.transaction = Transaction.objects.get(pk=response.data["id"])
+
+    def test_lists_deadlines_in_window_with_etag(self):
+        response = self.client.get(reverse("deadline-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["kind"] for row in response.data], [DeadlineKind.DUE_DILIGENCE_END])
+        response = self.client.get(reverse("deadline-list"), {"days": 60})
+        self.assertEqual(len(response.data), 2)
+
+        etag = response["ETag"]
+        response = self.client.get(reverse("deadline-list"), {"days": 60}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.transaction.estimated_closing_date += timedelta(days=1)
+        self.transaction.save()
+        sync_deadlines(self.transaction)
+        response = self.client.get(reverse("deadline-list"), {"days": 60}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        other = User.objects.create_user(email="other@example.com", password="pass")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(reverse("deadline-list"), {"days": 60}).data, [])
+
+    def test_closed_transactions_drop_their_deadlines(self):
+        self.transaction.status = TransactionStatus.COMPLETED
+        sync_deadlines(self.transaction)
+        self.assertFalse(TransactionDeadline.objects.exists())
+
+    def test_calendar_feed_serves_ics_by_token(self):
+        url = self.client.get(reverse("deadline-calendar")).data["url"]
+        feed = Client()
+        with self.assertLogs("api", "INFO") as logs:
+            response = feed.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(logs.output, ["INFO:api:GET /api/calendar/[redacted].ics -> 200"])
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = response.content.decode()
+        self.assertEqual(body.count("BEGIN:VEVENT"), 2)
+        self.assertIn("SUMMARY:Due diligence ends: Harbour view\\, unit 4\r\n", body)
+        self.assertEqual(feed.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        rotated = self.client.post(reverse("deadline-calendar")).data["url"]
+        self.assertEqual(feed.get(url).status_code, 404)
+        self.assertEqual(feed.get(rotated).status_code, 200)
+
+
+class CommissionPayoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.primary = User.objects.create_user(email="primary@example.com", password="pass", is_broker=True)
+        self.secondary = User.objects.create_user(email="secondary@example.com", password="pass", is_broker=True)
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+
+    def _completed(self, price: str, split: tuple[str, str] | None = None, closing: str = "2024-02-01"):
+        transaction = Transaction.objects.create(
+            created_by=self.primary,
+            type=TransactionType.DOUBLE_BROKER_SPLIT if split else TransactionType.SINGLE_BROKER_SALE,
+            status=TransactionStatus.COMPLETED,
+            title="Deal",
+            property_description="",
+            purchase_price=Decimal(price),
+            earnest_deposit=Decimal("0"),
+            due_diligence_end_date="2024-01-01",
+            estimated_closing_date=closing,
+        )
+        if split:
+            CommissionSplit.objects.create(
+                transaction=transaction, primary_broker_pct=Decimal(split[0]), secondary_broker_pct=Decimal(split[1])
+            )
+            transaction.participants.create(
+                role=ParticipantRole.BROKER_SECONDARY,
+                invited_email=self.secondary.email,
+                invited_by=self.primary,
+                user=self.secondary,
+            )
+        return transaction
+
+    def test_accumulate_payouts_is_exact(self):
+        rows = [(None, Decimal("100000.01"), 1, Decimal("33.33"), Decimal("66.67"), 2)] * 3
+        payouts = accumulate_payouts(rows, Decimal("0.03"))
+        self.assertEqual(payouts[1].commission + payouts[2].commission, Decimal("9000.0009"))
+        self.assertEqual(payouts[1].amount, Decimal("2999.70"))
+        self.assertEqual(payouts[2].transactions, 3)
+
+    def test_staff_gets_per_broker_totals_and_csv(self):
+        self._completed("200000.00")
+        self._completed("300000.00", split=("60", "40"))
+        self._completed("999999.00", closing="2024-05-01")
+        self.client.force_authenticate(self.staff)
+
+        with self.settings(COMMISSION_RATE="0.05"):
+            response = self.client.get(reverse("commission-payouts"), {"closing_to": "2024-03-01"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["total"], "25000.00")
+            self.assertEqual(
+                [(row["broker_email"], row["transactions"], row["commission"]) for row in response.data["brokers"]],
+                [("primary@example.com", 2, "19000.00"), ("secondary@example.com", 1, "6000.00")],
+            )
+
+            response = self.client.get(reverse("commission-payouts"), {"closing_to": "2024-03-01", "export": "csv"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+            self.assertEqual(lines[0], "transaction_id,broker_id,commission")
+            self.assertEqual(len(lines), 4)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.primary)
+        self.assertEqual(self.client.get(reverse("commission-payouts")).status_code, 403)
+
+
+class CommissionSplitUpdateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.broker = User.objects.create_user(email="broker@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(self.broker)
+        self.transactions = []
+        for index in range(3):
+            response = self.client.post(
+                reverse("transaction-list"),
+                {
+                    "title": f"Deal {index}",
+                    "property_description": "Flat",
+                    "purchase_price": "100000.00",
+                    "earnest_deposit": "1000.00",
+                    "due_diligence_end_date": "2024-01-01",
+                    "estimated_closing_date": "2024-02-01",
+                    "type": TransactionType.DOUBLE_BROKER_SPLIT,
+                    "payload": {
+                        "known_party_role": ParticipantRole.BUYER,
+                        "known_party_email": "buyer@example.com",
+                        "secondary_broker_email": "second@example.com",
+                    },
+                },
+                format="json",
+            )
+            self.transactions.append(Transaction.objects.get(pk=response.data["id"]))
+
+    def _post(self, splits):
+        return self.client.post(reverse("transaction-commission-splits"), {"splits": splits}, format="json")
+
+    def test_updates_all_splits_in_one_statement(self):
+        splits = [
+            {"transaction_id": str(tx.id), "primary_broker_pct": "70.00", "secondary_broker_pct": "30.00"}
+            for tx in self.transactions
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self._post(splits)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(query["sql"].startswith("UPDATE") for query in queries.captured_queries), 2)
+        self.assertEqual({row["primary_broker_pct"] for row in response.data["splits"]}, {"70.00"})
+        self.assertEqual(
+            list(CommissionSplit.objects.values_list("primary_broker_pct", flat=True).distinct()), [Decimal("70.00")]
+        )
+        self.assertEqual(set(Transaction.objects.values_list("version", flat=True)), {2})
+
+    def test_non_owner_is_forbidden_before_validation(self):
+        other = User.objects.create_user(email="other@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(other)
+        # Percentages are invalid too, but the caller learns it is not allowed, not that they are wrong.
+        split = {"transaction_id": str(self.transactions[0].id), "primary_broker_pct": "90.00", "secondary_broker_pct": "90.00"}
+        self.assertEqual(self._post([split]).status_code, 403)
+        self.assertEqual(set(Transaction.objects.values_list("version", flat=True)), {1})
+
+    def test_rejects_whole_batch_when_any_split_is_invalid(self):
+        response = self._post(
+            [
+                {"transaction_id": str(self.transactions[0].id), "primary_broker_pct": "70", "secondary_broker_pct": "30"},
+                {"transaction_id": str(self.transactions[1].id), "primary_broker_pct": "70", "secondary_broker_pct": "40"},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data["splits"]), ["1"])
+        self.assertEqual(set(CommissionSplit.objects.values_list("primary_broker_pct", flat=True)), {Decimal("50.00")})
+
+    def test_stale_version_rolls_back_batch(self):
+        response = self._post(
+            [
+                {"transaction_id": str(self.transactions[0].id), "primary_broker_pct": "70", "secondary_broker_pct": "30"},
+                {
+                    "transaction_id": str(self.transactions[1].id),
+                    "primary_broker_pct": "70",
+                    "secondary_broker_pct": "30",
+                    "version": 7,
+                },
+            ]
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(set(Transaction.objects.values_list("version", flat=True)), {1})
+
+    def test_database_enforces_split_total(self):
+        split = CommissionSplit.objects.first()
+        with self.assertRaises(IntegrityError), atomic():
+            CommissionSplit.objects.filter(pk=split.pk).update(primary_broker_pct=Decimal("99.99"))
+        CommissionSplit.objects.filter(pk=split.pk).update(
+            primary_broker_pct=Decimal("0.01"), secondary_broker_pct=Decimal("99.99")
+        )
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.broker = User.objects.create_user(email="broker@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(self.broker)
+
+    def _create(self, key: str, title: str = "Idempotent deal"):
+        return self.client.post(
+            reverse("transaction-list"),
+            {
+                "title": title,
+                "property_description": "Flat",
+                "purchase_price": "100000.00",
+                "earnest_deposit": "1000.00",
+                "due_diligence_end_date": "2024-01-01",
+                "estimated_closing_date": "2024-02-01",
+                "type": TransactionType.DUE_DILIGENCE,
+                "payload": {},
+            },
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_stored_response_without_creating_again(self):
+        first = self._create("key-1")
+        self.assertEqual(first.status_code, 201)
+        retry = self._create("key-1")
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["ETag"], first["ETag"])
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(IdempotencyRecord.objects.get().state, IdempotencyRecord.State.COMPLETED)
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self._create("key-1")
+        response = self._create("key-1", title="Another deal")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_keys_are_scoped_to_the_caller(self):
+        self._create("key-1")
+        other = User.objects.create_user(email="other@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(other)
+        response = self._create("key-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_duplicate_of_an_in_flight_request_gets_conflict(self):
+        self._create("key-1")
+        IdempotencyRecord.objects.update(state=IdempotencyRecord.State.IN_PROGRESS)
+        response = self._create("key-1")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_abandoned_claim_is_taken_over_after_its_lease(self):
+        self._create("key-1")
+        IdempotencyRecord.objects.update(
+            state=IdempotencyRecord.State.IN_PROGRESS,
+            claimed_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1),
+        )
+        response = self._create("key-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(IdempotencyRecord.objects.get().state, IdempotencyRecord.State.COMPLETED)
+
+    def test_failed_request_releases_its_key(self):
+        invalid = self.client.post(reverse("transaction-list"), {}, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(invalid.status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_returned_client_error_releases_its_key_like_a_raised_one(self):
+        view = SimpleNamespace()
+        handler = idempotent(lambda view, request: Response({"detail": "Nope"}, status=400))
+        request = SimpleNamespace(
+            headers={"Idempotency-Key": "key-1"}, method="POST", path="/api/x/", data={}, user=self.broker
+        )
+
+        self.assertEqual(handler(view, request).status_code, 400)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_write_rolls_back_when_its_response_cannot_be_stored(self):
+        def handler(view, request):
+            User.objects.create_user(email="written@example.com", password="pass")
+            # Another request takes the key over before this one stores its response.
+            IdempotencyRecord.objects.update(claimed_at=timezone.now() + timedelta(seconds=1))
+            return Response({"ok": True}, status=201)
+
+        request = SimpleNamespace(
+            headers={"Idempotency-Key": "key-1"}, method="POST", path="/api/x/", data={}, user=self.broker
+        )
+        with self.assertRaises(IdempotentRequestInProgress):
+            idempotent(handler)(SimpleNamespace(), request)
+        self.assertFalse(User.objects.filter(email="written@example.com").exists())
+
+    def test_fingerprint_uses_parsed_payload(self):
+        factory = APIRequestFactory()
+        payloads = ['{"a": 1, "b": [1, 2]}', '{"b":[1,2],"a":1}']
+        prints = []
+        for payload in payloads:
+            request = Request(factory.post("/api/x/", payload, content_type="application/json"), parsers=[JSONParser()])
+            request.data  # the view parses (and consumes) the body first
+            prints.append(fingerprint(request))
+        self.assertEqual(prints[0], prints[1])
+        request = Request(factory.post("/api/x/", '{"a": 2}', content_type="application/json"), parsers=[JSONParser()])
+        self.assertNotEqual(fingerprint(request), prints[0])
+
+    def test_expired_records_are_replaced_and_purged(self):
+        self._create("key-1")
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertNotIn("Idempotent-Replayed", self._create("key-1"))
+        self.assertEqual(Transaction.objects.count(), 2)
+
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command("purge_idempotency_records", stdout=out)
+        self.assertIn("Purged 1", out.getvalue())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+class FastPathTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.broker = User.objects.create_user(email="broker@example.com", password="pass", is_broker=True)
+        self.secondary = User.objects.create_user(email="second@example.com", password="pass", is_broker=True)
+        self.client.force_authenticate(self.broker)
+        core = {
+            "property_description": "Flat",
+            "purchase_price": "123456.70",
+            "earnest_deposit": "1000.00",
+            "due_diligence_end_date": "2024-01-01",
+            "estimated_closing_date": "2024-02-01",
+        }
+        payloads = [
+            (TransactionType.SINGLE_BROKER_SALE, {"buyer_email": "buyer@example.com", "seller_email": "seller@example.com"}),
+            (
+                TransactionType.DOUBLE_BROKER_SPLIT,
+                {
+                    "known_party_role": ParticipantRole.BUYER,
+                    "known_party_email": "buyer@example.com",
+                    "secondary_broker_email": "second@example.com",
+                    "commission_split": {"primary_broker_pct": "33.33", "secondary_broker_pct": "66.67"},
+                },
+            ),
+            (TransactionType.DUE_DILIGENCE, {}),
+        ]
+        for index, (tx_type, payload) in enumerate(payloads):
+            response = self.client.post(
+                reverse("transaction-list"),
+                {**core, "title": f"Deal {index}", "depositor_name": "Jane" if index else None, "type": tx_type, "payload": payload},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201)
+        split = Transaction.objects.get(type=TransactionType.DOUBLE_BROKER_SPLIT)
+        token = TransactionInvitation.objects.get(
+            transaction=split, participant__role=ParticipantRole.BROKER_SECONDARY
+        ).token
+        accept_invitation(token=token, user=self.secondary)
+
+    def assertRendersIdentically(self, expected, actual):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_list_rows_match_list_serializer(self):
+        for user in (self.broker, self.secondary):
+            queryset = Transaction.objects.visible_to(user).order_by("created_at")
+            expected = TransactionListSerializer(
+                queryset.prefetch_related("participants"), many=True, context={"request": SimpleNamespace(user=user)}
+            ).data
+            self.assertRendersIdentically(expected, fastpath.list_rows(queryset, user))
+
+    def test_detail_row_matches_detail_serializer(self):
+        for transaction_obj in Transaction.objects.all():
+            queryset = Transaction.objects.filter(pk=transaction_obj.pk)
+            expected = TransactionDetailSerializer(
+                queryset.select_related("details", "commission_split").prefetch_related("participants", "invitations__participant").get()
+            ).data
+            self.assertRendersIdentically(expected, fastpath.detail_row(queryset))
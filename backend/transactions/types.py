@@ -0,0 +1,181 @@
+"""Per-``TransactionType`` payload schemas and creation plans.
+
+Each handler's schema is compiled once, at import, into a flat tuple of field parsers.
+``plan_for`` validates a payload in a single pass and returns the ``CreationPlan``
+(participants to invite, commission split, stored details) that ``create_transaction``
+executes without looking at the payload again.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from .models import ParticipantRole, TransactionType, validate_split
+
+Parser = Callable[[str, Any], Any]
+
+
+@dataclass(frozen=True)
+class ParticipantPlan:
+    role: str
+    invited_email: str
+
+
+@dataclass(frozen=True)
+class CreationPlan:
+    type: str
+    details: Dict[str, Any]
+    invitees: tuple[ParticipantPlan, ...] = ()
+    commission_split: tuple[Decimal, Decimal] | None = None
+
+
+@dataclass(frozen=True)
+class PayloadField:
+    parse: Parser
+    required: bool = True
+    default: Any = None
+
+
+def email(name: str, value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValidationError(f"{name} must be a valid email address")
+    try:
+        validate_email(value)
+    except ValidationError as exc:
+        raise ValidationError(f"{name} must be a valid email address") from exc
+    return value
+
+
+def choice(*options: str) -> Parser:
+    allowed = frozenset(options)
+
+    def parse(name: str, value: Any) -> str:
+        if not isinstance(value, str) or value not in allowed:
+            raise ValidationError(f"{name} must be {' or '.join(options)}")
+        return value
+
+    return parse
+
+
+# Same bounds as the ``CommissionSplit`` columns, so nothing is rounded on the way in;
+# also rejects NaN and infinities.
+PERCENTAGE = forms.DecimalField(max_digits=5, decimal_places=2)
+
+
+def split_percentages(name: str, value: Any) -> tuple[Decimal, Decimal]:
+    if not isinstance(value, dict):
+        raise ValidationError(f"{name} must be an object")
+    percentages = []
+    for key in ("primary_broker_pct", "secondary_broker_pct"):
+        raw = value.get(key, 50)
+        if isinstance(raw, bool) or not isinstance(raw, (int, float, str)):
+            raise ValidationError("Commission split percentages must be numbers")
+        try:
+            percentages.append(PERCENTAGE.clean(raw))
+        except ValidationError as exc:
+            raise ValidationError(f"{key}: {' '.join(exc.messages)}") from exc
+    primary, secondary = percentages
+    validate_split(primary, secondary)
+    return primary, secondary
+
+
+def compile_schema(**fields: PayloadField) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    compiled = tuple(fields.items())
+
+    def validate(payload: Dict[str, Any]) -> Dict[str, Any]:
+        cleaned = {}
+        for name, field in compiled:
+            value = payload.get(name)
+            if value is None or value == "":
+                if field.required:
+                    raise ValidationError(f"{name} is required")
+                cleaned[name] = field.default
+            else:
+                cleaned[name] = field.parse(name, value)
+        return cleaned
+
+    return validate
+
+
+class TransactionTypeHandler:
+    type: str
+    schema = staticmethod(compile_schema())
+
+    def invitees(self, cleaned: Dict[str, Any]) -> tuple[ParticipantPlan, ...]:
+        return ()
+
+    def commission_split(self, cleaned: Dict[str, Any]) -> tuple[Decimal, Decimal] | None:
+        return None
+
+    def plan(self, payload: Dict[str, Any]) -> CreationPlan:
+        cleaned = self.schema(payload)
+        return CreationPlan(
+            type=self.type,
+            details=dict(payload),
+            invitees=self.invitees(cleaned),
+            commission_split=self.commission_split(cleaned),
+        )
+
+
+HANDLERS: Dict[str, TransactionTypeHandler] = {}
+
+
+def register(handler_class: type[TransactionTypeHandler]) -> type[TransactionTypeHandler]:
+    HANDLERS[handler_class.type] = handler_class()
+    return handler_class
+
+
+def plan_for(transaction_type: str, payload: Dict[str, Any]) -> CreationPlan:
+    handler = HANDLERS.get(transaction_type)
+    if handler is None:
+        raise ValidationError("Invalid transaction type")
+    return handler.plan(payload)
+
+
+@register
+class SingleBrokerSale(TransactionTypeHandler):
+    type = TransactionType.SINGLE_BROKER_SALE
+    schema = staticmethod(compile_schema(buyer_email=PayloadField(email), seller_email=PayloadField(email)))
+
+    def invitees(self, cleaned):
+        return (
+            ParticipantPlan(ParticipantRole.BUYER, cleaned["buyer_email"]),
+            ParticipantPlan(ParticipantRole.SELLER, cleaned["seller_email"]),
+        )
+
+
+@register
+class DoubleBrokerSplit(TransactionTypeHandler):
+    type = TransactionType.DOUBLE_BROKER_SPLIT
+    schema = staticmethod(
+        compile_schema(
+            known_party_role=PayloadField(choice(ParticipantRole.BUYER, ParticipantRole.SELLER)),
+            known_party_email=PayloadField(email),
+            secondary_broker_email=PayloadField(email),
+            commission_split=PayloadField(split_percentages, required=False, default=(Decimal(50), Decimal(50))),
+        )
+    )
+
+    def invitees(self, cleaned):
+        return (
+            ParticipantPlan(ParticipantRole.BROKER_SECONDARY, cleaned["secondary_broker_email"]),
+            ParticipantPlan(cleaned["known_party_role"], cleaned["known_party_email"]),
+        )
+
+    def commission_split(self, cleaned):
+        return cleaned["commission_split"]
+
+
+@register
+class DueDiligence(TransactionTypeHandler):
+    type = TransactionType.DUE_DILIGENCE
+
+
+@register
+class HiddenDefects(TransactionTypeHandler):
+    type = TransactionType.HIDDEN_DEFECTS
@@ -1,9 +1,21 @@
 from django.urls import path
 
-from .views import AcceptInvitationView, InviteCounterpartyView, TransactionDetailView, TransactionListCreateView
+from .views import (
+    AcceptInvitationView,
+    BulkCommissionSplitView,
+    CalendarSubscriptionView,
+    CommissionPayoutView,
+    DeadlineListView,
+    InviteCounterpartyView,
+    PortfolioView,
+    TransactionDetailView,
+    TransactionListCreateView,
+    calendar_feed,
+)
 
 urlpatterns = [
     path("transactions/", TransactionListCreateView.as_view(), name="transaction-list"),
+    path("transactions/commission-splits/", BulkCommissionSplitView.as_view(), name="transaction-commission-splits"),
     path("transactions/<uuid:id>/", TransactionDetailView.as_view(), name="transaction-detail"),
     path(
         "transactions/<uuid:id>/invite-counterparty/",
@@ -11,4 +23,9 @@ urlpatterns = [
         name="transaction-invite-counterparty",
     ),
     path("invitations/<str:token>/accept/", AcceptInvitationView.as_view(), name="accept-invitation"),
+    path("deadlines/", DeadlineListView.as_view(), name="deadline-list"),
+    path("deadlines/calendar/", CalendarSubscriptionView.as_view(), name="deadline-calendar"),
+    path("portfolio/", PortfolioView.as_view(), name="portfolio"),
+    path("commissions/payouts/", CommissionPayoutView.as_view(), name="commission-payouts"),
+    path("calendar/<str:token>.ics", calendar_feed, name="deadline-calendar-feed"),
 ]
@@ -1,20 +1,41 @@
 from __future__ import annotations
 
-from django.db.models import Q
+import csv
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import condition, require_safe
 from rest_framework import generics, permissions, status, views
+from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.response import Response
 
 from accounts.models import User
-from .models import ParticipantRole, Transaction
+from config.throttling import AccountTokenBucketThrottle, IPTokenBucketThrottle
+from . import commissions, deadlines, fastpath
+from .aggregates import request_scope
+from .exceptions import VersionConflict
+from .idempotency import idempotent
+from .models import CalendarSubscription, ParticipantRole, PortfolioRollup, Transaction
+from .search import search
 from .serializers import (
     AcceptInvitationSerializer,
+    BulkCommissionSplitSerializer,
+    CommissionSplitSerializer,
+    CommissionPayoutQuerySerializer,
+    DeadlineQuerySerializer,
     InviteCounterpartySerializer,
+    PortfolioRollupSerializer,
     TransactionCreateSerializer,
+    TransactionDeadlineSerializer,
     TransactionDetailSerializer,
+    TransactionFilterSerializer,
     TransactionListSerializer,
 )
-from .services import accept_invitation, create_transaction, invite_counterparty
+from .services import accept_invitation, create_transaction, invite_counterparty, update_commission_splits
 
 
 class IsBroker(permissions.BasePermission):
@@ -22,19 +43,39 @@ class IsBroker(permissions.BasePermission):
         return bool(request.user and request.user.is_authenticated and request.user.is_broker)
 
 
+def transaction_etag(transaction_obj: Transaction) -> str:
+    return quote_etag(str(transaction_obj.version))
+
+
+def if_match_version(request) -> int | None:
+    header = request.headers.get("If-Match")
+    if not header or header.strip() == "*":
+        return None
+    etags = parse_etags(header)
+    if len(etags) != 1:
+        raise ParseError("If-Match must carry exactly one transaction ETag.")
+    if etags[0].startswith("W/"):
+        # If-Match uses strong comparison (RFC 9110 13.1.1): a weak validator never matches.
+        raise VersionConflict("If-Match requires a strong ETag; weak validators never match.")
+    try:
+        return int(etags[0].strip('"'))
+    except ValueError as exc:
+        raise ParseError("If-Match does not contain a transaction ETag.") from exc
+
+
+class AggregateScopeMixin:
+    def dispatch(self, request, *args, **kwargs):
+        with request_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+
 class TransactionQuerysetMixin:
     def get_queryset(self):
         user: User = self.request.user
-        return (
-            Transaction.objects.filter(
-                Q(participants__user=user)
-                | Q(participants__invited_email=user.email)
-                | Q(created_by=user)
-            )
-        ).distinct().prefetch_related("participants", "invitations", "details", "commission_split")
+        return Transaction.objects.visible_to(user).prefetch_related("participants")
 
 
-class TransactionListCreateView(TransactionQuerysetMixin, generics.ListCreateAPIView):
+class TransactionListCreateView(AggregateScopeMixin, TransactionQuerysetMixin, generics.ListCreateAPIView):
     serializer_class = TransactionListSerializer
 
     def get_permissions(self):
@@ -47,6 +88,7 @@ class TransactionListCreateView(TransactionQuerysetMixin, generics.ListCreateAPI
             return TransactionCreateSerializer
         return super().get_serializer_class()
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -55,25 +97,41 @@ class TransactionListCreateView(TransactionQuerysetMixin, generics.ListCreateAPI
             type=serializer.validated_data["type"],
             payload=serializer.validated_data.get("payload", {}),
             core_fields=serializer.core_fields(),
+            plan=serializer.validated_data["plan"],
         )
         output = TransactionDetailSerializer(tx, context={"request": request}).data
-        return Response(output, status=status.HTTP_201_CREATED)
+        return Response(output, status=status.HTTP_201_CREATED, headers={"ETag": transaction_etag(tx)})
+
+    def filter_queryset(self, queryset):
+        filters = TransactionFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        queryset = queryset.filter(**filters.lookups())
+        query = self.request.query_params.get("q", "").strip()
+        if query:
+            queryset = search(queryset, query)
+        return queryset
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True, context={"request": request})
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(fastpath.list_rows(queryset, request.user))
 
 
 class TransactionDetailView(TransactionQuerysetMixin, generics.RetrieveAPIView):
     serializer_class = TransactionDetailSerializer
     lookup_field = "id"
 
-    def get_queryset(self):
-        return super().get_queryset().prefetch_related("participants", "invitations", "details", "commission_split")
+    def retrieve(self, request, *args, **kwargs):
+        data = fastpath.detail_row(self.get_queryset().filter(id=kwargs[self.lookup_field]))
+        if data is None:
+            raise Http404
+        return Response(data, headers={"ETag": quote_etag(str(data["version"]))})
 
 
-class InviteCounterpartyView(views.APIView):
+class InviteCounterpartyView(AggregateScopeMixin, views.APIView):
+    throttle_classes = [IPTokenBucketThrottle, AccountTokenBucketThrottle]
+    throttle_scope = "invite"
+
+    @idempotent
     def post(self, request, *args, **kwargs):
         transaction_id = kwargs.get("id")
         transaction_obj = get_object_or_404(Transaction, id=transaction_id)
@@ -83,6 +141,7 @@ class InviteCounterpartyView(views.APIView):
             transaction_obj=transaction_obj,
             acting_user=request.user,
             counterparty_email=serializer.validated_data["counterparty_email"],
+            expected_version=if_match_version(request),
         )
         return Response(
             {
@@ -90,13 +149,156 @@ class InviteCounterpartyView(views.APIView):
                 "invited_email": participant.invited_email,
             },
             status=status.HTTP_201_CREATED,
+            headers={"ETag": transaction_etag(transaction_obj)},
         )
 
 
-class AcceptInvitationView(views.APIView):
+class AcceptInvitationView(AggregateScopeMixin, views.APIView):
+    @idempotent
     def post(self, request, token: str, *args, **kwargs):
         serializer = AcceptInvitationSerializer(data={"token": token})
         serializer.is_valid(raise_exception=True)
-        transaction_obj = accept_invitation(token=token, user=request.user)
+        transaction_obj = accept_invitation(
+            token=token,
+            user=request.user,
+            expected_version=if_match_version(request),
+        )
         data = TransactionDetailSerializer(transaction_obj, context={"request": request}).data
-        return Response(data)
+        return Response(data, headers={"ETag": transaction_etag(transaction_obj)})
+
+
+class DeadlineListView(views.APIView):
+    def get(self, request, *args, **kwargs):
+        query = DeadlineQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = deadlines.window(query.validated_data["days"])
+        upcoming = deadlines.upcoming(request.user, start, end)
+        etag = deadlines.etag(request.user, upcoming, start, end)
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        data = TransactionDeadlineSerializer(upcoming, many=True).data
+        return Response(data, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+class CalendarSubscriptionView(views.APIView):
+    """The caller's secret ICS feed URL; POST rotates it, revoking the previous one."""
+
+    def get(self, request, *args, **kwargs):
+        subscription, _ = CalendarSubscription.objects.get_or_create(user=request.user)
+        return Response({"url": self._feed_url(request, subscription)})
+
+    def post(self, request, *args, **kwargs):
+        subscription, created = CalendarSubscription.objects.get_or_create(user=request.user)
+        if not created:
+            subscription.rotate()
+        return Response({"url": self._feed_url(request, subscription)}, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def _feed_url(request, subscription: CalendarSubscription) -> str:
+        return request.build_absolute_uri(reverse("deadline-calendar-feed", kwargs={"token": subscription.token}))
+
+
+def _feed_deadlines(request, token: str):
+    # Memoized on the request so the ETag check and the view share one lookup.
+    if not hasattr(request, "_feed_deadlines"):
+        subscription = CalendarSubscription.objects.select_related("user").filter(token=token).first()
+        if subscription is None or not subscription.user.is_active:
+            raise Http404
+        start, end = deadlines.feed_window()
+        upcoming = deadlines.upcoming(subscription.user, start, end)
+        request._feed_deadlines = (upcoming, deadlines.etag(subscription.user, upcoming, start, end))
+    return request._feed_deadlines
+
+
+@require_safe
+@condition(etag_func=lambda request, token: _feed_deadlines(request, token)[1])
+def calendar_feed(request, token: str):
+    upcoming, _ = _feed_deadlines(request, token)
+    response = HttpResponse(deadlines.render_ics(upcoming, host=request.get_host()), content_type="text/calendar; charset=utf-8")
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class PortfolioView(generics.ListAPIView):
+    """The broker's portfolio tiles, read from the maintained rollup rows."""
+
+    serializer_class = PortfolioRollupSerializer
+    permission_classes = [IsBroker]
+
+    def get_queryset(self):
+        return PortfolioRollup.objects.filter(broker=self.request.user, transaction_count__gt=0)
+
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+class CommissionPayoutView(views.APIView):
+    """Per-broker commission totals for completed transactions (staff only).
+
+    ``?export=csv`` streams one line per broker share instead, for spreadsheets.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        query = CommissionPayoutQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        rate = commissions.commission_rate()
+        rows = commissions.payout_rows(commissions.closed_transactions(params.get("closing_from"), params.get("closing_to")))
+        if params.get("export") == "csv":
+            return self._csv(rows, rate)
+
+        payouts = commissions.accumulate_payouts(rows, rate)
+        emails = dict(User.objects.filter(pk__in=[pk for pk in payouts if pk is not None]).values_list("pk", "email"))
+        brokers = [
+            {
+                "broker_id": payout.broker_id,
+                "broker_email": emails.get(payout.broker_id),
+                "transactions": payout.transactions,
+                "commission": str(payout.amount),
+            }
+            for payout in sorted(payouts.values(), key=lambda payout: (payout.broker_id is None, payout.broker_id or 0))
+        ]
+        return Response({"rate": str(rate), "brokers": brokers, "total": str(commissions.total(payouts))})
+
+    @staticmethod
+    def _csv(rows, rate) -> StreamingHttpResponse:
+        writer = csv.writer(_Echo())
+
+        def lines():
+            yield writer.writerow(["transaction_id", "broker_id", "commission"])
+            for row in rows:
+                for broker_id, amount in commissions.split_commission(row, rate):
+                    yield writer.writerow([row[0], broker_id or "", amount.quantize(commissions.CENT)])
+
+        response = StreamingHttpResponse(lines(), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="commission-payouts.csv"'
+        return response
+
+
+class BulkCommissionSplitView(views.APIView):
+    permission_classes = [IsBroker]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkCommissionSplitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            updated = update_commission_splits(acting_user=request.user, splits=serializer.validated_data["splits"])
+        except DjangoValidationError as exc:
+            raise ValidationError({"splits": exc.message_dict}) from exc
+        return Response(
+            {
+                "splits": [
+                    {
+                        "transaction_id": transaction_obj.id,
+                        "version": transaction_obj.version,
+                        **CommissionSplitSerializer(transaction_obj.commission_split).data,
+                    }
+                    for transaction_obj in updated
+                ]
+            }
+        )
@@ -0,0 +1,14 @@
+import api from './client'
+
+export interface BatchResult<T = unknown> {
+  path: string
+  status: number
+  body: T
+}
+
+export async function batchGet(paths: string[]) {
+  const response = await api.post<{ responses: BatchResult[] }>('/api/batch/', {
+    requests: paths.map((path) => ({ method: 'GET', path })),
+  })
+  return response.data.responses
+}
@@ -40,3 +40,11 @@ export async function submitBrokerApplication(formValues, fileValues) {
 
   return response.data
 }
+
+export async function openBrokerDocument(url) {
+  // Documents are served behind the API's bearer auth, so fetch them through the client rather than linking.
+  const response = await api.get(url, { responseType: 'blob' })
+  const objectUrl = URL.createObjectURL(response.data)
+  window.open(objectUrl, '_blank', 'noopener')
+  setTimeout(() => URL.revokeObjectURL(objectUrl), 60_000)
+}
@@ -1,8 +1,12 @@
 import api from './client'
-import type { TransactionCreateRequest, TransactionListItem } from '../types/transactions'
+import type { TransactionCreateRequest, TransactionListFilters, TransactionListItem } from '../types/transactions'
 
-export function listTransactions() {
-  return api.get<TransactionListItem[]>('/api/transactions/')
+export function listTransactions(filters: TransactionListFilters = {}) {
+  // Repeated keys (status=a&status=b), which is what the API expects for multi-value filters.
+  return api.get<TransactionListItem[]>('/api/transactions/', {
+    params: filters,
+    paramsSerializer: { indexes: null },
+  })
 }
 
 export function createTransaction(data: TransactionCreateRequest) {
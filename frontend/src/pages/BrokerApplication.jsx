@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from 'react'
-import { fetchBrokerApplication, submitBrokerApplication } from '../api/broker'
+import { fetchBrokerApplication, openBrokerDocument, submitBrokerApplication } from '../api/broker'
 
 const requirementFields = [
   { name: 'date_of_birth', label: 'Date of birth', type: 'date', placeholder: 'YYYY-MM-DD' },
@@ -66,6 +66,14 @@ export default function BrokerApplication() {
     setFileValues((prev) => ({ ...prev, [name]: files?.[0] || null }))
   }
 
+  const handleViewDocument = async (url) => {
+    try {
+      await openBrokerDocument(url)
+    } catch (err) {
+      setError('Unable to open that document right now.')
+    }
+  }
+
   const handleSubmit = async (event) => {
     event.preventDefault()
     setSubmitting(true)
@@ -141,7 +149,12 @@ export default function BrokerApplication() {
                 required={!existingApplication}
               />
               {existingApplication?.id_document_primary && (
-                <small>Uploaded: {existingApplication.id_document_primary.split('/').slice(-1)}</small>
+                <small>
+                  Uploaded.
+                  <button type="button" className="link-button" onClick={() => handleViewDocument(existingApplication.id_document_primary)}>
+                    View file
+                  </button>
+                </small>
               )}
             </label>
 
@@ -155,7 +168,12 @@ export default function BrokerApplication() {
                 required={!existingApplication}
               />
               {existingApplication?.id_document_secondary && (
-                <small>Uploaded: {existingApplication.id_document_secondary.split('/').slice(-1)}</small>
+                <small>
+                  Uploaded.
+                  <button type="button" className="link-button" onClick={() => handleViewDocument(existingApplication.id_document_secondary)}>
+                    View file
+                  </button>
+                </small>
               )}
             </label>
 
@@ -169,7 +187,12 @@ export default function BrokerApplication() {
                 required={!existingApplication}
               />
               {existingApplication?.selfie_with_id && (
-                <small>Uploaded: {existingApplication.selfie_with_id.split('/').slice(-1)}</small>
+                <small>
+                  Uploaded.
+                  <button type="button" className="link-button" onClick={() => handleViewDocument(existingApplication.selfie_with_id)}>
+                    View file
+                  </button>
+                </small>
               )}
             </label>
           </section>
@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useState } from 'react'
 import { Link } from 'react-router-dom'
-import api from '../api/client'
+import { batchGet } from '../api/batch'
 import { createTransaction, listTransactions } from '../api/transactions'
 import type {
   TransactionCoreFields,
@@ -78,10 +78,18 @@ export default function Dashboard() {
   useEffect(() => {
     const loadProfile = async () => {
       try {
-        const response = await api.get<Profile>('/api/auth/profile/')
-        setProfile(response.data)
+        const [profileResult, transactionsResult] = await batchGet(['/api/auth/profile/', '/api/transactions/'])
+        if (profileResult.status !== 200) {
+          throw new Error(`Profile request failed with ${profileResult.status}`)
+        }
+        setProfile(profileResult.body as Profile)
         setMessage('Welcome back!')
-        await loadTransactions()
+        if (transactionsResult.status === 200) {
+          setTransactions(transactionsResult.body as TransactionListItem[])
+        } else {
+          setTransactionsError('Unable to load transactions right now.')
+        }
+        setTransactionsLoading(false)
       } catch (error) {
         console.error(error)
         setMessage('Unable to load profile. Please re-login if needed.')
@@ -27,8 +27,21 @@ export interface TransactionListItem extends TransactionCoreFields {
   type: TransactionType
   status: string
   property_address?: string
+  version: number
   updated_at: string
   my_role?: string | null
   pending_invites_count?: number
   required_next_action?: string | null
 }
+
+export interface TransactionListFilters {
+  q?: string
+  status?: string[]
+  type?: TransactionType[]
+  due_diligence_end_date_after?: IsoDateString
+  due_diligence_end_date_before?: IsoDateString
+  estimated_closing_date_after?: IsoDateString
+  estimated_closing_date_before?: IsoDateString
+  purchase_price_min?: string
+  purchase_price_max?: string
+}